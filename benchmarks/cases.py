@@ -0,0 +1,137 @@
+"""
+cases.py
+
+Benchmark case definitions for the grid_intersect and Converter hot paths.
+
+Each case is a (name, setup) pair. ``setup(workspace)`` prepares whatever
+inputs the case needs inside the shared workspace and returns a zero
+argument callable that runs the code under test once.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from spatial_ops import grid_intersect
+from spatial_ops.converter import Converter
+from spatial_ops.test import synthetic
+
+AOI_NAMES = ["point", "county", "province", "continent", "coastline"]
+
+WRS_LIST_SIZES = [1, 4, 16]
+
+PARCEL_COUNTS = [1000, 10000, 100000]
+
+DISSOLVE_WORKERS = 4
+
+
+class Workspace:
+    """Synthetic grids and AOIs shared by all cases in one run."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.grid_dir = Path(self.root, "grid_files")
+        self.aoi_dir = Path(self.root, "aoi")
+        self._wkt = {}
+
+    def prepare(self):
+        if not Path(self.grid_dir, "MGRS_S2", "mgrs_s2_master.shp").exists():
+            synthetic.build_grid_dir(self.grid_dir)
+        self.aoi_dir.mkdir(parents=True, exist_ok=True)
+        self.activate()
+
+    def activate(self):
+        """Point grid_intersect at the synthetic grids."""
+        grid_intersect.GRID_DIR = self.grid_dir
+
+    def aoi_wkt(self, name):
+        if name not in self._wkt:
+            self._wkt[name] = synthetic.aoi_geometry(name).ExportToWkt()
+        return self._wkt[name]
+
+    def aoi_shapefile(self, name):
+        path = Path(self.aoi_dir, f"{name}.shp")
+        if not path.exists():
+            synthetic.write_aoi_shapefile(path, [synthetic.aoi_geometry(name)])
+        return path
+
+    def parcel_shapefile(self, count):
+        path = Path(self.aoi_dir, f"parcels_{count}.shp")
+        if not path.exists():
+            synthetic.write_parcel_layer(path, count)
+        return path
+
+    def wrs_list(self, size):
+        # a compact square block of neighbouring synthetic path/rows, built
+        # from the id scheme directly so setup doesn't warm the grid files
+        side = max(1, int(size ** 0.5))
+        return [f"{path:03d}{row:03d}"
+                for path in range(5, 5 + side)
+                for row in range(5, 5 + side)][:size]
+
+
+def _find_mgrs(name):
+    def setup(ws):
+        wkt = ws.aoi_wkt(name)
+        return lambda: grid_intersect.find_mgrs_intersection(wkt)
+    return setup
+
+
+def _find_wrs(name):
+    def setup(ws):
+        wkt = ws.aoi_wkt(name)
+        return lambda: grid_intersect.find_wrs_intersection(wkt)
+    return setup
+
+
+def _geom_from_shapefile(name):
+    def setup(ws):
+        path = str(ws.aoi_shapefile(name))
+        return lambda: grid_intersect.get_geom_from_shapefile(path)
+    return setup
+
+
+def _wrs_to_mgrs_list(size):
+    def setup(ws):
+        tiles = ws.wrs_list(size)
+        return lambda: grid_intersect.convert_wrs_to_mgrs_list(tiles)
+    return setup
+
+
+def _dissolve(count, workers=1):
+    def setup(ws):
+        src = str(ws.parcel_shapefile(count))
+        dst = str(Path(ws.aoi_dir, f"dissolved_{count}_{workers}.shp"))
+        converter = Converter()
+        return lambda: converter.dissolve(src, dst, overwrite=True, workers=workers)
+    return setup
+
+
+def _import_startup(module):
+    def setup(ws):
+        cmd = [sys.executable, "-c", f"import {module}"]
+        root = str(Path(__file__).parent.parent)
+        return lambda: subprocess.run(cmd, cwd=root, check=True)
+    return setup
+
+
+def all_cases():
+    """Return the ordered list of (name, setup) benchmark cases."""
+    cases = [
+        ("import[spatial_ops.grid_intersect]", _import_startup("spatial_ops.grid_intersect")),
+        ("import[spatial_ops.converter]", _import_startup("spatial_ops.converter")),
+    ]
+    for name in AOI_NAMES:
+        cases.append((f"find_mgrs_intersection[{name}]", _find_mgrs(name)))
+    for name in AOI_NAMES:
+        cases.append((f"find_wrs_intersection[{name}]", _find_wrs(name)))
+    for name in AOI_NAMES:
+        if name != "point":
+            cases.append((f"get_geom_from_shapefile[{name}]", _geom_from_shapefile(name)))
+    for size in WRS_LIST_SIZES:
+        cases.append((f"convert_wrs_to_mgrs_list[{size}]", _wrs_to_mgrs_list(size)))
+    for count in PARCEL_COUNTS:
+        cases.append((f"Converter.dissolve[{count}]", _dissolve(count)))
+        cases.append((f"Converter.dissolve[{count},workers={DISSOLVE_WORKERS}]",
+                       _dissolve(count, DISSOLVE_WORKERS)))
+    return cases
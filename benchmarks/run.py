@@ -0,0 +1,216 @@
+"""
+run.py
+
+Run the spatial_ops benchmark suite and record results in a JSON history.
+
+Usage:
+    python -m benchmarks.run                       # run all cases, record
+    python -m benchmarks.run -k find_wrs           # only matching cases
+    python -m benchmarks.run --compare BASE HEAD   # compare two recorded runs
+
+Every case is timed twice:
+
+    cold: the first call inside a freshly spawned interpreter, so GDAL
+          driver registration, file opening and any module level caches
+          are all paid for.
+    warm: the median of ``--repeat`` calls in this process after one
+          untimed warm-up call.
+
+Each run is appended to the history file under a label (the short git
+commit by default). After recording, the run is compared against the
+previous label in the history and the process exits with status 1 if any
+warm timing slowed down by more than ``--max-slowdown``.
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_HISTORY = Path(Path(__file__).parent.parent, ".benchmarks", "history.json")
+DEFAULT_WORKSPACE = Path(tempfile.gettempdir(), "spatial_ops_bench")
+
+# Cases faster than this are dominated by noise, don't fail on them
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def git_label():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return datetime.now().strftime("%Y%m%dT%H%M%S")
+
+
+def load_history(path):
+    if Path(path).exists():
+        with open(path) as f:
+            return json.load(f)
+    return {"runs": []}
+
+
+def save_history(path, history):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(str(path) + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def _select_cases(pattern):
+    from benchmarks.cases import all_cases
+
+    cases = all_cases()
+    if pattern:
+        cases = [case for case in cases if re.search(pattern, case[0])]
+    return cases
+
+
+def _cold_run(workspace_root, case_name):
+    """Time a single call of case_name, executed in a spawned process."""
+    from benchmarks.cases import Workspace
+
+    ws = Workspace(workspace_root)
+    ws.activate()
+    setup = dict(_select_cases(None))[case_name]
+    func = setup(ws)
+
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _warm_run(ws, setup, repeat):
+    func = setup(ws)
+    func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings), min(timings)
+
+
+def run_suite(workspace_root, pattern=None, repeat=5, cold=True):
+    from benchmarks.cases import Workspace
+
+    ws = Workspace(workspace_root)
+    ws.prepare()
+
+    spawn = multiprocessing.get_context("spawn")
+    results = {}
+
+    for name, setup in _select_cases(pattern):
+        result = {}
+        if cold:
+            with spawn.Pool(1) as pool:
+                result["cold"] = pool.apply(_cold_run, (str(workspace_root), name))
+        result["warm"], result["warm_min"] = _warm_run(ws, setup, repeat)
+        results[name] = result
+
+        cold_text = f"{result['cold']:9.4f}s" if cold else "        -"
+        print(f"{name:45s} cold {cold_text}  warm {result['warm']:9.4f}s", flush=True)
+
+    return results
+
+
+def _gdal_version():
+    try:
+        from osgeo import gdal
+        return gdal.__version__
+    except ImportError:
+        return None
+
+
+def compare(base_run, head_run, max_slowdown):
+    """Print a comparison table, return the list of regressed case names."""
+    regressions = []
+    print(f"\n{'case':45s} {base_run['label']:>12s} {head_run['label']:>12s}  ratio")
+
+    for name, head in sorted(head_run["results"].items()):
+        base = base_run["results"].get(name)
+        if base is None:
+            continue
+
+        ratio = head["warm"] / base["warm"] if base["warm"] else float("inf")
+        flag = ""
+        if ratio > max_slowdown and head["warm"] > MIN_COMPARABLE_SECONDS:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:45s} {base['warm']:11.4f}s {head['warm']:11.4f}s  {ratio:5.2f}x{flag}")
+
+    return regressions
+
+
+def _find_run(history, label):
+    for run in reversed(history["runs"]):
+        if run["label"] == label:
+            return run
+    raise SystemExit(f"No run labelled {label!r} in history")
+
+
+def cli_setup(argv=None):
+    parser = argparse.ArgumentParser(description="Run the spatial_ops benchmark suite")
+
+    parser.add_argument("-k", dest="pattern", default=None,
+                        help="Only run cases whose name matches this regex")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of timed warm calls per case")
+    parser.add_argument("--no-cold", dest="cold", action="store_false",
+                        help="Skip the cold (spawned process) timings")
+    parser.add_argument("--label", default=None,
+                        help="Label for this run, defaults to the git commit")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY),
+                        help="JSON history file to append results to")
+    parser.add_argument("--workspace", default=str(DEFAULT_WORKSPACE),
+                        help="Directory for the synthetic grids and AOIs")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Fail if a warm timing grows by more than this factor")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"),
+                        help="Compare two recorded runs without running anything")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = cli_setup(argv)
+    history = load_history(args.history)
+
+    if args.compare:
+        base_run = _find_run(history, args.compare[0])
+        head_run = _find_run(history, args.compare[1])
+        return 1 if compare(base_run, head_run, args.max_slowdown) else 0
+
+    label = args.label or git_label()
+    results = run_suite(Path(args.workspace), args.pattern, args.repeat, args.cold)
+
+    head_run = {
+        "label": label,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "gdal": _gdal_version(),
+        "results": results,
+    }
+
+    previous = [run for run in history["runs"] if run["label"] != label]
+    history["runs"] = previous + [head_run]
+    save_history(args.history, history)
+
+    if previous:
+        return 1 if compare(previous[-1], head_run, args.max_slowdown) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,4 +22,8 @@ setup(
     packages=["spatial_ops"],
     zip_safe=False,
     install_requires=install_requires,
+    extras_require={"arrow": ["pyarrow>=8"], "stats": ["numpy"]},
+    entry_points={
+        "console_scripts": ["spatial-ops-tiles=spatial_ops.grid_intersect:main"],
+    },
 )
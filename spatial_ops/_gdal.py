@@ -0,0 +1,55 @@
+"""_gdal.py -- Part of spatialops Module
+
+Lazy handles on the GDAL python bindings.
+
+Importing ``osgeo`` loads GDAL and every registered driver, which is the
+bulk of the import time of this package. The modules here import ``gdal``,
+``ogr`` and ``osr`` from this file instead; the real module is only loaded
+(and ``UseExceptions()`` called where the package relies on it) the first
+time an attribute is used, so code paths that never touch a geometry or
+raster don't pay for GDAL at all.
+"""
+
+import importlib
+import threading
+
+_load_lock = threading.Lock()
+
+
+class LazyModule:
+    """Proxy that imports module_name on first attribute access."""
+
+    def __init__(self, module_name, use_exceptions=False):
+        self.__dict__["_module_name"] = module_name
+        self.__dict__["_use_exceptions"] = use_exceptions
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        with _load_lock:
+            module = self.__dict__["_module"]
+            if module is None:
+                module = importlib.import_module(self._module_name)
+                if self._use_exceptions:
+                    module.UseExceptions()
+                # copy the namespace so later lookups are plain attribute
+                # hits and never reach __getattr__ again
+                self.__dict__.update(module.__dict__)
+                self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self._module_name!r} ({state})>"
+
+
+def is_loaded():
+    """Return True if any of the GDAL bindings have been imported."""
+    return any(proxy.__dict__["_module"] is not None for proxy in (gdal, ogr, osr))
+
+
+gdal = LazyModule("osgeo.gdal", use_exceptions=True)
+ogr = LazyModule("osgeo.ogr", use_exceptions=True)
+osr = LazyModule("osgeo.osr")
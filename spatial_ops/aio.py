@@ -0,0 +1,165 @@
+"""aio.py -- Part of spatialops Module
+
+asyncio wrappers for the grid_intersect queries.
+
+The grid_intersect queries block for seconds on GDAL I/O and GEOS work,
+which stalls an event loop if they are called from a coroutine.
+``AsyncTileQueries`` runs them on a bounded thread pool instead:
+
+    * at most ``max_concurrency`` queries run at once, further queries
+      wait on the loop without taking a thread;
+    * identical queries issued while one is already pending are merged,
+      every caller awaits the same run;
+    * a cancelled caller stops waiting right away. The query itself is
+      cancelled once no caller is waiting for it any more; if it had
+      already started in a thread it finishes there and its result is
+      dropped, and it keeps its concurrency slot until then.
+
+Example::
+
+    async with AsyncTileQueries(max_concurrency=4) as queries:
+        mgrs, wrs = await asyncio.gather(
+            queries.find_mgrs_intersection(wkt),
+            queries.find_wrs_intersection(wkt))
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import grid_intersect
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+
+
+class AsyncTileQueries:
+    """Runs blocking tile queries off the event loop.
+
+    Args:
+        max_concurrency (int): Most queries running at the same time.
+        executor (concurrent.futures.Executor): Pool to run the queries on,
+            a private thread pool of max_concurrency threads by default.
+            A given executor is not shut down by close.
+
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, executor=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="spatial_ops_aio")
+        self._semaphore = None
+        self._loop = None
+        # (func, args) -> [task, number of callers waiting]
+        self._pending = {}
+
+    async def run(self, func, *args):
+        """Runs func(*args) on the executor and returns its result.
+
+        Calls with the same func and (hashable) args made while one is
+        pending share its result. Lists are copied for each caller.
+        """
+        key = (func, args)
+        entry = self._pending.get(key)
+        if entry is None or entry[0].get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._run(func, args))
+            entry = self._pending[key] = [task, 0]
+            task.add_done_callback(functools.partial(self._done, key, entry))
+        else:
+            logger.debug("merging %s%r into the pending query", func.__name__, args)
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                logger.debug("cancelling %s%r, no caller is waiting", func.__name__, args)
+                task.cancel()
+
+        return list(result) if isinstance(result, list) else result
+
+    async def _run(self, func, args):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio primitives can't be shared between event loops
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._semaphore
+
+        await semaphore.acquire()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            # e.g. the executor was shut down, don't leak the slot
+            semaphore.release()
+            raise
+
+        def release(_):
+            # the slot is freed when the thread is done, not when the
+            # caller stops waiting
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass  # loop already closed
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def _done(self, key, entry, task):
+        if self._pending.get(key) is entry:
+            del self._pending[key]
+        # don't let an error nobody waited for be logged as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    async def find_mgrs_intersection(self, wkt_footprint, as_arrow=False):
+        """Async grid_intersect.find_mgrs_intersection."""
+        return await self.run(grid_intersect.find_mgrs_intersection, wkt_footprint, as_arrow)
+
+    async def find_wrs_intersection(self, wkt_footprint, as_arrow=False):
+        """Async grid_intersect.find_wrs_intersection."""
+        return await self.run(grid_intersect.find_wrs_intersection, wkt_footprint, as_arrow)
+
+    def close(self, wait=True):
+        """Shuts down the private executor."""
+        if self._own_executor:
+            self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close(wait=False)
+        return False
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_queries():
+    """Returns the shared AsyncTileQueries used by the module functions."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = AsyncTileQueries()
+        return _default
+
+
+async def find_mgrs_intersection(wkt_footprint, as_arrow=False):
+    """Async find_mgrs_intersection on the shared AsyncTileQueries."""
+    return await default_queries().find_mgrs_intersection(wkt_footprint, as_arrow)
+
+
+async def find_wrs_intersection(wkt_footprint, as_arrow=False):
+    """Async find_wrs_intersection on the shared AsyncTileQueries."""
+    return await default_queries().find_wrs_intersection(wkt_footprint, as_arrow)
@@ -0,0 +1,304 @@
+"""arrow_io.py -- Part of spatialops Module
+
+Apache Arrow input and output for AOIs and tile query results.
+
+Tile lists are returned as Arrow tables with one row per tile:
+
+    tile_id     MGRS 100km id or WRS2 pathrow
+    tile_type   'mgrs' or 'wrs'
+    geometry    WGS84 footprint as WKB, tagged as a GeoArrow WKB column
+    ...         optional metrics, e.g. overlap_area and overlap_fraction
+
+The footprints come from a GridStore, so no grid file is scanned per
+tile. Tables load straight into pandas (``table.to_pandas()``) or DuckDB,
+and ``write_geoparquet`` writes them as GeoParquet in one call.
+
+AOIs can be read the other way round: ``iter_wkb_batches`` streams the
+WKB geometry column of a (Geo)Parquet file, Arrow table or record batch
+reader batch by batch, reading only that column. ``iter_aoi_geometries``
+turns it into OGR geometries, the form the AOI loaders in grid_intersect
+and Converter consume, and ``tag_aoi_batches`` runs batched tile queries
+over it.
+
+pyarrow is an optional dependency (``pip install spatial_ops[arrow]``),
+it is only imported when one of these functions is called.
+"""
+
+import itertools
+import json
+import logging
+
+from .tile_ids import determine_tile_mgrs_or_wrs
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY_COLUMN = "geometry"
+
+# Field metadata marking a binary column as GeoArrow WKB
+GEOARROW_WKB_METADATA = {b"ARROW:extension:name": b"geoarrow.wkb",
+                         b"ARROW:extension:metadata": b"{}"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Arrow support needs pyarrow, install spatial_ops[arrow]") from e
+    return pyarrow
+
+
+PARQUET_SUFFIXES = (".parquet", ".geoparquet")
+
+DEFAULT_BATCH_SIZE = 65536
+
+
+def is_arrow_source(source):
+    """True for (Geo)Parquet paths and pyarrow tables, batches and readers."""
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        return str(source).lower().endswith(PARQUET_SUFFIXES)
+    return type(source).__module__.startswith("pyarrow")
+
+
+def geometry_column_name(schema, default=GEOMETRY_COLUMN):
+    """Returns the primary geometry column named in GeoParquet metadata."""
+    metadata = schema.metadata or {}
+    if b"geo" in metadata:
+        return json.loads(metadata[b"geo"]).get("primary_column", default)
+    return default
+
+
+def _batch_columns(batches, geometry_column):
+    for batch in batches:
+        column = geometry_column or geometry_column_name(batch.schema)
+        idx = batch.schema.get_field_index(column)
+        if idx < 0:
+            raise ValueError("No geometry column {} in the batch".format(column))
+        yield batch.column(idx)
+
+
+def _wkb_geometries(arrays):
+    from ._gdal import ogr
+
+    for array in arrays:
+        for wkb in array.to_pylist():
+            if wkb is not None:
+                yield ogr.CreateGeometryFromWkb(wkb)
+
+
+def iter_wkb_batches(source, geometry_column=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Iterates over the WKB geometry column of an Arrow source batch by batch.
+
+    A Parquet file is opened when this is called, so a missing file or
+    column fails here; its batches are then read one at a time and only the
+    geometry column is decoded. Tables are split into batches without
+    copying.
+
+    Args:
+        source: Path to a (Geo)Parquet file, a pyarrow Table, RecordBatch or
+            RecordBatchReader.
+        geometry_column (str): WKB column name, from the GeoParquet
+            metadata (or 'geometry') by default.
+        batch_size (int): Rows per batch for Parquet files and tables.
+
+    Returns:
+        (iterator): Binary arrays of WKB geometries.
+
+    """
+    pa = _pyarrow()
+
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(str(source))
+        column = geometry_column or geometry_column_name(parquet_file.schema_arrow)
+        if parquet_file.schema_arrow.get_field_index(column) < 0:
+            raise ValueError("No geometry column {} in {}".format(column, source))
+        return (batch.column(0) for batch in
+                parquet_file.iter_batches(batch_size=batch_size, columns=[column]))
+
+    if isinstance(source, pa.RecordBatch):
+        batches = [source]
+    elif isinstance(source, pa.Table):
+        batches = source.to_batches(max_chunksize=batch_size)
+    else:
+        batches = source
+
+    return _batch_columns(batches, geometry_column)
+
+
+def iter_aoi_geometries(source, geometry_column=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Iterates over the geometries of an Arrow source as OGR geometries.
+
+    The source is opened right away, see iter_wkb_batches for the
+    arguments. Each WKB value is copied once into bytes for OGR to parse,
+    a batch at a time. Null geometries are skipped.
+    """
+    return _wkb_geometries(iter_wkb_batches(source, geometry_column, batch_size))
+
+
+def tag_aoi_batches(source, grid_store=None, geometry_column=None,
+                    batch_size=DEFAULT_BATCH_SIZE):
+    """Runs MGRS and WRS2 tile queries over every AOI of an Arrow source.
+
+    Each batch is joined against the GridStore in one go. Its WKB values
+    are copied into bytes for OGR to parse, the batch is not otherwise
+    copied.
+
+    Yields:
+        (pyarrow.Table): Per batch, the AOI row number and list<string>
+            mgrs and wrs columns.
+
+    """
+    pa = _pyarrow()
+    from ._gdal import ogr
+
+    if grid_store is None:
+        from .grid_store import default_store
+        grid_store = default_store()
+
+    row = 0
+    for array in iter_wkb_batches(source, geometry_column, batch_size):
+        geoms = [None if v is None else ogr.CreateGeometryFromWkb(v)
+                 for v in array.to_pylist()]
+        tiles = grid_store.join(geoms)
+
+        yield pa.table({
+            "row": pa.array(range(row, row + len(geoms)), type=pa.int64()),
+            "mgrs": pa.array([t["mgrs"] for t in tiles], type=pa.list_(pa.string())),
+            "wrs": pa.array([t["wrs"] for t in tiles], type=pa.list_(pa.string())),
+        })
+        row += len(geoms)
+
+
+def geo_metadata(geometry_types=("Polygon", "MultiPolygon"), column=GEOMETRY_COLUMN):
+    """Returns the GeoParquet 'geo' schema metadata for a WGS84 WKB column."""
+    return {
+        "version": "1.0.0",
+        "primary_column": column,
+        "columns": {
+            # no "crs" key means OGC:CRS84, i.e. WGS84 lon/lat
+            column: {"encoding": "WKB", "geometry_types": list(geometry_types)},
+        },
+    }
+
+
+def _binary_array(values):
+    """Assembles a binary Arrow array from bytes (or None) values.
+
+    The offsets and data buffers are built directly, rather than
+    converting every value on its own.
+    """
+    pa = _pyarrow()
+
+    offsets = list(itertools.accumulate(
+        (0 if value is None else len(value) for value in values), initial=0))
+    if offsets[-1] > 2**31 - 1:
+        return pa.array(values, type=pa.large_binary())
+
+    null_count = sum(value is None for value in values)
+    validity = None
+    if null_count:
+        validity = pa.array([value is not None for value in values]).buffers()[1]
+
+    data = b"".join(value for value in values if value is not None)
+    return pa.Array.from_buffers(pa.binary(), len(values),
+                                 [validity, pa.array(offsets, type=pa.int32()).buffers()[1],
+                                  pa.py_buffer(data)],
+                                 null_count=null_count)
+
+
+def tile_table(tile_ids, grid_store=None, metrics=None):
+    """Builds an Arrow table of tiles and their footprints.
+
+    Args:
+        tile_ids (iterable): MGRS 100km ids and/or WRS2 pathrows.
+        grid_store (GridStore): Source of the footprints, the shared
+            default store if None.
+        metrics (dict): Optional extra columns, name -> list of values in
+            tile_ids order.
+
+    Returns:
+        (pyarrow.Table): tile_id, tile_type, geometry and metric columns,
+            with GeoParquet metadata.
+
+    """
+    pa = _pyarrow()
+
+    if grid_store is None:
+        from .grid_store import default_store
+        grid_store = default_store()
+
+    tile_ids = list(tile_ids)
+    tile_types = [determine_tile_mgrs_or_wrs(tile_id) for tile_id in tile_ids]
+    wkb = [grid_store.footprint_wkb(tile_id) for tile_id in tile_ids]
+
+    columns = {
+        "tile_id": pa.array(tile_ids, type=pa.string()),
+        "tile_type": pa.array(tile_types, type=pa.string()),
+        GEOMETRY_COLUMN: _binary_array(wkb),
+    }
+    for name, values in (metrics or {}).items():
+        columns[name] = pa.array(values)
+
+    fields = [pa.field(name, array.type) for name, array in columns.items()]
+    fields[2] = fields[2].with_metadata(GEOARROW_WKB_METADATA)
+    schema = pa.schema(fields, metadata={b"geo": json.dumps(geo_metadata()).encode()})
+
+    return pa.Table.from_arrays(list(columns.values()), schema=schema)
+
+
+def overlap_table(tile_ids, wkt_footprint, grid_store=None, overlaps=None):
+    """Builds a tile table with the overlap between each tile and a WGS84
+    footprint: overlap_area (square degrees) and overlap_fraction (of the
+    tile's area).
+
+    overlaps maps tile ids to (overlap area, tile area) already computed by
+    the query, only the tiles missing from it are intersected here.
+    """
+    from ._gdal import ogr
+
+    if grid_store is None:
+        from .grid_store import default_store
+        grid_store = default_store()
+
+    tile_ids = list(tile_ids)
+    overlaps = overlaps or {}
+    footprint = None
+
+    areas, fractions = [], []
+    for tile_id in tile_ids:
+        if tile_id in overlaps:
+            area, tile_area = overlaps[tile_id]
+        else:
+            tile_geom = grid_store.footprint(tile_id)
+            if tile_geom is None:
+                areas.append(None)
+                fractions.append(None)
+                continue
+            if footprint is None:
+                footprint = ogr.CreateGeometryFromWkt(wkt_footprint)
+            area = tile_geom.Intersection(footprint).GetArea()
+            tile_area = tile_geom.GetArea()
+        areas.append(area)
+        fractions.append(area / tile_area if tile_area else None)
+
+    return tile_table(tile_ids, grid_store,
+                      metrics={"overlap_area": areas, "overlap_fraction": fractions})
+
+
+def write_geoparquet(table, path, **kwargs):
+    """Writes an Arrow table from this module to a GeoParquet file.
+
+    Extra keyword arguments go to pyarrow.parquet.write_table.
+    """
+    _pyarrow()
+    import pyarrow.parquet as pq
+
+    if table.schema.metadata is None or b"geo" not in table.schema.metadata:
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"geo"] = json.dumps(geo_metadata()).encode()
+        table = table.replace_schema_metadata(metadata)
+
+    pq.write_table(table, str(path), **kwargs)
+    logger.debug("wrote %d rows to %s", table.num_rows, path)
+    return path
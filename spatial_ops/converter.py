@@ -15,18 +15,202 @@ and generate output polygons.
 
 """
 
-from osgeo import gdal
-from osgeo import ogr
-from osgeo import osr
-
 from pathlib import Path
 from os import makedirs
 import os
 import logging
 import glob
+import hashlib
+import math
+import re
+import uuid
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from ._gdal import gdal, ogr, osr
+from . import arrow_io
+from .profiling import profiled
+from .prune import prune_contained
+
+# Creation options for tiled, losslessly compressed GeoTIFFs that can be
+# window-read efficiently. Pass as creation_options to the jp2 conversions.
+TILED_CREATION_OPTIONS = ['TILED=YES', 'BLOCKXSIZE=512', 'BLOCKYSIZE=512',
+                          'COMPRESS=DEFLATE', 'PREDICTOR=2']
+
+COG_BLOCK_SIZE = 512
+
+OUTPUT_FORMATS = ['GTiff', 'COG', 'VRT']
+
+# Coverage output driver -> file extension
+COVERAGE_FORMATS = {'GeoJSON': '.geojson', 'GPKG': '.gpkg'}
+
+COVERAGE_BATCH_SIZE = 1000
+
+# Coverage layer attributes, (name, OGR field type)
+COVERAGE_FIELDS = [('title', 'OFTString'), ('date', 'OFTDateTime'),
+                   ('platformname', 'OFTString'), ('productid', 'OFTString'),
+                   ('producttype', 'OFTString'), ('format', 'OFTString'),
+                   ('polarization', 'OFTString'), ('sensormode', 'OFTString'),
+                   ('cloud', 'OFTInteger'), ('tileid', 'OFTString'),
+                   ('sat_name', 'OFTString'), ('vendor_name', 'OFTString'),
+                   ('wrs', 'OFTString')]
+
+S2_BAND_ORDER = ['B01', 'B02', 'B03', 'B04', 'B05', 'B06', 'B07', 'B08', 'B8A',
+                 'B09', 'B10', 'B11', 'B12']
+
+_BAND_NAME_RE = re.compile(r'B\d[\dA]')
+
+
+def band_name(path):
+    """Returns the Sentinel-2 band name (B02, B8A, ...) in a file name."""
+    names = _BAND_NAME_RE.findall(Path(path).name)
+    return names[-1] if names else None
+
+
+_RESOLUTION_RE = re.compile(r'_(\d+)m\b')
+
+
+def band_file_map(band_files):
+    """Maps band names to paths, e.g. for build_band_stack.
+
+    A band found at several resolutions (L2A has B02 at 10, 20 and 60m)
+    maps to its finest one, going by the '_10m' style suffix of the file
+    names.
+
+    Raises:
+        ValueError: If a file name holds no band name, or two files hold
+            the same band at the same (or no) resolution.
+
+    """
+    def resolution(path):
+        match = _RESOLUTION_RE.search(Path(path).stem)
+        return int(match.group(1)) if match else None
+
+    by_band = {}
+    for path in band_files:
+        band = band_name(path)
+        if band is None:
+            raise ValueError('no band name in {}'.format(path))
+
+        if band in by_band:
+            current = by_band[band]
+            res, current_res = resolution(path), resolution(current)
+            if res is None or current_res is None or res == current_res:
+                raise ValueError('{} and {} are both band {}'.format(current, path, band))
+            if res > current_res:
+                continue
+        by_band[band] = path
+
+    return by_band
+
+
+def aoi_digest(aoi_wkt, crop_to_cutline=False):
+    """Short hash of a crop, used to name AOI cropped outputs."""
+    key = '{}|{}'.format(aoi_wkt, bool(crop_to_cutline))
+    return hashlib.sha1(key.encode()).hexdigest()[:8]
+
+
+def overview_levels(width, height, block_size=COG_BLOCK_SIZE):
+    """Returns the power of 2 overview factors needed until the raster fits
+    in a single block, e.g. [2, 4, 8, 16, 32] for a 10980 pixel band."""
+    levels = []
+    factor = 2
+    while max(width, height) / (factor // 2) > block_size:
+        levels.append(factor)
+        factor *= 2
+    return levels
+
+
+def footprint_read_size(width, height, max_size=1024):
+    """Returns the (width, height) to read a raster at so neither side
+    exceeds max_size, keeping the aspect ratio."""
+    factor = max(1, math.ceil(max(width, height) / max_size))
+    return max(1, width // factor), max(1, height // factor)
+
+
+def _tile_field(tiles):
+    """Formats a tile id or list of tile ids for a coverage attribute."""
+    if isinstance(tiles, (list, tuple, set)):
+        return ','.join(sorted(tiles))
+    return tiles
+
+
+def _any_geom(geoms):
+    return any(g is not None for g in geoms)
+
+
+def wgs84_srs():
+    """Returns a WGS84 spatial reference using lon/lat axis order."""
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    if hasattr(srs, 'SetAxisMappingStrategy'):
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return srs
+
+
+def _set_option(options, key, value):
+    """Adds KEY=value to a GDAL option list unless KEY is already present."""
+    prefix = key.upper() + '='
+    if value is not None and not any(o.upper().startswith(prefix) for o in options):
+        options.append('{}={}'.format(key, value))
+    return options
+
+
+@contextmanager
+def gdal_config(options):
+    """Temporarily set GDAL config options for the current thread.
+
+    GDAL builds without thread local config support are left untouched,
+    setting process wide options here would race with other conversions;
+    batch drivers set those once with gdal_process_config instead.
+    Options with a value of None are left untouched.
+    """
+    set_option = getattr(gdal, 'SetThreadLocalConfigOption', None)
+    get_option = getattr(gdal, 'GetThreadLocalConfigOption', None)
+    if set_option is None or get_option is None:
+        yield
+        return
+
+    previous = {}
+    for key, value in options.items():
+        if value is None:
+            continue
+        previous[key] = get_option(key, None)
+        set_option(key, str(value))
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            set_option(key, value)
+
+
+@contextmanager
+def gdal_process_config(options=None, cache_mb=None):
+    """Temporarily set process wide GDAL config options and block cache.
+
+    Meant for the thread that drives a batch, around all of its work: the
+    settings are shared by every thread, so worker threads must not change
+    them. Options with a value of None are left untouched.
+    """
+    previous = {}
+    for key, value in (options or {}).items():
+        if value is None:
+            continue
+        previous[key] = gdal.GetConfigOption(key, None)
+        gdal.SetConfigOption(key, str(value))
+
+    previous_cache = gdal.GetCacheMax()
+    if cache_mb:
+        gdal.SetCacheMax(int(cache_mb) * 1024 * 1024)
+    try:
+        yield
+    finally:
+        if cache_mb:
+            gdal.SetCacheMax(previous_cache)
+        for key, value in previous.items():
+            gdal.SetConfigOption(key, value)
 
-gdal.UseExceptions()
 
 class Converter:
     """ Class that bundles the helper spatial conversion functions."""
@@ -72,10 +256,129 @@ class Converter:
         # # Save and close DataSources
         out_data_source = None
 
+    @profiled(aoi="raster_path")
+    def valid_data_footprint(self, raster_path, output=None, max_size=1024,
+                             tolerance=None, nodata=0):
+        """Computes the footprint of the valid (non nodata) pixels of a raster.
+
+        The first band is read decimated to at most max_size pixels a side
+        (GDAL uses an overview level when the raster has one), the valid
+        pixel mask is polygonized and the result simplified, so a full
+        10980x10980 band only costs a ~1024x1024 read.
+
+        Args:
+            raster_path (str): Path to the raster, e.g. a converted band.
+            output (str): Optional path to also save the footprint to as
+                GeoJSON, like create_tile_footprint.
+            max_size (int): Largest side of the decimated read in pixels.
+            tolerance (float): Simplification tolerance in degrees, defaults
+                to one decimated pixel.
+            nodata (float): Nodata value to use if the band doesn't define
+                one (Sentinel-2 uses 0).
+
+        Returns:
+            (str): Footprint as WKT in WGS84 lon/lat, None if the raster has
+                no valid pixels.
+
+        """
+
+        src_ds = gdal.Open(str(raster_path))
+        src_nodata = src_ds.GetRasterBand(1).GetNoDataValue()
+
+        width, height = footprint_read_size(src_ds.RasterXSize, src_ds.RasterYSize, max_size)
+        self.logger.debug('reading {} at {}x{} for footprint'.format(raster_path, width, height))
+
+        # nearest keeps nodata pixels from being averaged into valid ones
+        mem_ds = gdal.Translate('', src_ds, format='MEM', bandList=[1],
+                                width=width, height=height, resampleAlg='nearest',
+                                noData=nodata if src_nodata is None else None)
+
+        raster_srs = osr.SpatialReference(wkt=src_ds.GetProjection())
+        if hasattr(raster_srs, 'SetAxisMappingStrategy'):
+            raster_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        src_ds = None
+
+        mask_band = mem_ds.GetRasterBand(1).GetMaskBand()
+
+        vector_ds = ogr.GetDriverByName('Memory').CreateDataSource('')
+        layer = vector_ds.CreateLayer('footprint', srs=raster_srs, geom_type=ogr.wkbPolygon)
+        layer.CreateField(ogr.FieldDefn('valid', ogr.OFTInteger))
+
+        # the mask is also the polygonize mask, so only valid areas are traced
+        gdal.Polygonize(mask_band, mask_band, layer, 0, ['8CONNECTED=8'])
+
+        footprint = ogr.Geometry(ogr.wkbMultiPolygon)
+        for feature in layer:
+            footprint.AddGeometry(feature.GetGeometryRef())
+
+        pixel_size = abs(mem_ds.GetGeoTransform()[1])
+        mem_ds = None
+        vector_ds = None
+
+        if footprint.IsEmpty():
+            return None
+
+        # simplify in raster units first, the traced outline has a vertex
+        # at every pixel corner
+        footprint = footprint.UnionCascaded().SimplifyPreserveTopology(pixel_size)
+        footprint.Transform(osr.CoordinateTransformation(raster_srs, wgs84_srs()))
+        if tolerance is None:
+            minx, maxx, miny, maxy = footprint.GetEnvelope()
+            tolerance = max(maxx - minx, maxy - miny) / max(width, height)
+        footprint = footprint.SimplifyPreserveTopology(tolerance)
+
+        wkt = footprint.ExportToWkt()
+        if output is not None:
+            self.create_tile_footprint(wkt, output)
+        return wkt
+
+    def jp2_output_path(self, original_file, destination_dir, atmos_cor,
+                        new_path, extension='.tif', aoi_wkt=None,
+                        crop_to_cutline=False):
+        """Returns the path convert_jp2_to_tif writes original_file to.
+
+        Args:
+            original_file (str): Path of the band .jp2 file.
+            destination_dir (str): Name prefix of the converted file.
+            atmos_cor (int): 10, 20 or 60 for atmos corrected (L2A) bands,
+                0 otherwise.
+            new_path (str): Directory the converted file is written to.
+            extension (str): File extension of the output.
+            aoi_wkt (str): AOI of a cropped conversion. Cropped outputs get
+                an '_aoi<hash>' suffix, so they never collide with the full
+                tile or with a crop to another AOI.
+            crop_to_cutline (bool): Part of the AOI suffix, see
+                convert_jp2_to_tif.
+
+        Returns:
+            (str): Output file path.
+
+        """
+
+        # Create the output destination file name and path as a string
+        # need to account for non-corrected files
+        if atmos_cor in [10, 20, 60]:
+            stem = "{}_{}_{}m".format(destination_dir, str(original_file)[-11:-8], atmos_cor)
+        else:
+            stem = "{}_{}".format(destination_dir, str(original_file)[-7:-4])
+
+        if aoi_wkt is not None:
+            stem += "_aoi" + aoi_digest(aoi_wkt, crop_to_cutline)
+
+        return str(Path(new_path, stem + extension))
+
+    @profiled(aoi="original_file")
     def convert_jp2_to_tif(self, original_file,
                                  destination_dir,
                                  atmos_cor,
-                                 new_path):
+                                 new_path,
+                                 creation_options=None,
+                                 num_threads=None,
+                                 output_format='GTiff',
+                                 overview_resampling='AVERAGE',
+                                 aoi_wkt=None,
+                                 crop_to_cutline=False,
+                                 compute_statistics=False):
         """ Converts jp2 to tif, renames/reorganizes original .SAFE download.
 
         This function utilizes GDAL to convert the original .jp2 image data to \
@@ -92,28 +395,53 @@ class Converter:
                 int of 10, 20, or 60. If atmos correction is not specified,
                 value will be 0.
             new_path (str): Path to directory to save the converted jp2 files.
+            creation_options (list): GTiff creation options, for example
+                ``TILED_CREATION_OPTIONS``. Defaults to GDAL's defaults
+                (untiled, uncompressed).
+            num_threads (int or str): Threads used to decode the JPEG2000
+                and to compress the output, e.g. 4 or 'ALL_CPUS'. Defaults
+                to GDAL's single threaded behaviour.
+            output_format (str): 'GTiff' for a plain GeoTIFF, 'COG' for a
+                Cloud Optimized GeoTIFF (tiled, compressed, with internal
+                overviews) written in the same conversion, or 'VRT' for a
+                .vrt pointing at the original jp2 with the projection fixed
+                and no pixels copied (see materialize).
+            overview_resampling (str): Resampling used for the COG overviews,
+                e.g. 'AVERAGE', 'NEAREST', 'BILINEAR'.
+            aoi_wkt (str): Optional WGS84 WKT area of interest. Only the
+                pixel window covering its envelope is converted, so only the
+                JPEG2000 blocks intersecting the AOI are decoded. The output
+                name gets an AOI suffix, see jp2_output_path.
+            crop_to_cutline (bool): With aoi_wkt, also mask out the pixels
+                outside the AOI polygon (set to nodata, 0 if the band has
+                none).
+            compute_statistics (bool): Compute min/max/mean/std, the nodata
+                fraction and a histogram per band and store them as GDAL
+                metadata on the output, read them back with
+                read_statistics. GTiff outputs get them from the block
+                reads that write the file. COG outputs are streamed to a
+                temporary tiled GeoTIFF first, which the COG copy reads
+                again, and VRT outputs read the source once for this.
+                Bands that aren't 8/16 bit integers also take an
+                approximate min/max pass for the histogram range.
+
+        Returns:
+            (str): Path of the converted (or already existing) file.
 
         """
 
-        # Create the output destination file name and path as a string
-        # need to account for non-corrected files
-        if atmos_cor in [10, 20, 60]:
-            output_file = str(Path(new_path, "{}_{}_{}m.tif"
-                                                .format(destination_dir,
-                                                         str(original_file)[
-                                                         -11:-8],
-                                                         atmos_cor)))
-            self.logger.debug('Output path: {}'.format(output_file))
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError('output_format must be one of {}'.format(OUTPUT_FORMATS))
 
-        else:
-            output_file = str(Path(new_path, "{}_{}.tif"
-                                            .format(destination_dir,
-                                             str(original_file)[-7:-4])))
-            self.logger.debug('Output path: {}'.format(output_file))
-
-        if not new_path.exists():
-            self.self.logger.debug('dir doesnt exist, creating')
-            makedirs(new_path)
+        extension = '.vrt' if output_format == 'VRT' else '.tif'
+        output_file = self.jp2_output_path(original_file, destination_dir,
+                                           atmos_cor, new_path, extension,
+                                           aoi_wkt, crop_to_cutline)
+        self.logger.debug('Output path: {}'.format(output_file))
+
+        if not Path(new_path).exists():
+            self.logger.debug('dir doesnt exist, creating')
+            makedirs(new_path, exist_ok=True)
         else:
             self.logger.debug('dir already exists, not creating')
 
@@ -121,26 +449,406 @@ class Converter:
             self.logger.debug('geotiff already exists, skipping')
         else:
             self.logger.debug('converting geotiff')
-            file = gdal.Open(str(original_file))
 
-            prj = file.GetProjection()
-            self.logger.debug('projection {}'.format(prj))
+            options = _set_option(list(creation_options or []), 'NUM_THREADS', num_threads)
+
+            with gdal_config({'GDAL_NUM_THREADS': num_threads}):
+                # VRTs reference the source by path, keep it valid from
+                # wherever the VRT ends up being read
+                file = gdal.Open(os.path.abspath(str(original_file)))
+
+                prj = file.GetProjection()
+                self.logger.debug('projection {}'.format(prj))
+
+                srs = osr.SpatialReference(wkt=prj)
 
-            srs = osr.SpatialReference(wkt=prj)
+                if srs.IsProjected:
+                    self.logger.debug('{}'.format(srs.GetAttrValue('projcs')))
+
+                self.logger.debug('{}'.format(srs.GetAttrValue('geogcs')))
+
+                if aoi_wkt is None:
+                    self._write_raster(file, output_file, srs, output_format,
+                                       options, overview_resampling, compute_statistics)
+                elif output_format == 'VRT':
+                    # the VRT references the window/cutline of the jp2 directly
+                    vrt_ds = self._aoi_source(file, srs, aoi_wkt, crop_to_cutline, output_file)
+                    vrt_ds = None
+                    if compute_statistics:
+                        self._vrt_statistics(output_file)
+                else:
+                    aoi_ds = self._aoi_source(file, srs, aoi_wkt, crop_to_cutline)
+                    self._write_raster(aoi_ds, output_file, srs, output_format,
+                                       options, overview_resampling, compute_statistics)
+                    aoi_ds = None
+
+                file = None
+
+        return output_file
+
+    def read_statistics(self, raster_path):
+        """Returns the per band statistics stored in a raster's metadata.
+
+        Reads what convert_jp2_to_tif(compute_statistics=True) stored, no
+        pixels are read. Bands without statistics are reported as None,
+        see raster_stats.read_band_statistics for the keys.
+        """
+        from .raster_stats import read_band_statistics
+
+        ds = gdal.Open(str(raster_path))
+        statistics = read_band_statistics(ds)
+        ds = None
+        return statistics
+
+    def aoi_pixel_window(self, src_ds, aoi_wkt):
+        """Returns the pixel window of src_ds covering a WGS84 AOI.
+
+        Args:
+            src_ds (gdal.Dataset): North up raster.
+            aoi_wkt (str): AOI geometry as WKT in WGS84 lon/lat.
+
+        Returns:
+            (tuple): (xoff, yoff, xsize, ysize) clipped to the raster, or None
+                if the AOI doesn't overlap it.
+
+        """
 
-            if srs.IsProjected:
-                self.logger.debug('{}'.format(srs.GetAttrValue('projcs')))
+        raster_srs = osr.SpatialReference(wkt=src_ds.GetProjection())
+        if hasattr(raster_srs, 'SetAxisMappingStrategy'):
+            raster_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
 
-            self.logger.debug('{}'.format(srs.GetAttrValue('geogcs')))
+        aoi = ogr.CreateGeometryFromWkt(aoi_wkt)
+        aoi.Transform(osr.CoordinateTransformation(wgs84_srs(), raster_srs))
+        minx, maxx, miny, maxy = aoi.GetEnvelope()
 
+        origin_x, pixel_width, _, origin_y, _, pixel_height = src_ds.GetGeoTransform()
+
+        x0 = max(0, int(math.floor((minx - origin_x) / pixel_width)))
+        x1 = min(src_ds.RasterXSize, int(math.ceil((maxx - origin_x) / pixel_width)))
+        y0 = max(0, int(math.floor((maxy - origin_y) / pixel_height)))
+        y1 = min(src_ds.RasterYSize, int(math.ceil((miny - origin_y) / pixel_height)))
+
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        return x0, y0, x1 - x0, y1 - y0
+
+    def _aoi_source(self, src_ds, srs, aoi_wkt, crop_to_cutline, output_file=''):
+        """Returns a VRT of src_ds limited to the AOI.
+
+        The VRT is kept in memory unless output_file is given. Reading from
+        it only decodes the source blocks inside the AOI window.
+        """
+
+        window = self.aoi_pixel_window(src_ds, aoi_wkt)
+        if window is None:
+            raise ValueError('AOI does not overlap {}'.format(src_ds.GetDescription()))
+
+        self.logger.debug('AOI pixel window {}'.format(window))
+
+        if not crop_to_cutline:
+            return gdal.Translate(output_file, src_ds, format='VRT',
+                                  srcWin=list(window), outputSRS=srs.ExportToWkt())
+
+        cutline_path = '/vsimem/aoi_{}.geojson'.format(uuid.uuid4().hex)
+        self.create_tile_footprint(aoi_wkt, cutline_path)
+
+        nodata = src_ds.GetRasterBand(1).GetNoDataValue()
+        _, pixel_width, _, _, _, pixel_height = src_ds.GetGeoTransform()
+
+        try:
+            return gdal.Warp(output_file, src_ds, format='VRT',
+                             cutlineDSName=cutline_path,
+                             cropToCutline=True,
+                             dstSRS=srs.ExportToWkt(),
+                             xRes=pixel_width, yRes=abs(pixel_height),
+                             targetAlignedPixels=True,
+                             dstNodata=0 if nodata is None else nodata)
+        finally:
+            gdal.Unlink(cutline_path)
+
+    def materialize(self, vrt_path, output_file=None, output_format='GTiff',
+                    creation_options=None, num_threads=None,
+                    overview_resampling='AVERAGE', remove_vrt=False):
+        """Converts a VRT written by convert_jp2_to_tif into a real raster.
+
+        Args:
+            vrt_path (str): Path of the .vrt file.
+            output_file (str): Output path, defaults to the VRT path with a
+                .tif extension.
+            output_format (str): 'GTiff' or 'COG'.
+            creation_options (list): GTiff/COG creation options.
+            num_threads (int or str): Decode/encode threads.
+            overview_resampling (str): Resampling used for COG overviews.
+            remove_vrt (bool): Delete the VRT once the raster is written.
+
+        Returns:
+            (str): Path of the materialized (or already existing) raster.
+
+        """
+
+        if output_format not in ['GTiff', 'COG']:
+            raise ValueError("output_format must be 'GTiff' or 'COG'")
+
+        output_file = output_file or str(Path(vrt_path).with_suffix('.tif'))
+
+        if Path(output_file).exists():
+            self.logger.debug('geotiff already exists, skipping')
+        else:
+            options = _set_option(list(creation_options or []), 'NUM_THREADS', num_threads)
+
+            with gdal_config({'GDAL_NUM_THREADS': num_threads}):
+                vrt_ds = gdal.Open(str(vrt_path))
+                srs = osr.SpatialReference(wkt=vrt_ds.GetProjection())
+                self._write_raster(vrt_ds, output_file, srs, output_format,
+                                   options, overview_resampling)
+                vrt_ds = None
+
+        if remove_vrt:
+            os.remove(vrt_path)
+
+        return output_file
+
+    def _write_raster(self, src_ds, output_file, srs, output_format, options,
+                      overview_resampling, compute_statistics=False):
+        """Writes src_ds to output_file in output_format with srs set.
+
+        Returns the per band statistics if compute_statistics is set, else
+        None.
+        """
+
+        if output_format == 'COG' and compute_statistics:
+            # stream into a tiled temporary tif, the COG copy keeps the
+            # statistics metadata
+            tmp_file = output_file + '.stats.tif'
+            tiled = _set_option(list(options), 'TILED', 'YES')
+            try:
+                statistics = self._stream_gtiff(src_ds, tmp_file, srs, tiled)
+                tmp_ds = gdal.Open(tmp_file)
+                self._write_cog(tmp_ds, output_file, srs, options, overview_resampling)
+                tmp_ds = None
+            finally:
+                if os.path.exists(tmp_file):
+                    gdal.GetDriverByName('GTiff').Delete(tmp_file)
+            return statistics
+
+        if output_format == 'COG':
+            self._write_cog(src_ds, output_file, srs, options, overview_resampling)
+        elif output_format == 'VRT':
+            vrt_ds = gdal.Translate(output_file, src_ds, format='VRT',
+                                    outputSRS=srs.ExportToWkt())
+            vrt_ds = None
+            if compute_statistics:
+                return self._vrt_statistics(output_file)
+        elif compute_statistics:
+            return self._stream_gtiff(src_ds, output_file, srs, options)
+        else:
             driver = gdal.GetDriverByName("GTiff")
-            ds_out = driver.CreateCopy(output_file, file)
+            ds_out = driver.CreateCopy(output_file, src_ds, options=options)
             ds_out.SetProjection(srs.ExportToWkt())
-
-            file = None
             ds_out = None
 
-    def create_coverage_poly(self, product_dict, date_string, output_folder):
+        return None
+
+    def _stream_gtiff(self, src_ds, output_file, srs, options):
+        """Copies src_ds to a GeoTIFF block by block, computing statistics
+        from the same reads. Returns the per band statistics."""
+        from .raster_stats import stream_band_statistics
+
+        first_band = src_ds.GetRasterBand(1)
+        driver = gdal.GetDriverByName("GTiff")
+        ds_out = driver.Create(output_file, src_ds.RasterXSize, src_ds.RasterYSize,
+                               src_ds.RasterCount, first_band.DataType, options=options)
+        ds_out.SetGeoTransform(src_ds.GetGeoTransform())
+        ds_out.SetProjection(srs.ExportToWkt())
+
+        for idx in range(1, src_ds.RasterCount + 1):
+            src_band = src_ds.GetRasterBand(idx)
+            out_band = ds_out.GetRasterBand(idx)
+            if src_band.GetNoDataValue() is not None:
+                out_band.SetNoDataValue(src_band.GetNoDataValue())
+            if src_band.GetDescription():
+                out_band.SetDescription(src_band.GetDescription())
+
+        statistics = stream_band_statistics(src_ds, ds_out)
+        ds_out = None
+        return statistics
+
+    def _vrt_statistics(self, vrt_path):
+        """Computes statistics for a VRT output and stores them in it."""
+        from .raster_stats import stream_band_statistics
+
+        vrt_ds = gdal.Open(str(vrt_path), gdal.GA_Update)
+        statistics = stream_band_statistics(vrt_ds)
+        vrt_ds = None
+        return statistics
+
+    def _write_cog(self, src_ds, output_file, srs, options, resampling):
+        """Writes src_ds to output_file as a Cloud Optimized GeoTIFF.
+
+        Uses the COG driver (GDAL >= 3.1) so tiling, compression and the
+        overviews are produced in one CreateCopy; NUM_THREADS lets it build
+        overview levels in parallel. Older GDAL builds fall back to a tiled
+        temporary GeoTIFF with overviews that is copied with
+        COPY_SRC_OVERVIEWS, which gives the same file layout.
+        """
+
+        # fix the projection on a virtual copy of the source, the COG
+        # output can't be modified after it is written
+        src_vrt = gdal.Translate('', src_ds, format='VRT',
+                                 outputSRS=srs.ExportToWkt())
+
+        options = list(options)
+        _set_option(options, 'COMPRESS', 'DEFLATE')
+
+        cog_driver = gdal.GetDriverByName('COG')
+        if cog_driver is not None:
+            _set_option(options, 'BLOCKSIZE', COG_BLOCK_SIZE)
+            _set_option(options, 'OVERVIEW_RESAMPLING', resampling)
+            cog_driver.CreateCopy(output_file, src_vrt, options=options)
+            return output_file
+
+        self.logger.debug('no COG driver, building overviews in a temporary tif')
+        tmp_file = output_file + '.tmp.tif'
+        gtiff = gdal.GetDriverByName('GTiff')
+        tiled = _set_option(list(options), 'TILED', 'YES')
+        _set_option(tiled, 'BLOCKXSIZE', COG_BLOCK_SIZE)
+        _set_option(tiled, 'BLOCKYSIZE', COG_BLOCK_SIZE)
+
+        try:
+            tmp_ds = gtiff.CreateCopy(tmp_file, src_vrt, options=tiled)
+            tmp_ds.BuildOverviews(resampling, overview_levels(tmp_ds.RasterXSize,
+                                                              tmp_ds.RasterYSize))
+            gtiff.CreateCopy(output_file, tmp_ds,
+                             options=tiled + ['COPY_SRC_OVERVIEWS=YES'])
+            tmp_ds = None
+        finally:
+            if os.path.exists(tmp_file):
+                gtiff.Delete(tmp_file)
+
+        return output_file
+
+    def build_band_stack(self, band_files, output_file, resolution=10,
+                         resampling='bilinear', output_format='VRT',
+                         creation_options=None, num_threads=None,
+                         cache_mb=None, overview_resampling='AVERAGE'):
+        """Stacks the bands of a product into one raster on a common grid.
+
+        Lower resolution bands (20m, 60m) are resampled onto the
+        resolution grid, aligned to multiples of the pixel size, by a single
+        VRT with the chosen resampling. A VRT output is just that
+        description. GTiff and COG outputs are written tile by tile from
+        it, so memory is bounded by the GDAL block cache even for full tiles.
+
+        Args:
+            band_files (list or dict): Band raster paths (jp2, tif or vrt),
+                or a dict of {band name: path}. Bands are ordered B01..B12
+                with B8A after B08; band names come from the file names when
+                a list is given, see band_file_map.
+            output_file (str): Path of the stack to write.
+            resolution (float): Output pixel size in the band's units (m).
+            resampling (str): GDAL resampling for the lower resolution
+                bands, e.g. 'nearest', 'bilinear', 'cubic', 'average'.
+            output_format (str): 'VRT', 'GTiff' or 'COG'.
+            creation_options (list): Creation options for GTiff/COG,
+                defaults to ``TILED_CREATION_OPTIONS`` for GTiff.
+            num_threads (int or str): Decode/encode threads.
+            cache_mb (int): GDAL block cache in MB while writing, GDAL's
+                default if None. The cache is process wide, don't set it
+                while other threads are converting.
+            overview_resampling (str): Resampling used for COG overviews.
+
+        Returns:
+            (str): output_file.
+
+        """
+
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError('output_format must be one of {}'.format(OUTPUT_FORMATS))
+
+        if not isinstance(band_files, dict):
+            band_files = band_file_map(band_files)
+
+        def order(band):
+            return S2_BAND_ORDER.index(band) if band in S2_BAND_ORDER else len(S2_BAND_ORDER)
+
+        bands = sorted(band_files, key=lambda b: (order(b), str(b)))
+        sources = [os.path.abspath(str(band_files[band])) for band in bands]
+
+        projections = set()
+        for source in sources:
+            ds = gdal.Open(source)
+            projections.add(osr.SpatialReference(wkt=ds.GetProjection()).ExportToProj4())
+            ds = None
+        if len(projections) > 1:
+            raise ValueError('band files are not in the same projection')
+
+        vrt_file = output_file if output_format == 'VRT' else ''
+        stack_ds = gdal.BuildVRT(vrt_file, sources, separate=True,
+                                 resolution='user', xRes=resolution, yRes=resolution,
+                                 targetAlignedPixels=True, resampleAlg=resampling)
+
+        for idx, band in enumerate(bands):
+            stack_ds.GetRasterBand(idx + 1).SetDescription(str(band))
+
+        if output_format != 'VRT':
+            if creation_options is None and output_format == 'GTiff':
+                creation_options = TILED_CREATION_OPTIONS
+            options = _set_option(list(creation_options or []), 'NUM_THREADS', num_threads)
+            srs = osr.SpatialReference(wkt=stack_ds.GetProjection())
+
+            with gdal_process_config(cache_mb=cache_mb), \
+                    gdal_config({'GDAL_NUM_THREADS': num_threads}):
+                self._write_raster(stack_ds, output_file, srs, output_format,
+                                   options, overview_resampling)
+
+        # closing the dataset flushes a VRT output to disk
+        stack_ds = None
+        return output_file
+
+    def convert_jp2_to_tif_batch(self, jobs, workers=None, num_threads=None,
+                                 cache_mb=None, **convert_options):
+        """Converts many jp2 files to tif concurrently.
+
+        Each job is converted with convert_jp2_to_tif on a thread pool (GDAL
+        releases the GIL while decoding and encoding), keeping its output
+        naming and skip-if-exists behaviour.
+
+        Args:
+            jobs (iterable): Tuples of (original_file, destination_dir,
+                atmos_cor, new_path), the positional arguments of
+                convert_jp2_to_tif.
+            workers (int): Number of files converted at once. Defaults to
+                min(4, cpu count).
+            num_threads (int): Decode/encode threads per file. Defaults to
+                the cpu count divided between the workers.
+            cache_mb (int): GDAL block cache size in MB for the batch.
+            **convert_options: Passed to convert_jp2_to_tif for every job,
+                e.g. creation_options or output_format='COG'.
+
+        Returns:
+            (list): Output file paths, in the same order as jobs.
+
+        """
+
+        jobs = list(jobs)
+        cpu_count = os.cpu_count() or 1
+        workers = workers or min(4, cpu_count)
+        num_threads = num_threads or max(1, cpu_count // workers)
+
+        def convert(job):
+            return self.convert_jp2_to_tif(*job, num_threads=num_threads,
+                                           **convert_options)
+
+        # set once here, the workers only touch thread local options
+        with gdal_process_config({'GDAL_NUM_THREADS': num_threads}, cache_mb):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(convert, jobs))
+
+    @profiled()
+    def create_coverage_poly(self, product_dict, date_string, output_folder,
+                             output_format='GeoJSON', batch_size=COVERAGE_BATCH_SIZE,
+                             tag_tiles=False, grid_store=None):
         """Creates a vector file representing the geog coverage of the data.
 
         The function utilizes a product dict to create a multipolygon vector file \
@@ -149,160 +857,212 @@ class Converter:
         are extracted from the product dict and added to each polygon of the \
         vector file, which adds metadata to the visualization vector file.
 
+        Products are written one feature at a time as they are read, inside
+        transactions of batch_size features where the format supports them,
+        so memory use doesn't grow with the number of products.
+
         Args:
             product_dict (dict): Dictionary containing all the attributes found in
-                ``product_attribute_list.txt``.
+                ``product_attribute_list.txt``. Any iterable (e.g. a generator)
+                of products or (key, product) pairs is accepted as well.
             date_string (str): String representation of the date when the query \
                 was started.
             output_folder (str): Str repr of the name of folder to write the
                 resulting geojson file to.
+            output_format (str): 'GeoJSON' or 'GPKG'. GeoPackage output gets
+                an R-tree spatial index for fast coverage queries.
+            batch_size (int): Number of features per transaction.
+            tag_tiles (bool): Fill in the tileid (MGRS 100km) and wrs fields
+                of products that don't carry an 'mgrs'/'wrs' key. Tile ids
+                in Sentinel-2 and Landsat titles are used as is, the rest
+                come from one indexed grid join per batch of products.
+            grid_store (GridStore): Grids to tag against, a new GridStore
+                by default. Pass one in to reuse it across calls.
+
+        Returns:
+            (str): Path of the coverage file.
 
         """
 
+        if output_format not in COVERAGE_FORMATS:
+            raise ValueError('Unknown coverage output format {}, expected one of {}'.format(
+                output_format, ', '.join(COVERAGE_FORMATS)))
+
         if not os.path.exists(output_folder):
             os.makedirs(output_folder)
 
-        attribute_list = []
+        if isinstance(product_dict, dict):
+            products = product_dict.values()
+        else:
+            # (key, product) pairs, e.g. product_dict.items()
+            products = (p[1] if isinstance(p, tuple) else p for p in product_dict)
+
+        if tag_tiles:
+            if grid_store is None:
+                from .grid_store import GridStore
+                grid_store = GridStore()
+            products = self._tagged_products(products, grid_store, batch_size)
+        else:
+            products = ((product, None) for product in products)
 
-        # TODO: Parse val['title'] to extract MGRS tile
+        extension = COVERAGE_FORMATS[output_format]
+        out_vector_file_path = os.path.join(output_folder, date_string + 'coverage' + extension)
 
-        for key, value in product_dict.items():
-            # Get Tile Footprint
-            wkt = value['footprint']
-            fp = ogr.CreateGeometryFromWkt(wkt)
+        out_driver = ogr.GetDriverByName(output_format)
+        if os.path.exists(out_vector_file_path):
+            out_driver.DeleteDataSource(out_vector_file_path)
+        out_data_source = out_driver.CreateDataSource(out_vector_file_path)
 
-            if 'mgrs' in value.keys():
-                mgrs_tile = value['mgrs']
-            else:
-                mgrs_tile = "None"
-
-            self.logger.debug('Product: %s' % value)
-
-            if value['platform_name'] == 'Sentinel-1':
-                attribute_list.append((value['detailed_metadata']['platformname'],
-                                        value['detailed_metadata']['producttype'],
-                                        value['detailed_metadata']['format'],
-                                        value['detailed_metadata']['polarisationmode'],
-                                        value['detailed_metadata']['sensoroperationalmode'],
-                                        value['detailed_metadata']['beginposition'],
-                                        value['detailed_metadata']['uuid'],
-                                        value['detailed_metadata']['title'],
-                                        mgrs_tile,
-                                        fp))
-
-            elif value['platform_name'] == 'Sentinel-2':
-
-                attribute_list.append((value['platform_name'],
-                                    value['cloud_percent'],
-                                    value['acquisition_start'],
-                                    value['uuid'],
-                                    mgrs_tile,
-                                    fp,
-                                    value['sat_name'],
-                                    value['vendor_name']))
+        if output_format == 'GPKG':
+            out_layer = out_data_source.CreateLayer(date_string + 'coverage',
+                                                    srs=wgs84_srs(),
+                                                    geom_type=ogr.wkbMultiPolygon,
+                                                    options=['SPATIAL_INDEX=YES'])
+        else:
+            out_layer = out_data_source.CreateLayer(out_vector_file_path,
+                                                    geom_type=ogr.wkbPolygon)
 
+        # Create the fields for the meta data
+        for name, field_type in COVERAGE_FIELDS:
+            out_layer.CreateField(ogr.FieldDefn(name, getattr(ogr, field_type)))
 
-        out_driver = ogr.GetDriverByName('GeoJSON')
-        out_vector_file_path =  os.path.join(output_folder, date_string + 'coverage.geojson')
+        # Get the output Layer's Feature Definition
+        feature_defn = out_layer.GetLayerDefn()
 
-        # Create the output GeoJSON
-        if os.path.exists(os.path.split(out_vector_file_path)[0]):
-            out_data_source = out_driver.CreateDataSource(out_vector_file_path)
-        else:
-            print('something broke, byeeeeeee')
-            return None
+        use_transactions = bool(out_data_source.TestCapability(ogr.ODsCTransactions))
+        in_batch = 0
+        written = 0
 
-        out_layer = out_data_source.CreateLayer(
-            os.path.join(output_folder,
-                    date_string + 'coverage.geojson'),
-                        geom_type=ogr.wkbPolygon)
+        try:
+            for product, geom in products:
+                self.logger.debug('Product: %s' % product)
 
-        # Create the fields for the meta data
-        # Add metadata to coverage multi-poly
-        # idField = ogr.FieldDefn('tileid', ogr.OFTString)
-        # out_layer.CreateField(idField)
-        # maybe add later
+                out_feature = self._coverage_feature(feature_defn, product, geom)
+                if out_feature is None:
+                    continue
 
-        titleField = ogr.FieldDefn('title', ogr.OFTString)
-        out_layer.CreateField(titleField)
+                if output_format == 'GPKG':
+                    out_feature.SetGeometry(ogr.ForceToMultiPolygon(out_feature.GetGeometryRef()))
 
-        dateField = ogr.FieldDefn('date', ogr.OFTDateTime)
-        out_layer.CreateField(dateField)
+                if use_transactions and in_batch == 0:
+                    out_data_source.StartTransaction()
 
-        platformNameField = ogr.FieldDefn('platformname', ogr.OFTString)
-        out_layer.CreateField(platformNameField)
+                # Add new feature to output Layer
+                out_layer.CreateFeature(out_feature)
+                out_feature = None
+                in_batch += 1
+                written += 1
+
+                if use_transactions and in_batch >= batch_size:
+                    out_data_source.CommitTransaction()
+                    in_batch = 0
+
+            if use_transactions and in_batch:
+                out_data_source.CommitTransaction()
+        except Exception:
+            if use_transactions and in_batch:
+                out_data_source.RollbackTransaction()
+            raise
+        finally:
+            out_layer = None
+            out_data_source = None
 
-        productidField = ogr.FieldDefn('productid', ogr.OFTString)
-        out_layer.CreateField(productidField)
+        self.logger.debug('wrote {} coverage features to {}'.format(written, out_vector_file_path))
 
-        productTypeField = ogr.FieldDefn('producttype', ogr.OFTString)
-        out_layer.CreateField(productTypeField)
+        return out_vector_file_path
 
-        productFormatField = ogr.FieldDefn('format', ogr.OFTString)
-        out_layer.CreateField(productFormatField)
+    def _tagged_products(self, products, grid_store, batch_size):
+        """Yields (product, footprint geometry) pairs for products, with
+        'mgrs' and 'wrs' tile lists added where they were missing."""
+        from .tile_ids import tile_from_title
 
-        polarizationField = ogr.FieldDefn('polarization', ogr.OFTString)
-        out_layer.CreateField(polarizationField)
+        batch = []
 
-        sensorModeField = ogr.FieldDefn('sensormode', ogr.OFTString)
-        out_layer.CreateField(sensorModeField)
+        def tag(batch):
+            geoms = [ogr.CreateGeometryFromWkt(p['footprint']) for p in batch]
+            need_mgrs = [g if 'mgrs' not in p else None for p, g in zip(batch, geoms)]
+            need_wrs = [g if 'wrs' not in p else None for p, g in zip(batch, geoms)]
 
-        cloudField = ogr.FieldDefn('cloud', ogr.OFTInteger)
-        out_layer.CreateField(cloudField)
+            mgrs_tiles = grid_store.join(need_mgrs, wrs=False) if _any_geom(need_mgrs) else None
+            wrs_tiles = grid_store.join(need_wrs, mgrs=False) if _any_geom(need_wrs) else None
 
-        idField = ogr.FieldDefn('tileid', ogr.OFTString)
-        out_layer.CreateField(idField)
+            for idx, (product, geom) in enumerate(zip(batch, geoms)):
+                tags = {}
+                if need_mgrs[idx] is not None:
+                    tags['mgrs'] = mgrs_tiles[idx]['mgrs']
+                if need_wrs[idx] is not None:
+                    tags['wrs'] = wrs_tiles[idx]['wrs']
+                yield dict(product, **tags), geom
 
-        satelliteNameField = ogr.FieldDefn('sat_name', ogr.OFTString)
-        out_layer.CreateField(satelliteNameField)
+        for product in products:
+            title = (product.get('title') or product.get('vendor_name')
+                     or product.get('detailed_metadata', {}).get('title'))
+            tile = tile_from_title(title)
+            if tile is not None and tile[0] not in product:
+                # the product is that tile, no need to intersect
+                product = dict(product, **{tile[0]: [tile[1]]})
 
-        vendorNameField = ogr.FieldDefn('vendor_name', ogr.OFTString)
-        out_layer.CreateField(vendorNameField)
+            batch.append(product)
+            if len(batch) >= batch_size:
+                yield from tag(batch)
+                batch = []
 
-        # Get the output Layer's Feature Definition
-        feature_defn = out_layer.GetLayerDefn()
+        if batch:
+            yield from tag(batch)
 
-        for feature in attribute_list:
+    def _coverage_feature(self, feature_defn, product, geom=None):
+        """Returns the coverage layer feature for a product, None for
+        platforms the coverage layer doesn't describe."""
 
-            if feature[0] == 'Sentinel-1':
+        mgrs_tile = _tile_field(product.get('mgrs', "None"))
 
-                # create a new feature
-                out_feature = ogr.Feature(feature_defn)
-                # Set new geometry
-                out_feature.SetGeometry(feature[9])
-                out_feature.SetField('title', feature[7])
-                out_feature.SetField('productid', feature[6])
-                out_feature.SetField('date', feature[5].isoformat(' ', 'seconds'))
-                out_feature.SetField('platformname', feature[0])
-                out_feature.SetField('producttype', feature[1])
-                out_feature.SetField('format', feature[2])
-                out_feature.SetField('polarization', feature[3])
-                out_feature.SetField('sensormode', feature[4])
+        out_feature = ogr.Feature(feature_defn)
 
-                # Add new feature to output Layer
-                out_layer.CreateFeature(out_feature)
+        if product['platform_name'] == 'Sentinel-1':
+            metadata = product['detailed_metadata']
+            out_feature.SetField('title', metadata['title'])
+            out_feature.SetField('productid', metadata['uuid'])
+            out_feature.SetField('date', metadata['beginposition'].isoformat(' ', 'seconds'))
+            out_feature.SetField('platformname', metadata['platformname'])
+            out_feature.SetField('producttype', metadata['producttype'])
+            out_feature.SetField('format', metadata['format'])
+            out_feature.SetField('polarization', metadata['polarisationmode'])
+            out_feature.SetField('sensormode', metadata['sensoroperationalmode'])
+
+        elif product['platform_name'] == 'Sentinel-2':
+            out_feature.SetField('tileid', mgrs_tile)
+            out_feature.SetField('productid', product['uuid'])
+            out_feature.SetField('date', product['acquisition_start'].isoformat(' ', 'seconds'))
+            out_feature.SetField('cloud', int(float(product['cloud_percent'])))
+            out_feature.SetField('sat_name', product['sat_name'])
+            out_feature.SetField('vendor_name', product['vendor_name'])
 
-            else:
-                out_feature = ogr.Feature(feature_defn)
-                # Set new geometry
-                out_feature.SetGeometry(feature[5])
-                out_feature.SetField('tileid', feature[4])
-                out_feature.SetField('productid', feature[3])
-                out_feature.SetField('date', feature[2].isoformat(' ', 'seconds'))
-                out_feature.SetField('cloud', int(float(feature[1])))
-                out_feature.SetField('sat_name', feature[6])
-                out_feature.SetField('vendor_name', feature[7])
-                # Add new feature to output Layer
-                out_layer.CreateFeature(out_feature)
+        else:
+            return None
 
+        if 'wrs' in product:
+            out_feature.SetField('wrs', _tile_field(product['wrs']))
+        if 'mgrs' in product and product['platform_name'] != 'Sentinel-2':
+            out_feature.SetField('tileid', mgrs_tile)
 
-    def simplify_query_poly(self, input_path, output_path):
+        # Set new geometry from the tile footprint
+        if geom is None:
+            geom = ogr.CreateGeometryFromWkt(product['footprint'])
+        out_feature.SetGeometry(geom)
+        return out_feature
+
+    @profiled(aoi="input_path")
+    def simplify_query_poly(self, input_path, output_path, prune=True):
         """Converts input extent polygon to geojson and simplifies each part.
 
         Args:
-            input_path (str): Path to the input vector file.
+            input_path (str): Path to the input vector file, or a
+                (Geo)Parquet file or pyarrow Table whose WKB geometry column
+                is read batch by batch.
             output_path (str): Path to the directory where the output simplified
                 vector file should be saved.
+            prune (bool): Drop simplified parts contained in (or duplicating)
+                another part before the union, the result is the same.
 
         Returns:
             (list): List of footprints in .wkt format from the broken up and
@@ -310,76 +1070,93 @@ class Converter:
                 something goes wrong.
         """
 
-        # Convert SHP or KML to GEOJSON here
-        if Path(input_path).suffix == '.shp':
-            self.logger.debug('Input area mask is a SHP')
-            in_driver = ogr.GetDriverByName('ESRI Shapefile')
+        if arrow_io.is_arrow_source(input_path):
+            self.logger.debug('Input area mask is a GeoParquet file or Arrow table')
+            geometries = arrow_io.iter_aoi_geometries(input_path)
 
-        elif Path(input_path).suffix == '.kml':
-            self.logger.debug('Input area mask is a KML')
-
-        elif Path(input_path).suffix == '.geojson':
-            self.logger.debug('Input area mask is a GeoJson')
-            in_driver = ogr.GetDriverByName('GEOJson')
         else:
-            print('Invalid vector polygon file provided...')
-            return None
+            # Convert SHP or KML to GEOJSON here
+            if Path(input_path).suffix == '.shp':
+                self.logger.debug('Input area mask is a SHP')
+                in_driver = ogr.GetDriverByName('ESRI Shapefile')
+
+            elif Path(input_path).suffix == '.kml':
+                self.logger.debug('Input area mask is a KML')
+                in_driver = ogr.GetDriverByName('KML')
+
+            elif Path(input_path).suffix == '.geojson':
+                self.logger.debug('Input area mask is a GeoJson')
+                in_driver = ogr.GetDriverByName('GEOJson')
+            else:
+                print('Invalid vector polygon file provided...')
+                return None
 
-        self.logger.info('input_path: %s', input_path)
-        
-        data_source = in_driver.Open(input_path, 0)
+            self.logger.info('input_path: %s', input_path)
+
+            data_source = in_driver.Open(input_path, 0)
+
+            if not data_source:
+                return None
 
-        if data_source:
             layer = data_source.GetLayer()
-            multipoly = ogr.Geometry(ogr.wkbMultiPolygon)
-
-            # TODO: Only simplify to a convex hull if the points > 199
-            for idx, feature in enumerate(layer):
-                self.logger.debug('Feature is... {}'.format(feature))
-
-                # Create a wkt of the convex hull around each linear ring
-                # which is a basic primitive to represent a polygon
-                # Simplify the footprint before adding to the list
-                # simplify uses the units of projection of the file
-                # in this case it is decimal degrees
-                fp = ogr.CreateGeometryFromWkt(
-                    feature.GetGeometryRef().ConvexHull().ExportToWkt()).Simplify(0.001)
-
-                multipoly.AddGeometry(fp)
-
-            # write out the multipoly of the simple coverage
-            out_driver = ogr.GetDriverByName('ESRI Shapefile')
-            # Create the output GeoJSON
-            out_data_source = out_driver.CreateDataSource(output_path)
-            out_layer = out_data_source.CreateLayer("test",
-                                                    geom_type=ogr.wkbPolygon)
+            geometries = (feature.GetGeometryRef() for feature in layer)
 
-            # Set new geometry
-            unioned_geometry = multipoly.UnionCascaded()
-            fp_list = []
+        footprints = []
 
-            for geom_part in unioned_geometry:
+        # TODO: Only simplify to a convex hull if the points > 199
+        for geom in geometries:
 
-                if geom_part.GetGeometryName() == 'LINEARRING':
-                    # Its a linear ring
-                    #convert to polygon
-                    poly = ogr.Geometry(ogr.wkbPolygon)
-                    poly.AddGeometry(geom_part)
+            # Create a wkt of the convex hull around each linear ring
+            # which is a basic primitive to represent a polygon
+            # Simplify the footprint before adding to the list
+            # simplify uses the units of projection of the file
+            # in this case it is decimal degrees
+            fp = ogr.CreateGeometryFromWkt(
+                geom.ConvexHull().ExportToWkt()).Simplify(0.001)
 
-                    fp_list.append(poly.ExportToWkt())
-                    self.addPolygon(poly.ExportToWkb(), out_layer )
-                else:
-                    fp_list.append(geom_part.ExportToWkt())
-                    self.addPolygon(geom_part.ExportToWkb(), out_layer )
+            footprints.append(fp)
+
+        if prune:
+            pruned = prune_contained(footprints)
+            footprints = pruned.geometries
+            self.logger.info('pruned %d contained and %d duplicate parts of %d',
+                             pruned.contained, pruned.duplicates, pruned.input_count)
+
+        multipoly = ogr.Geometry(ogr.wkbMultiPolygon)
+        for fp in footprints:
+            multipoly.AddGeometry(fp)
+
+        # write out the multipoly of the simple coverage
+        out_driver = ogr.GetDriverByName('ESRI Shapefile')
+        # Create the output GeoJSON
+        out_data_source = out_driver.CreateDataSource(output_path)
+        out_layer = out_data_source.CreateLayer("test",
+                                                geom_type=ogr.wkbPolygon)
+
+        # Set new geometry
+        unioned_geometry = multipoly.UnionCascaded()
+        fp_list = []
+
+        for geom_part in unioned_geometry:
 
+            if geom_part.GetGeometryName() == 'LINEARRING':
+                # Its a linear ring
+                #convert to polygon
+                poly = ogr.Geometry(ogr.wkbPolygon)
+                poly.AddGeometry(geom_part)
+
+                fp_list.append(poly.ExportToWkt())
+                self.addPolygon(poly.ExportToWkb(), out_layer )
             else:
-                pass
-                    # self.addPolygon(geom.ExportToWkb(), out_lyr)
-            out_data_source = None
+                fp_list.append(geom_part.ExportToWkt())
+                self.addPolygon(geom_part.ExportToWkb(), out_layer )
 
-            return fp_list
         else:
-            return None
+            pass
+                # self.addPolygon(geom.ExportToWkb(), out_lyr)
+        out_data_source = None
+
+        return fp_list
 
     def multipoly2poly(self, in_lyr, out_lyr):
         for in_feat in in_lyr:
@@ -413,36 +1190,48 @@ class Converter:
         lyr = ds.CreateLayer(lyr_name, srs, geom_type)
         return ds, lyr
 
-    def dissolve(self, input, output, multipoly=False, overwrite=False):
+    @profiled(aoi="input")
+    def dissolve(self, input, output, multipoly=False, overwrite=False, workers=1):
         """ code taken from
         https://stackoverflow.com/questions/47038407/dissolve-overlapping-polygons-with-gdal-ogr-while-keeping-non-connected-result
+
+        Touching or overlapping features are grouped into connected
+        components first and each component is unioned separately, see
+        spatial_ops.dissolve. Pass workers > 1 (None for one per CPU) to
+        union the components in worker processes.
         """
+        from .dissolve import dissolve_geometries, iter_polygons
+
         ds = ogr.Open(str(input))
         lyr = ds.GetLayer()
         out_ds, out_lyr = self.createDS(output, ds.GetDriver().GetName(), lyr.GetGeomType(), lyr.GetSpatialRef(), overwrite)
         defn = out_lyr.GetLayerDefn()
-        multi = ogr.Geometry(ogr.wkbMultiPolygon)
-        for feat in lyr:
-            if feat.geometry():
-                feat.geometry().CloseRings() # this copies the first point to the end
-                wkt = feat.geometry().ExportToWkt()
-                multi.AddGeometryDirectly(ogr.CreateGeometryFromWkt(wkt))
-        union = multi.UnionCascaded()
+
+        unions = dissolve_geometries(iter_polygons(lyr), workers=workers)
+
         if multipoly is False:
-            for geom in union:
-                poly = ogr.CreateGeometryFromWkb(geom.ExportToWkb())
-                feat = ogr.Feature(defn)
-                feat.SetGeometry(poly)
-                out_lyr.CreateFeature(feat)
+            for union in unions:
+                parts = union if union.GetGeometryName() == 'MULTIPOLYGON' else [union]
+                for geom in parts:
+                    poly = ogr.CreateGeometryFromWkb(geom.ExportToWkb())
+                    feat = ogr.Feature(defn)
+                    feat.SetGeometry(poly)
+                    out_lyr.CreateFeature(feat)
         else:
+            multi = ogr.Geometry(ogr.wkbMultiPolygon)
+            for union in unions:
+                parts = union if union.GetGeometryName() == 'MULTIPOLYGON' else [union]
+                for geom in parts:
+                    multi.AddGeometry(geom)
             out_feat = ogr.Feature(defn)
-            out_feat.SetGeometry(union)
+            out_feat.SetGeometry(multi)
             out_lyr.CreateFeature(out_feat)
-            out_ds.Destroy()
 
-        ds.Destroy()
+        out_ds = None
+        ds = None
         return True
 
+    @profiled(aoi="input_path")
     def get_footprint_from_simple_poly(self, input_path):
         """Converts input vector file into a WKT footprint.
 
@@ -533,6 +1322,8 @@ class Converter:
             return True
 
     def shapefile_to_geojson(self, path_to_shapefile):
+        """Returns the geometry of the last feature as GeoJSON, use
+        features.iter_features to stream every feature."""
         driver = ogr.GetDriverByName("ESRI Shapefile")
         shapefile_ds = driver.Open(path_to_shapefile, 0)
 
@@ -547,6 +1338,8 @@ class Converter:
         return geojson_string
 
     def shapefile_to_wkt(self, path_to_shapefile):
+        """Returns the geometry of the last feature as WKT, use
+        features.iter_features to stream every feature."""
         driver = ogr.GetDriverByName("ESRI Shapefile")
         shapefile_ds = driver.Open(path_to_shapefile, 0)
 
@@ -0,0 +1,191 @@
+"""dissolve.py -- Part of spatialops Module
+
+Dissolve engine used by Converter.dissolve.
+
+Instead of unioning a whole layer in one UnionCascaded call, features are
+first grouped into connected components of polygons that touch or
+overlap, found with an EnvelopeIndex and exact Intersects tests. Each
+component is unioned on its own, optionally across worker processes, and
+the results are yielded as soon as they are ready. Polygons in different
+components can't affect each other's union, so the parts produced are the
+same as with a single union of the layer.
+"""
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ._gdal import ogr
+from .spatial_index import MultiScaleEnvelopeIndex
+
+logger = logging.getLogger(__name__)
+
+# Features per task sent to a worker process, small components are batched
+# so pickling overhead doesn't dominate
+BATCH_FEATURES = 2000
+
+# Envelopes read ahead to pick the index cell size
+CELL_SIZE_SAMPLE = 1000
+
+
+class UnionFind:
+    """Disjoint sets over the integers 0..size-1."""
+
+    def __init__(self, size=0):
+        self.parent = list(range(size))
+
+    def add(self):
+        """Adds a new singleton set and returns its member."""
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def groups(self):
+        """Returns the sets as lists of members, ordered by smallest member."""
+        groups = {}
+        for item in range(len(self.parent)):
+            groups.setdefault(self.find(item), []).append(item)
+        return list(groups.values())
+
+
+def connected_components(envelopes, intersects, cell_size=None):
+    """Groups items whose envelopes overlap and that intersect.
+
+    Envelopes are consumed one at a time, intersects(i, j) is only called
+    once item i has been read.
+
+    Args:
+        envelopes (iterable): (minx, maxx, miny, maxy) per item.
+        intersects (callable): intersects(i, j) exact test for two items
+            whose envelopes overlap.
+        cell_size (float): Finest MultiScaleEnvelopeIndex cell size,
+            defaults to four times the median envelope width of the first
+            CELL_SIZE_SAMPLE envelopes. Larger envelopes go to coarser
+            levels, so mixed sizes don't degrade the index.
+
+    Returns:
+        (list): Lists of item indices, one per component.
+
+    """
+    envelopes = iter(envelopes)
+    if cell_size is None:
+        sample = list(itertools.islice(envelopes, CELL_SIZE_SAMPLE))
+        widths = sorted(max(e[1] - e[0], e[3] - e[2]) for e in sample) or [1.0]
+        cell_size = max(widths[len(widths) // 2] * 4, 1e-9)
+        envelopes = itertools.chain(sample, envelopes)
+
+    index = MultiScaleEnvelopeIndex(cell_size)
+    components = UnionFind()
+
+    for envelope in envelopes:
+        item = components.add()
+        for other in index.query(envelope):
+            if components.find(item) != components.find(other) and intersects(item, other):
+                components.union(item, other)
+        index.insert(item, envelope)
+
+    return components.groups()
+
+
+def union_wkb(wkb_list):
+    """Unions a component given as WKB polygons, returns WKB."""
+    multi = ogr.Geometry(ogr.wkbMultiPolygon)
+    for wkb in wkb_list:
+        geom = ogr.CreateGeometryFromWkb(wkb)
+        if geom.GetGeometryName() == 'MULTIPOLYGON':
+            for part in geom:
+                multi.AddGeometry(part)
+        else:
+            multi.AddGeometryDirectly(geom)
+    return multi.UnionCascaded().ExportToWkb()
+
+
+def _union_batch(components):
+    return [union_wkb(wkb_list) for wkb_list in components]
+
+
+def _batches(components, batch_features):
+    batch, size = [], 0
+    for component in components:
+        batch.append(component)
+        size += len(component)
+        if size >= batch_features:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def iter_polygons(layer):
+    """Yields the geometries of a layer with their rings closed."""
+    for feat in layer:
+        geom = feat.geometry()
+        if geom:
+            geom = geom.Clone()
+            geom.CloseRings()  # this copies the first point to the end
+            yield geom
+
+
+def dissolve_geometries(geoms, workers=1, batch_features=BATCH_FEATURES):
+    """Yields the union of each connected component of geoms.
+
+    The input is read once and indexed as it streams in, but every
+    geometry is held until it is exhausted: a later feature can join any
+    two components, so none is final before then. Memory is bounded by
+    the geometries of the layer; each one is dropped as soon as it has been
+    exported to WKB for its component.
+
+    Args:
+        geoms (iterable): OGR polygon or multipolygon geometries.
+        workers (int): Worker processes for the unions, None for one per
+            CPU. With 1 everything runs in this process.
+        batch_features (int): Features per worker task.
+
+    Yields:
+        (ogr.Geometry): Union of one component, a polygon or multipolygon.
+
+    """
+    seen = []
+
+    def envelopes():
+        for geom in geoms:
+            seen.append(geom)
+            yield geom.GetEnvelope()
+
+    components = connected_components(envelopes(),
+                                      lambda i, j: seen[i].Intersects(seen[j]))
+    logger.debug('%d features in %d components', len(seen), len(components))
+
+    # the geometries are only needed as WKB from here on
+    wkb_components = []
+    for component in components:
+        wkb_components.append([seen[i].ExportToWkb() for i in component])
+        for i in component:
+            seen[i] = None
+    seen = None
+
+    batches = _batches(wkb_components, batch_features)
+    workers = os.cpu_count() if workers is None else workers
+
+    if workers <= 1 or len(wkb_components) < 2:
+        for batch in batches:
+            for wkb in _union_batch(batch):
+                yield ogr.CreateGeometryFromWkb(wkb)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in executor.map(_union_batch, batches):
+            for wkb in batch:
+                yield ogr.CreateGeometryFromWkb(wkb)
@@ -0,0 +1,145 @@
+"""features.py -- Part of spatialops Module
+
+Streaming access to the features of vector files.
+
+``iter_features`` yields the features of any OGR readable file one at a
+time, with their attributes and the geometry as GeoJSON, WKT or WKB, so
+memory use doesn't depend on the size of the input. ``write_geojson_seq``
+writes such a stream as newline delimited GeoJSON (NDJSON) or an RFC 8142
+GeoJSON text sequence, one feature per line, ready to be piped into a
+queue consumer.
+
+Command line::
+
+    python -m spatial_ops.features parcels.shp > parcels.ndjson
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from ._gdal import ogr
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY_FORMATS = ['geojson', 'wkt', 'wkb']
+
+# RFC 8142 record separator
+RECORD_SEPARATOR = '\x1e'
+
+
+def _export_geometry(geom, geometry_format):
+    if geom is None:
+        return None
+    if geometry_format == 'geojson':
+        return json.loads(geom.ExportToJson())
+    if geometry_format == 'wkt':
+        return geom.ExportToWkt()
+    return bytes(geom.ExportToWkb())
+
+
+def iter_features(path, geometry_format='geojson', layer=None):
+    """Yields the features of a vector file one at a time.
+
+    Args:
+        path (str): Any OGR readable vector file (SHP, GeoJSON, GPKG, ...).
+        geometry_format (str): 'geojson' (a dict), 'wkt' or 'wkb'.
+        layer (str|int): Layer name or index, the first layer by default.
+
+    Raises:
+        ValueError: If path can't be opened or has no such layer.
+
+    Yields:
+        (dict): GeoJSON like feature dicts with 'id', 'properties' and
+            'geometry' in geometry_format.
+
+    """
+    if geometry_format not in GEOMETRY_FORMATS:
+        raise ValueError('Unknown geometry format {}, expected one of {}'.format(
+            geometry_format, ', '.join(GEOMETRY_FORMATS)))
+
+    try:
+        ds = ogr.Open(str(path))
+    except RuntimeError as e:
+        raise ValueError('Could not open {}: {}'.format(path, e)) from e
+    if ds is None:
+        raise ValueError('Could not open {}'.format(path))
+
+    try:
+        in_layer = ds.GetLayer() if layer is None else ds.GetLayer(layer)
+        if in_layer is None:
+            raise ValueError('No layer {} in {}'.format(layer, path))
+        for feature in in_layer:
+            yield {
+                'type': 'Feature',
+                'id': feature.GetFID(),
+                'properties': feature.items(),
+                'geometry': _export_geometry(feature.GetGeometryRef(), geometry_format),
+            }
+    finally:
+        ds = None
+
+
+def _json_default(value):
+    # WKB geometries are written as hex strings, the usual text form of WKB
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    raise TypeError('{} is not JSON serializable'.format(type(value).__name__))
+
+
+def write_geojson_seq(features, out, record_separator=False):
+    """Writes GeoJSON feature dicts one per line as they are produced.
+
+    WKB geometries, from iter_features(..., 'wkb'), are written as hex
+    strings.
+
+    Args:
+        features (iterable): Feature dicts, e.g. from iter_features.
+        out (str|file): Output path or text file object, e.g. sys.stdout.
+        record_separator (bool): Prefix every line with the RFC 8142
+            record separator (application/geo+json-seq) instead of
+            writing plain NDJSON.
+
+    Returns:
+        (int): Number of features written.
+
+    """
+    if isinstance(out, str) or hasattr(out, '__fspath__'):
+        with open(out, 'w') as f:
+            return write_geojson_seq(features, f, record_separator)
+
+    prefix = RECORD_SEPARATOR if record_separator else ''
+    count = 0
+    for feature in features:
+        out.write(prefix)
+        out.write(json.dumps(feature, separators=(',', ':'), default=_json_default))
+        out.write('\n')
+        count += 1
+
+    logger.debug('wrote %d features', count)
+    return count
+
+
+def cli_setup(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Stream the features of a vector file as NDJSON')
+
+    parser.add_argument('input', help='Vector file (SHP, GEOJSON, GPKG, KML)')
+    parser.add_argument('-l', '--layer', help='Layer name, the first layer by default')
+    parser.add_argument('-o', '--output', help='Output file, stdout by default')
+    parser.add_argument('--rs', action='store_true',
+                        help='Write an RFC 8142 GeoJSON text sequence')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = cli_setup(argv)
+    features = iter_features(args.input, layer=args.layer)
+    write_geojson_seq(features, args.output or sys.stdout, args.rs)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
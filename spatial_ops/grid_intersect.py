@@ -15,31 +15,46 @@ Purpose: Given a shapefile input, return a list of WRS2 or MGRS grid tiles
 
 Requirements: GDAL 2.*,"grid_files" data directory containing MGRS and WRS2
               grids.
+
+Command line: tag a stream of AOIs (file paths, WKT or GeoJSON, one per
+              line) with their tiles, one JSON line per AOI:
+
+              python -m spatial_ops.grid_intersect aois.txt --workers 4
+              (installed as spatial-ops-tiles)
 """
 
 import os
 from pathlib import Path
 import json
+import shutil
+import sys
+import tempfile
 import zipfile
+from contextlib import contextmanager, nullcontext
 import argparse
-import re
+import logging
 
-from osgeo import ogr, osr
+from ._gdal import ogr, osr
+from . import arrow_io
+from . import instrumentation
+from .profiling import profiled
+from .prune import prune_contained
+from .tile_ids import MGRS_100KM_RE, determine_tile_mgrs_or_wrs
 
-ogr.UseExceptions()
+logger = logging.getLogger(__name__)
 
 GRID_DIR = Path(os.path.dirname(os.path.abspath(__file__)), "grid_files")
 
 
 def cleanup():
     for file_name in Path(GRID_DIR).iterdir():
-        print(file_name)
         if file_name.is_file():
-            print("is a file")
+            logger.debug("removing %s", file_name)
             os.remove(file_name)
 
 
-def unzip_mgrs_100km_shp(full_zip_path):
+def unzip_mgrs_100km_shp(full_zip_path, dest_dir=None):
+    dest_dir = GRID_DIR if dest_dir is None else dest_dir
     file_name_stem = full_zip_path.name
     # 1. unzip the appropriate shapefile
     with zipfile.ZipFile(full_zip_path, "r") as zf:
@@ -53,7 +68,7 @@ def unzip_mgrs_100km_shp(full_zip_path):
                 actual_file_stem = zip_info.filename.split(".")[0]
 
             # Extract only the files to a specific dir
-            zf.extract(zip_info, GRID_DIR)
+            zf.extract(zip_info, dest_dir)
 
     if actual_file_stem != file_name_stem:
         file_name_stem = actual_file_stem
@@ -61,75 +76,119 @@ def unzip_mgrs_100km_shp(full_zip_path):
     return file_name_stem
 
 
-def get_geom_from_shapefile(shp_path):
-    """
-    Open shapefile, simplify, merge, create and return WKT version of geometry.
+@contextmanager
+def unzipped_mgrs_100km_shp(full_zip_path, stats=None):
+    """Unzips a GZD's 100km square shapefile into a private scratch dir.
+
+    Yields the path of the .shp, the scratch dir is removed on exit. Unlike
+    unzipping into GRID_DIR, concurrent queries (threads, the aio module)
+    can't remove each other's files. With stats, extracting and removing
+    the files is timed as the "unzip" stage.
     """
+    def unzip_stage():
+        return stats.stage("unzip") if stats is not None else nullcontext()
+
+    with unzip_stage():
+        scratch_dir = tempfile.mkdtemp(prefix="mgrs_100km_")
+        try:
+            file_name_stem = unzip_mgrs_100km_shp(Path(full_zip_path), scratch_dir)
+        except BaseException:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+            raise
+    try:
+        yield Path(scratch_dir, file_name_stem + ".shp")
+    finally:
+        with unzip_stage():
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def _layer_geometries(in_layer):
+    for feature in in_layer:
+        # the geometry belongs to the feature, which stays alive until the
+        # next one is read
+        yield feature.GetGeometryRef()
 
-    shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
-    input_ds = shapefile_driver.Open(shp_path, 0)
 
-    # Check if input_ds has multiple features, if so, union cascade it to flatten it (merge)
-    # Create the feature and set values
-    in_layer = input_ds.GetLayer()
+@profiled(aoi="shp_path")
+def get_geom_from_shapefile(shp_path, prune=True):
+    """
+    Open shapefile, simplify, merge, create and return WKT version of geometry.
+
+    With prune, polygons contained in (or duplicating) another polygon are
+    dropped before the union, which doesn't change the result.
 
-    multipoly = None
-    multipoint = None
-    multiline = None
+    shp_path may also be a (Geo)Parquet file or a pyarrow Table or
+    RecordBatchReader, its WKB geometry column is then read batch by batch
+    through arrow_io instead of the Shapefile driver.
+    """
 
-    for feature in in_layer:
-        geom = feature.GetGeometryRef()
-        geom.FlattenTo2D()
-        geom_name = geom.GetGeometryName()
-        print(geom_name)
-
-        if geom_name == "POLYGON":
-            if not multipoly:
-                multipoly = ogr.Geometry(ogr.wkbMultiPolygon)
-            
-            # print(feature.GetGeometryRef().Simplify(0.005).ConvexHull())
-            print(feature.GetGeometryRef().Simplify(0.005))
-            simplified_convex_hull = feature.GetGeometryRef().Simplify(0.005)
-
-            print(simplified_convex_hull)
-
-            if simplified_convex_hull.GetGeometryName() == "POLYGON":
-                print(simplified_convex_hull)
-                simplified_convex_hull.FlattenTo2D()
-                print(simplified_convex_hull)
-                multipoly.AddGeometry(simplified_convex_hull)
-
-        elif geom_name == "MULTIPOLYGON":
-            if not multipoly:
-                multipoly = ogr.Geometry(ogr.wkbMultiPolygon)
-            
-            for geom_part in geom:
-                if geom_part.GetGeometryName() == "POLYGON":
-                    multipoly.AddGeometry(geom_part)
-                else:
-                    print("unknown geom")
-                    print(geom_part.GetGeometryName())
-        elif geom_name == "POINT":
-            if not multipoint:
-                multipoint = ogr.Geometry(ogr.wkbMultiPoint)
-            
-            multipoint.AddGeometry(geom)
-        elif geom_name == "LINESTRING":
-            if not multiline:
-                multiline = ogr.Geometry(ogr.wkbMultiLineString)
-            
-            multiline.AddGeometry(geom)
-
-    if multipoly:
-        cascade_union = multipoly.UnionCascaded()
-        print(cascade_union)
-
-        return cascade_union
-    elif multipoint:
-        return multipoint
-    
-    elif multiline:
-        return multiline
+    with instrumentation.query("get_geom_from_shapefile") as stats:
+        with stats.stage("open"):
+            if arrow_io.is_arrow_source(shp_path):
+                geometries = arrow_io.iter_aoi_geometries(shp_path)
+            else:
+                shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
+                input_ds = shapefile_driver.Open(str(shp_path), 0)
+
+                # Check if input_ds has multiple features, if so, union cascade it to flatten it (merge)
+                # Create the feature and set values
+                in_layer = input_ds.GetLayer()
+                geometries = _layer_geometries(in_layer)
+
+        polygons = []
+        multipoint = None
+        multiline = None
+
+        for geom in geometries:
+            geom.FlattenTo2D()
+            geom_name = geom.GetGeometryName()
+
+            if geom_name == "POLYGON":
+                simplified_convex_hull = geom.Simplify(0.005)
+
+                if simplified_convex_hull.GetGeometryName() == "POLYGON":
+                    simplified_convex_hull.FlattenTo2D()
+                    polygons.append(simplified_convex_hull)
+
+            elif geom_name == "MULTIPOLYGON":
+                for geom_part in geom:
+                    if geom_part.GetGeometryName() == "POLYGON":
+                        # the part belongs to the feature, keep a copy
+                        polygons.append(geom_part.Clone())
+                    else:
+                        logger.debug("unknown geom %s", geom_part.GetGeometryName())
+            elif geom_name == "POINT":
+                if not multipoint:
+                    multipoint = ogr.Geometry(ogr.wkbMultiPoint)
+
+                multipoint.AddGeometry(geom)
+            elif geom_name == "LINESTRING":
+                if not multiline:
+                    multiline = ogr.Geometry(ogr.wkbMultiLineString)
+
+                multiline.AddGeometry(geom)
+
+        if polygons:
+            if prune:
+                with stats.stage("prune"):
+                    pruned = prune_contained(polygons)
+                polygons = pruned.geometries
+                stats.count("pruned", pruned.contained + pruned.duplicates)
+
+            multipoly = ogr.Geometry(ogr.wkbMultiPolygon)
+            for polygon in polygons:
+                multipoly.AddGeometry(polygon)
+            polygons = pruned = None
+
+            with stats.stage("union"):
+                cascade_union = multipoly.UnionCascaded()
+
+            return cascade_union
+        elif multipoint:
+            return multipoint
+
+        elif multiline:
+            return multiline
 
 
 def get_wkt_from_shapefile(shp_path):
@@ -181,6 +240,7 @@ def get_wkt_for_wrs_tile(wrs_tile_pathrow):
         return None
 
 
+@profiled(aoi="mgrs_100km_id")
 def convert_mgrs_to_wrs(mgrs_100km_id):
     """
     Given a MGRS 100km tile id, return the overlapping WRS pathrow list.
@@ -196,6 +256,7 @@ def convert_mgrs_to_wrs(mgrs_100km_id):
     return wrs_list
 
 
+@profiled(aoi="wrs_pathrow")
 def convert_wrs_to_mgrs(wrs_pathrow):
     """
     Given a pathrow tile id, return the overlapping MGRS 100km tile id list.
@@ -210,30 +271,50 @@ def convert_wrs_to_mgrs(wrs_pathrow):
     return mgrs_list
 
 
-def convert_wrs_to_mgrs_list(wrs_list):
+@profiled(aoi="wrs_list")
+def convert_wrs_to_mgrs_list(wrs_list, as_arrow=False):
+    """
+    Given a list of WRS pathrows, return the set of overlapping MGRS 100km ids,
+    or an Arrow table of them with their footprints if as_arrow is set.
+    """
+
+    with instrumentation.query("convert_wrs_to_mgrs_list"):
+        footprint_list = []
+        tile_list = []
 
-    footprint_list = []
-    tile_list = []
+        for wrs in wrs_list:
+            footprint_list.append(get_wkt_for_wrs_tile(wrs))
 
-    for wrs in wrs_list:
-        footprint_list.append(get_wkt_for_wrs_tile(wrs))
+        for footprint in footprint_list:
+            tile_list += find_mgrs_intersection(footprint)
 
-    for footprint in footprint_list:
-        tile_list += find_mgrs_intersection(footprint)
+    if as_arrow:
+        from .arrow_io import tile_table
+        return tile_table(sorted(set(tile_list)))
 
     return set(tile_list)
 
 
-def convert_mgrs_to_wrs_list(mgrs_list):
+@profiled(aoi="mgrs_list")
+def convert_mgrs_to_wrs_list(mgrs_list, as_arrow=False):
+    """
+    Given a list of MGRS 100km ids, return the set of overlapping WRS pathrows,
+    or an Arrow table of them with their footprints if as_arrow is set.
+    """
 
-    footprint_list = []
-    tile_list = []
+    with instrumentation.query("convert_mgrs_to_wrs_list"):
+        footprint_list = []
+        tile_list = []
 
-    for mgrs in mgrs_list:
-        footprint_list.append(get_wkt_for_mgrs_tile(mgrs))
+        for mgrs in mgrs_list:
+            footprint_list.append(get_wkt_for_mgrs_tile(mgrs))
 
-    for footprint in footprint_list:
-        tile_list += find_wrs_intersection(footprint)
+        for footprint in footprint_list:
+            tile_list += find_wrs_intersection(footprint)
+
+    if as_arrow:
+        from .arrow_io import tile_table
+        return tile_table(sorted(set(tile_list)))
 
     return set(tile_list)
 
@@ -254,15 +335,14 @@ def get_wkt_for_mgrs_tile(mgrs_100km_id):
     """
 
     # Use a regex to verify a valid MGRS_100km id
-    m = re.search(r"[01234656]\d{1}[C-HJ-NP-X][A-HJ-NP-Z][A-HJ-NP-V]", mgrs_100km_id)
+    m = MGRS_100KM_RE.search(mgrs_100km_id)
 
     if m.group(0):
-        print("Valid mgrs 100km id")
         gzd_id = mgrs_100km_id[:3]
         mgrs_id = mgrs_100km_id[3:]
-        print(gzd_id)
+        logger.debug("valid mgrs 100km id, gzd %s", gzd_id)
     else:
-        print("Invalid mgrs 100km id")
+        logger.debug("invalid mgrs 100km id %s", mgrs_100km_id)
         return None
 
     # unzip the specific GZD shapefile
@@ -270,46 +350,35 @@ def get_wkt_for_mgrs_tile(mgrs_100km_id):
     mgrs_grid_dir = Path(GRID_DIR, "MGRS_S2")
     mgrs_zip_file = Path(mgrs_grid_dir, gzd_shapefile_name + ".zip")
 
-    mgrs_name = unzip_mgrs_100km_shp(mgrs_zip_file)
-    mgrs_shp_file = Path(GRID_DIR, mgrs_name + ".shp")
+    with unzipped_mgrs_100km_shp(mgrs_zip_file) as mgrs_shp_file:
+        shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
 
-    shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
+        grid_ds = shapefile_driver.Open(str(mgrs_shp_file), 0)
+        grid_layer = grid_ds.GetLayer()
 
-    grid_ds = shapefile_driver.Open(str(mgrs_shp_file), 0)
-    grid_layer = grid_ds.GetLayer()
-
-    feature = None
-
-    # transform coords from local UTM proj to lat long
-    # sourceSR = grid_layer.GetSpatialRef()
-    # targetSR = osr.SpatialReference()
-    # targetSR.ImportFromEPSG(4326)  # WGS84
-    # coordTrans = osr.CoordinateTransformation(sourceSR, targetSR)
+        feature = None
 
-    for f in grid_layer:
-        print(f)
-        print(mgrs_100km_id)
-        if mgrs_id == f.GetField("name"):
-            feature = f
+        for f in grid_layer:
+            if mgrs_id == f.GetField("name"):
+                feature = f
 
-    geom = feature.GetGeometryRef()
-    # geom.Transform(coordTrans)
+        geom = feature.GetGeometryRef()
 
-    if geom:
-        wkt_result = geom.ExportToWkt()
+        wkt_result = geom.ExportToWkt() if geom else None
+        feature = geom = grid_layer = grid_ds = None
 
-        grid_ds = None
-        cleanup()
-        return wkt_result
-    else:
-        grid_ds = None
-        cleanup()
-        return None
+    return wkt_result
 
 
-def find_wrs_intersection(wkt_footprint):
+@profiled(aoi="wkt_footprint")
+def find_wrs_intersection(wkt_footprint, as_arrow=False, overlaps=None):
     """
     Return (or write to file) the list of WRS path rows that intersect the given wkt footprint
+
+    With as_arrow, an Arrow table of the path rows with their footprints and
+    overlap_area/overlap_fraction is returned instead, see arrow_io.
+    If overlaps is a dict, it is filled with path row -> (intersection
+    area, tile area) for every hit.
     """
 
     # 1. Load shapefile
@@ -317,30 +386,43 @@ def find_wrs_intersection(wkt_footprint):
     # 3. Iterate over each wrs, test intersection with shapefile, if intersects add the field name to a list
     # 4. Write out list to a file
 
-    polygon_geom = ogr.CreateGeometryFromWkt(wkt_footprint)
+    if overlaps is None and as_arrow:
+        overlaps = {}
 
-    shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
+    with instrumentation.query("find_wrs_intersection") as stats:
+        polygon_geom = ogr.CreateGeometryFromWkt(wkt_footprint)
 
-    wrs2_grid_dir = Path(GRID_DIR, "WRS2_descending")
-    wrs2_master_shp_file = Path(wrs2_grid_dir, "WRS2_descending.shp")
+        with stats.stage("open"):
+            shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
 
-    grid_ds = shapefile_driver.Open(str(wrs2_master_shp_file), 0)
-    grid_layer = grid_ds.GetLayer()
+            wrs2_grid_dir = Path(GRID_DIR, "WRS2_descending")
+            wrs2_master_shp_file = Path(wrs2_grid_dir, "WRS2_descending.shp")
 
-    intersect_list = []
+            grid_ds = shapefile_driver.Open(str(wrs2_master_shp_file), 0)
+            grid_layer = grid_ds.GetLayer()
 
-    # multipoly_intersect = ogr.Geometry(ogr.wkbMultiPolygon)
+        intersect_list = []
+        candidates = 0
 
-    for f in grid_layer:
-        geom = f.GetGeometryRef()
+        with stats.stage("test"):
+            for f in grid_layer:
+                geom = f.GetGeometryRef()
+                candidates += 1
+
+                intersect_result = geom.Intersection(polygon_geom)
 
-        intersect_result = geom.Intersection(polygon_geom)
+                if not intersect_result.IsEmpty():
+                    intersect_list.append(f.GetField("PR"))
+                    if overlaps is not None:
+                        overlaps[intersect_list[-1]] = (intersect_result.GetArea(),
+                                                        geom.GetArea())
 
-        if not intersect_result.IsEmpty():
-            print("FOUND INTERSECT")
-            print(f.GetField("PR"))
-            print(geom.GetGeometryName())
-            intersect_list.append(f.GetField("PR"))
+        stats.count("candidates", candidates)
+        stats.count("hits", len(intersect_list))
+
+    if as_arrow:
+        from .arrow_io import overlap_table
+        return overlap_table(intersect_list, wkt_footprint, overlaps=overlaps)
 
     return intersect_list
 
@@ -444,41 +526,61 @@ def create_shapefile_from_tile_list(tile_id_list, dst_name=None):
     featureDefn = out_layer.GetLayerDefn()
 
     for idx, feat in enumerate(shapefile_content_list):
-        print("Tryng to create a feature.")
         feature = ogr.Feature(featureDefn)
 
         feature.SetField("id", idx + 1)
         feature.SetField("tile_id", feat[0])
         feature.SetField("tile_type", feat[1])
 
-        print("trying to set geometry")
         feature.SetGeometry(ogr.CreateGeometryFromWkt(feat[2]))
 
         out_layer.CreateFeature(feature)
-        print("created feature")
         feature = None
 
     out_datasource = None
 
 
-def find_mgrs_intersection(wkt_footprint):
+def create_parquet_from_tile_list(tile_id_list, dst_name=None):
+    """
+    GeoParquet counterpart of create_shapefile_from_tile_list, writes the
+    tiles with their tile type and WKB footprint. Needs pyarrow.
+    """
+    from .arrow_io import tile_table, write_geoparquet
+
+    output_dst = dst_name or "tile_coverage.parquet"
+    return write_geoparquet(tile_table(tile_id_list), output_dst)
+
+
+@profiled(aoi="wkt_footprint")
+def find_mgrs_intersection(wkt_footprint, as_arrow=False):
     """
     Given a WKT polygon, return the list of MGRS 100km grids that intersect it
 
     Utilize the helper function find_mgrs_intersection_single for each GZD
+
+    With as_arrow, an Arrow table of the tiles with their footprints and
+    overlap_area/overlap_fraction is returned instead, see arrow_io.
     """
 
-    total_mgrs_100km_list = []
-    gzd_list = find_mgrs_gzd_intersections(wkt_footprint)
+    overlaps = {} if as_arrow else None
+
+    with instrumentation.query("find_mgrs_intersection"):
+        total_mgrs_100km_list = []
+        gzd_list = find_mgrs_gzd_intersections(wkt_footprint)
 
-    for gzd in gzd_list:
-        sub_list = find_mgrs_intersection_100km(wkt_footprint, gzd)
-        for mgrs_id in sub_list:
-            total_mgrs_100km_list.append(mgrs_id)
+        for gzd in gzd_list:
+            sub_list = find_mgrs_intersection_100km(wkt_footprint, gzd, overlaps)
+            for mgrs_id in sub_list:
+                total_mgrs_100km_list.append(mgrs_id)
+
+    if as_arrow:
+        from .arrow_io import overlap_table
+        return overlap_table(total_mgrs_100km_list, wkt_footprint, overlaps=overlaps)
 
     return total_mgrs_100km_list
 
 
+@profiled(aoi="wkt_footprint")
 def find_mgrs_gzd_intersections(wkt_footprint):
     """ Given a WKT polygon, return the list of MGRS tiles that intersect it
 
@@ -499,70 +601,48 @@ def find_mgrs_gzd_intersections(wkt_footprint):
     future.
     """
 
-    polygon_geom = ogr.CreateGeometryFromWkt(wkt_footprint)
+    with instrumentation.query("find_mgrs_gzd_intersections") as stats:
+        polygon_geom = ogr.CreateGeometryFromWkt(wkt_footprint)
 
-    mgrs_grid_file_dir = Path(GRID_DIR, "MGRS_S2")
+        with stats.stage("open"):
+            mgrs_grid_file_dir = Path(GRID_DIR, "MGRS_S2")
 
-    mgrs_master_shp_file = Path(mgrs_grid_file_dir, "mgrs_s2_master.shp")
+            mgrs_master_shp_file = Path(mgrs_grid_file_dir, "mgrs_s2_master.shp")
 
-    shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
+            shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
 
-    grid_ds = shapefile_driver.Open(str(mgrs_master_shp_file), 0)
+            grid_ds = shapefile_driver.Open(str(mgrs_master_shp_file), 0)
 
-    layer = grid_ds.GetLayer()
+            layer = grid_ds.GetLayer()
 
-    # sourceSR = layer.GetSpatialRef()
-    # targetSR = osr.SpatialReference()
-    # targetSR.ImportFromEPSG(4326) # WGS84
-    # coordTrans = osr.CoordinateTransformation(sourceSR, targetSR)
+        intersect_list = []
+        candidates = 0
 
-    feature_count = layer.GetFeatureCount()
-    layerDefinition = layer.GetLayerDefn()
-    print('HELLO')
-    for i in range(layerDefinition.GetFieldCount()):
-        print(layerDefinition.GetFieldDefn(i).GetName())
+        with stats.stage("test"):
+            for f in layer:
+                geom = f.GetGeometryRef()
+                candidates += 1
 
-    intersect_list = []
+                intersect_result = geom.Intersection(polygon_geom)
 
-    for f in layer:
-        geom = f.GetGeometryRef()
+                if not intersect_result.IsEmpty():
+                    intersect_list.append(f.GetField("utm_zone"))
 
-        intersect_result = geom.Intersection(polygon_geom)
-
-        if not intersect_result.IsEmpty():
-            print("FOUND INTERSECT")
-            
-            print(f.GetField("utm_zone"))
-            intersect_list.append(f.GetField("utm_zone"))
+        stats.count("candidates", candidates)
+        stats.count("hits", len(intersect_list))
 
     return intersect_list
 
 
-def determine_tile_mgrs_or_wrs(tile_id):
-    """
-    Returns 'mgrs' if mgrs tile, 'wrs' if wrs tile id, or 'unknown' if neither
-    """
-    mgrs_search = re.search(
-        r"[01234656]\d{1}[C-HJ-NP-X][A-HJ-NP-Z][A-HJ-NP-V]", tile_id
-    )
-    wrs_search = re.search(r"\d{6}", tile_id)
-
-    tile_type = None
-    if mgrs_search:
-        tile_type = "mgrs"
-    elif wrs_search:
-        tile_type = "wrs"
-    else:
-        tile_type = "unknown"
-
-    return tile_type
-
-
-def find_mgrs_intersection_100km(footprint, gzd):
+@profiled(aoi="footprint")
+def find_mgrs_intersection_100km(footprint, gzd, overlaps=None):
     """
     Given a WKT polygon and a GZD (grid zone designator)
     return the list of 100km MGRS gzd that intersect the WKT polygon
 
+    If overlaps is a dict, it is filled with tile id -> (intersection area,
+    tile area) for every hit, both in WGS84.
+
     Overview:
     1. Based on the GZD, unzip the matching .shp and load
     2. Run interesction check on each feature of the .shp
@@ -570,45 +650,211 @@ def find_mgrs_intersection_100km(footprint, gzd):
     4. Clean up unziped files, return list of intersecting 100kmSQ_ID's
     """
 
-    polygon_geom = ogr.CreateGeometryFromWkt(footprint)
+    with instrumentation.query("find_mgrs_intersection_100km") as stats:
+        polygon_geom = ogr.CreateGeometryFromWkt(footprint)
 
-    zip_name = f"{gzd}.zip"
-    file_name_stem = f"{gzd}"
-    full_zip_path = Path(GRID_DIR, "MGRS_S2", zip_name)
+        zip_name = f"{gzd}.zip"
+        full_zip_path = Path(GRID_DIR, "MGRS_S2", zip_name)
 
-    # 1. unzip
-    file_name_stem = unzip_mgrs_100km_shp(full_zip_path)
+        # 1. unzip, 4. the unzipped files are removed on exit
+        with unzipped_mgrs_100km_shp(full_zip_path, stats) as file_path:
+            # 2. Load the shp file and run intersection check on each feature
+            with stats.stage("open"):
+                shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
+                grid_ds = shapefile_driver.Open(str(file_path), 0)
+                layer = grid_ds.GetLayer()
 
-    file_path = Path(GRID_DIR, file_name_stem + ".shp")
+                # transform coords from local UTM proj to lat long
+                sourceSR = layer.GetSpatialRef()
+                targetSR = osr.SpatialReference()
+                targetSR.ImportFromEPSG(4326)  # WGS84
+                coordTrans = osr.CoordinateTransformation(sourceSR, targetSR)
 
-    # 2. Load the shp file and run intersection check on each feature
-    shapefile_driver = ogr.GetDriverByName("ESRI Shapefile")
-    grid_ds = shapefile_driver.Open(str(file_path), 0)
-    layer = grid_ds.GetLayer()
+            intersect_list = []
+            candidates = 0
+            reproject_time = 0.0
+            test_time = 0.0
+            clock = stats.clock
 
-    # transform coords from local UTM proj to lat long
-    sourceSR = layer.GetSpatialRef()
-    targetSR = osr.SpatialReference()
-    targetSR.ImportFromEPSG(4326)  # WGS84
-    coordTrans = osr.CoordinateTransformation(sourceSR, targetSR)
+            for f in layer:
+                geom = f.GetGeometryRef()
+                candidates += 1
 
-    intersect_list = []
+                start = clock()
+                geom.Transform(coordTrans)
+                transformed = clock()
 
-    for f in layer:
-        geom = f.GetGeometryRef()
-        geom.Transform(coordTrans)
+                intersect_result = geom.Intersection(polygon_geom)
 
-        intersect_result = geom.Intersection(polygon_geom)
+                if not intersect_result.IsEmpty():
+                    intersect_list.append(f'{gzd}{f.GetField("name")}')
+                    if overlaps is not None:
+                        overlaps[intersect_list[-1]] = (intersect_result.GetArea(),
+                                                        geom.GetArea())
 
-        if not intersect_result.IsEmpty():
-            print("FOUND INTERSECT")
-            print(f.GetField("name"))
-            intersect_list.append(f'{gzd}{f.GetField("name")}')
+                test_time += clock() - transformed
+                reproject_time += transformed - start
 
-    # all done!
-    grid_ds = None
+            stats.add_time("reproject", reproject_time)
+            stats.add_time("test", test_time)
+            stats.count("candidates", candidates)
+            stats.count("hits", len(intersect_list))
 
-    # clean up
-    cleanup()
+            # all done!
+            layer = grid_ds = None
 
     return intersect_list
+
+
+def _aoi_file_geometry(path, geom):
+    if geom is None or geom.IsEmpty():
+        raise ValueError("no usable AOI geometry in {}".format(path))
+    return geom
+
+
+def _aoi_geometry(line):
+    """Parses one AOI line: a vector or (Geo)Parquet file path, WKT, or a
+    GeoJSON geometry or Feature. Returns (geometry, record fields)."""
+    from .utils import as_geometry
+
+    fields = {}
+    if line.startswith("{"):
+        obj = json.loads(line)
+        if obj.get("type") == "Feature":
+            if "id" in obj:
+                fields["id"] = obj["id"]
+            line = json.dumps(obj["geometry"])
+
+    elif arrow_io.is_arrow_source(line) or Path(line).suffix.lower() == ".shp":
+        return _aoi_file_geometry(line, get_geom_from_shapefile(line)), {"aoi": line}
+
+    elif Path(line).suffix.lower() in (".geojson", ".json", ".gpkg", ".kml"):
+        # read_aoi only keeps polygons, a point or line file comes back empty
+        from .query_split import read_aoi
+        return _aoi_file_geometry(line, read_aoi(line)), {"aoi": line}
+
+    geom = as_geometry(line)
+    if geom is None:
+        raise ValueError("not a file path, WKT or GeoJSON geometry")
+    return geom, fields
+
+
+def _tag_aoi_line(line_no, line, grid_store, mgrs, wrs):
+    record = {"line": line_no}
+    try:
+        geom, fields = _aoi_geometry(line)
+        record.update(fields)
+        tiles = grid_store.join([geom], mgrs=mgrs, wrs=wrs)[0]
+        if mgrs:
+            record["mgrs"] = tiles["mgrs"]
+        if wrs:
+            record["wrs"] = tiles["wrs"]
+    except Exception as e:
+        logger.debug("AOI on line %d failed", line_no, exc_info=True)
+        record["error"] = str(e) or type(e).__name__
+    return record
+
+
+def tag_aoi_lines(lines, grid_store=None, workers=1, mgrs=True, wrs=True):
+    """Tags a stream of AOIs with the tiles they intersect.
+
+    Every non empty line is an AOI: a vector or (Geo)Parquet file path, a
+    WGS84 WKT geometry, or a GeoJSON geometry or Feature. The grids are
+    loaded once, into grid_store.
+
+    Args:
+        lines (iterable): AOI lines, e.g. an open file. Read lazily.
+        grid_store (GridStore): Grids to query, the shared default store if
+            None.
+        workers (int): AOIs processed in parallel threads.
+        mgrs (bool): Look up MGRS 100km tiles.
+        wrs (bool): Look up WRS2 pathrows.
+
+    Yields:
+        (dict): One record per AOI as soon as it is done, so in completion
+            order when workers > 1: the 1-based "line" number, "aoi" (file
+            paths) or "id" (GeoJSON Features), and "mgrs"/"wrs" lists, or
+            "error".
+
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    if grid_store is None:
+        from .grid_store import default_store
+        grid_store = default_store()
+
+    aois = ((line_no, line.strip()) for line_no, line in enumerate(lines, 1))
+    aois = ((line_no, line) for line_no, line in aois if line)
+
+    if workers <= 1:
+        for line_no, line in aois:
+            yield _tag_aoi_line(line_no, line, grid_store, mgrs, wrs)
+        return
+
+    # only a few AOIs per worker are read ahead, memory use doesn't grow
+    # with the length of the stream
+    window = workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for line_no, line in aois:
+            pending.add(executor.submit(_tag_aoi_line, line_no, line, grid_store, mgrs, wrs))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def cli_setup(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Tag AOIs with the MGRS 100km tiles and WRS2 pathrows they "
+                    "intersect, one JSON line per AOI")
+
+    parser.add_argument("input", nargs="?", default="-",
+                        help="File with one AOI per line (vector file path, WKT or "
+                             "GeoJSON), stdin by default")
+    parser.add_argument("-o", "--output", help="Output file, stdout by default")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="AOIs processed in parallel (default %(default)s)")
+    parser.add_argument("--grid", choices=["mgrs", "wrs", "both"], default="both",
+                        help="Grids to query (default %(default)s)")
+    parser.add_argument("--grid-dir", help="grid_files directory")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = cli_setup(argv)
+
+    grid_store = None
+    if args.grid_dir:
+        from .grid_store import GridStore
+        grid_store = GridStore(args.grid_dir)
+
+    in_file = sys.stdin if args.input == "-" else open(args.input)
+    out_file = sys.stdout if args.output is None else open(args.output, "w")
+
+    errors = 0
+    try:
+        records = tag_aoi_lines(in_file, grid_store, args.workers,
+                                mgrs=args.grid != "wrs", wrs=args.grid != "mgrs")
+        for record in records:
+            errors += "error" in record
+            out_file.write(json.dumps(record, separators=(",", ":")))
+            out_file.write("\n")
+            out_file.flush()
+    finally:
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""grid_store.py -- Part of spatialops Module
+
+In-memory, indexed copies of the WRS2 and MGRS grids.
+
+The grid_intersect functions open (and for MGRS, unzip) the grid files and
+scan every feature on each call, which is fine for a single AOI but slow
+when many footprints have to be tagged. A GridStore loads each grid layer
+once, reprojects the UTM 100km squares to WGS84, and keeps every layer in
+an EnvelopeIndex, so a footprint is only tested against the tiles whose
+envelopes it overlaps. The 100km squares are loaded per GZD on first use.
+
+Example::
+
+    store = GridStore()
+    for tiles in store.join(footprint_geoms):
+        print(tiles['mgrs'], tiles['wrs'])
+"""
+
+import logging
+import threading
+from pathlib import Path
+
+from ._gdal import ogr, osr
+from . import grid_intersect
+from .spatial_index import EnvelopeIndex
+from .tile_ids import parse_mgrs_tile, determine_tile_mgrs_or_wrs
+
+logger = logging.getLogger(__name__)
+
+
+def _wgs84():
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    if hasattr(srs, "SetAxisMappingStrategy"):
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return srs
+
+
+class GridLayer:
+    """Tile id -> geometry mapping of one grid layer with an envelope index.
+
+    The WKB of each tile is kept alongside, so footprints can be handed
+    out as bytes without exporting them again.
+    """
+
+    def __init__(self, cell_size=1.0):
+        self.index = EnvelopeIndex(cell_size)
+        self.tiles = []
+        self._by_id = {}
+        self._wkb_by_id = {}
+
+    def add(self, tile_id, geom):
+        self.index.insert(len(self.tiles), geom.GetEnvelope())
+        if tile_id not in self._by_id:
+            self._by_id[tile_id] = geom
+            self._wkb_by_id[tile_id] = bytes(geom.ExportToWkb())
+        self.tiles.append((tile_id, geom))
+
+    def intersecting(self, geom):
+        """Returns the ids of the tiles intersecting geom."""
+        result = []
+        for key in self.index.query(geom.GetEnvelope()):
+            tile_id, tile_geom = self.tiles[key]
+            if tile_geom.Intersects(geom):
+                result.append(tile_id)
+        return result
+
+    def footprint(self, tile_id):
+        return self._by_id.get(tile_id)
+
+    def footprint_wkb(self, tile_id):
+        return self._wkb_by_id.get(tile_id)
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """Returns a GridStore shared by the module level helpers.
+
+    It is rebuilt if grid_intersect.GRID_DIR has been pointed elsewhere.
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None or _default_store.grid_dir != Path(grid_intersect.GRID_DIR):
+            _default_store = GridStore()
+        return _default_store
+
+
+class GridStore:
+    """Lazily loaded, indexed WRS2 and MGRS grids.
+
+    Args:
+        grid_dir (str): grid_files directory, defaults to
+            grid_intersect.GRID_DIR at the time of construction.
+        cell_size (float): EnvelopeIndex cell size in degrees.
+
+    """
+
+    def __init__(self, grid_dir=None, cell_size=1.0):
+        self.grid_dir = Path(grid_intersect.GRID_DIR if grid_dir is None else grid_dir)
+        self.cell_size = cell_size
+
+        self._lock = threading.RLock()
+        self._wrs = None
+        self._gzd = None
+        self._squares = {}
+
+    def _read_layer(self, path, field, to_wgs84=False, prefix=""):
+        layer_index = GridLayer(self.cell_size)
+
+        grid_ds = ogr.GetDriverByName("ESRI Shapefile").Open(str(path), 0)
+        layer = grid_ds.GetLayer()
+
+        transform = None
+        if to_wgs84:
+            transform = osr.CoordinateTransformation(layer.GetSpatialRef(), _wgs84())
+
+        for f in layer:
+            geom = f.GetGeometryRef().Clone()
+            geom.FlattenTo2D()
+            if transform is not None:
+                geom.Transform(transform)
+            layer_index.add(f"{prefix}{f.GetField(field)}", geom)
+
+        grid_ds = None
+        return layer_index
+
+    def wrs_layer(self):
+        with self._lock:
+            if self._wrs is None:
+                path = Path(self.grid_dir, "WRS2_descending", "WRS2_descending.shp")
+                logger.debug("loading %s", path)
+                self._wrs = self._read_layer(path, "PR")
+            return self._wrs
+
+    def gzd_layer(self):
+        with self._lock:
+            if self._gzd is None:
+                path = Path(self.grid_dir, "MGRS_S2", "mgrs_s2_master.shp")
+                logger.debug("loading %s", path)
+                self._gzd = self._read_layer(path, "utm_zone")
+            return self._gzd
+
+    def square_layer(self, gzd):
+        """Returns the 100km squares of a GZD, reprojected to WGS84."""
+        with self._lock:
+            if gzd not in self._squares:
+                zip_path = Path(self.grid_dir, "MGRS_S2", f"{gzd}.zip")
+                with grid_intersect.unzipped_mgrs_100km_shp(zip_path) as shp_path:
+                    logger.debug("loading %s", zip_path)
+                    self._squares[gzd] = self._read_layer(shp_path, "name", to_wgs84=True,
+                                                          prefix=gzd)
+            return self._squares[gzd]
+
+    def wrs_tiles(self, geom):
+        """Returns the WRS2 pathrows intersecting a WGS84 geometry."""
+        return self.wrs_layer().intersecting(geom)
+
+    def mgrs_tiles(self, geom):
+        """Returns the MGRS 100km ids intersecting a WGS84 geometry."""
+        tiles = []
+        for gzd in self.gzd_layer().intersecting(geom):
+            tiles += self.square_layer(gzd).intersecting(geom)
+        return tiles
+
+    def _tile_layer(self, tile_id):
+        tile_type = determine_tile_mgrs_or_wrs(tile_id)
+        if tile_type == "mgrs":
+            gzd, _ = parse_mgrs_tile(tile_id)
+            return self.square_layer(gzd)
+        if tile_type == "wrs":
+            return self.wrs_layer()
+        return None
+
+    def footprint(self, tile_id):
+        """Returns the WGS84 geometry of a MGRS or WRS2 tile id, or None."""
+        layer = self._tile_layer(tile_id)
+        return None if layer is None else layer.footprint(tile_id)
+
+    def footprint_wkb(self, tile_id):
+        """Returns the WGS84 footprint of a tile id as WKB bytes, or None."""
+        layer = self._tile_layer(tile_id)
+        return None if layer is None else layer.footprint_wkb(tile_id)
+
+    def join(self, geometries, mgrs=True, wrs=True):
+        """Tags WGS84 geometries with the tiles they intersect.
+
+        The GZDs needed by the whole batch are resolved first, so every
+        grid file is read at most once per store.
+
+        Args:
+            geometries (list): OGR geometries, None entries are skipped.
+            mgrs (bool): Look up MGRS 100km tiles.
+            wrs (bool): Look up WRS2 pathrows.
+
+        Returns:
+            (list): One {'mgrs': [...], 'wrs': [...]} dict per geometry.
+
+        """
+        gzds_per_geom = []
+        if mgrs:
+            gzd_layer = self.gzd_layer()
+            gzds_per_geom = [gzd_layer.intersecting(g) if g is not None else []
+                             for g in geometries]
+            for gzd in sorted({gzd for gzds in gzds_per_geom for gzd in gzds}):
+                self.square_layer(gzd)
+
+        results = []
+        for idx, geom in enumerate(geometries):
+            tiles = {"mgrs": [], "wrs": []}
+            if geom is not None:
+                if mgrs:
+                    for gzd in gzds_per_geom[idx]:
+                        tiles["mgrs"] += self.square_layer(gzd).intersecting(geom)
+                if wrs:
+                    tiles["wrs"] = self.wrs_tiles(geom)
+            results.append(tiles)
+
+        return results
@@ -0,0 +1,230 @@
+"""instrumentation.py -- Part of spatialops Module
+
+Per-stage timing and counters for grid_intersect queries.
+
+Instrumentation is off by default and the hot paths only pay for a couple
+of attribute lookups when it is. It is switched on in two ways:
+
+    * the ``instrument()`` context manager, optionally with a callback that
+      receives a :class:`QueryStats` for every finished query::
+
+          with instrumentation.instrument() as recorded:
+              grid_intersect.find_mgrs_intersection(wkt)
+          print(recorded[0].as_dict())
+
+    * enabling DEBUG on the ``spatial_ops.instrumentation`` logger, which
+      logs one summary line per finished query.
+
+Queries that call other instrumented queries (``find_mgrs_intersection``
+calls ``find_mgrs_gzd_intersections`` and ``find_mgrs_intersection_100km``)
+fold their timings and counters into the outermost query, so one record is
+produced per top level call.
+
+Stage names used by grid_intersect:
+
+    open        opening datasets and layers
+    unzip       extracting and cleaning up the zipped MGRS shapefiles
+    reproject   transforming grid geometries to WGS84
+    test        running the candidate intersection tests
+    prune       dropping contained and duplicate AOI polygons
+    union       merging the AOI polygons
+
+Counters: ``candidates`` (grid features tested), ``hits`` (features that
+intersected) and ``pruned`` (AOI polygons dropped before the union).
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_collectors = []
+_local = threading.local()
+
+
+def _no_clock():
+    return 0.0
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _NullStats:
+    """Stand-in used when instrumentation is off, every method is a no-op."""
+
+    enabled = False
+    clock = staticmethod(_no_clock)
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def add_time(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STATS = _NullStats()
+
+
+class _Stage:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.timings[self.name] += time.perf_counter() - self.start
+        return False
+
+
+class QueryStats:
+    """Timings and counters recorded for one query.
+
+    Attributes:
+        query (str): Name of the instrumented function.
+        timings (dict): Seconds spent per stage name.
+        counters (dict): Integer counters, e.g. candidates and hits.
+        total (float): Wall clock seconds for the whole query.
+
+    """
+
+    enabled = True
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, query, parent=None):
+        self.query = query
+        self.parent = parent
+        self.timings = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.total = 0.0
+        self._start = None
+
+    def stage(self, name):
+        """Context manager that adds its elapsed time to stage name."""
+        return _Stage(self, name)
+
+    def add_time(self, name, seconds):
+        self.timings[name] += seconds
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def merge(self, other):
+        for name, seconds in other.timings.items():
+            self.timings[name] += seconds
+        for name, value in other.counters.items():
+            self.counters[name] += value
+
+    def as_dict(self):
+        return {
+            "query": self.query,
+            "total": self.total,
+            "timings": dict(self.timings),
+            "counters": dict(self.counters),
+        }
+
+    def __enter__(self):
+        stack = _stack()
+        stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total = time.perf_counter() - self._start
+        _stack().pop()
+
+        if self.parent is not None:
+            self.parent.merge(self)
+        else:
+            _emit(self)
+        return False
+
+    def __repr__(self):
+        timings = ", ".join(f"{k}={v:.4f}s" for k, v in sorted(self.timings.items()))
+        counters = ", ".join(f"{k}={v}" for k, v in sorted(self.counters.items()))
+        return f"<QueryStats {self.query} total={self.total:.4f}s {timings} {counters}>"
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _emit(stats):
+    for callback in list(_collectors):
+        callback(stats)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%r", stats)
+
+
+def is_enabled():
+    """Return True if queries are currently being instrumented."""
+    return bool(_collectors) or logger.isEnabledFor(logging.DEBUG)
+
+
+def query(name):
+    """Start recording a query called name.
+
+    Returns a context manager yielding the :class:`QueryStats` to record
+    into, or a shared no-op object when instrumentation is off.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack:
+        return QueryStats(name, parent=stack[-1])
+    if not is_enabled():
+        return _NULL_STATS
+    return QueryStats(name)
+
+
+@contextmanager
+def instrument(callback=None):
+    """Record every top level query finished while the block is active.
+
+    Args:
+        callback (callable): Optional function called with each finished
+            :class:`QueryStats`.
+
+    Yields:
+        (list): The QueryStats recorded so far, appended as queries finish.
+
+    Collectors are process wide, so queries finished on other threads while
+    the block is active are recorded too.
+    """
+    recorded = []
+
+    def collect(stats):
+        recorded.append(stats)
+        if callback is not None:
+            callback(stats)
+
+    _collectors.append(collect)
+    try:
+        yield recorded
+    finally:
+        _collectors.remove(collect)
@@ -12,8 +12,9 @@ import sys
 # other polygons
 # if all points of the current polygon are inside any polygon that we test, we
 # mark the current polygon for deletion
-
-logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
+#
+# The library versions of these experiments are spatial_ops.prune (dropping
+# contained polygons) and spatial_ops.query_split (vertex budget splitting).
 
 def cli_setup():
     parser = argparse.ArgumentParser(
@@ -47,19 +48,19 @@ def convert_shp_to_json(file_name):
         for i, feature in enumerate(layer):
             logging.debug('Feature----------------------------------------- ')
             logging.debug(feature.GetGeometryRef())
-            logging.debug('count', i)
+            logging.debug('count %s', i)
 
             convex_hull = feature.GetGeometryRef().ConvexHull()
-            logging.debug('convex hull', convex_hull)
+            logging.debug('convex hull %s', convex_hull)
             simplified = convex_hull.Simplify(0.01)
-            logging.debug('simplified: ', simplified)
+            logging.debug('simplified: %s', simplified)
 
             for j, point in enumerate(feature.GetGeometryRef()):
                 logging.debug('PART OF FEATURE =================================')
                 logging.debug(point)
 
-                logging.debug('vertices', point.GetPointCount())
-                logging.debug('part count', j)
+                logging.debug('vertices %s', point.GetPointCount())
+                logging.debug('part count %s', j)
                 allVertices += point.GetPointCount()
 
             multipoly.AddGeometry(simplified)
@@ -98,7 +99,7 @@ def convert_shp_to_json(file_name):
 
 
         logging.debug('finished')
-        logging.debug('Simplified Vertices: ', simplifiedVertices)
+        logging.debug('Simplified Vertices: %s', simplifiedVertices)
 
         # write out the multipoly of the simple coverage
         out_driver = ogr.GetDriverByName('GeoJSON')
@@ -132,13 +133,14 @@ def convert_shp_to_json(file_name):
                 for j in i:
                     vertexCount += j.GetPointCount()
 
-            logging.debug('VertexCount', vertexCount)
+            logging.debug('VertexCount %s', vertexCount)
 
-        logging.debug('All Vertices in file', allVertices)
+        logging.debug('All Vertices in file %s', allVertices)
 
         return multipolyList
 
-if __name__ == 'main':
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
     args = cli_setup()
 
     convert_shp_to_json(args.polygon)
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""profiling.py -- Part of spatialops Module
+
+Opt-in cProfile capture for slow grid_intersect and Converter calls.
+
+Profiling is off unless one of the following is set:
+
+    * the ``SPATIAL_OPS_PROFILE_DIR`` environment variable, read at import
+      time (``SPATIAL_OPS_PROFILE_THRESHOLD`` sets the threshold in
+      seconds, default 5)
+    * the ``profile_slow_calls()`` context manager::
+
+          with profiling.profile_slow_calls("/tmp/profiles", threshold=2.0):
+              grid_intersect.find_mgrs_intersection(wkt)
+
+While enabled, every call to a ``@profiled`` entry point runs under
+cProfile. Calls that take longer than the threshold are written to the
+output directory as a ``.prof`` file (load it with ``pstats`` or
+snakeviz) plus a ``.json`` sidecar holding the elapsed time, the SHA1 of
+the triggering AOI and a summary of its geometry. Faster calls are
+discarded. Nested entry points (``find_mgrs_intersection`` calling
+``find_mgrs_intersection_100km``) are captured as part of the outermost
+call only.
+"""
+
+import cProfile
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 5.0
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+_config = None
+_local = threading.local()
+
+
+class ProfileConfig:
+    """Where and when to keep captured profiles."""
+
+    def __init__(self, output_dir, threshold=DEFAULT_THRESHOLD):
+        self.output_dir = Path(output_dir)
+        self.threshold = float(threshold)
+
+
+def configure_from_env(environ=None):
+    """(Re)load the profiling configuration from environment variables."""
+    global _config
+
+    environ = os.environ if environ is None else environ
+    output_dir = environ.get("SPATIAL_OPS_PROFILE_DIR")
+    if output_dir:
+        threshold = environ.get("SPATIAL_OPS_PROFILE_THRESHOLD", DEFAULT_THRESHOLD)
+        _config = ProfileConfig(output_dir, threshold)
+    else:
+        _config = None
+    return _config
+
+
+@contextmanager
+def profile_slow_calls(output_dir, threshold=DEFAULT_THRESHOLD):
+    """Capture profiles of slow entry point calls made inside the block."""
+    global _config
+
+    previous = _config
+    _config = ProfileConfig(output_dir, threshold)
+    try:
+        yield _config
+    finally:
+        _config = previous
+
+
+def aoi_hash(aoi):
+    """Return a stable SHA1 hex digest identifying an AOI argument."""
+    if isinstance(aoi, bytes):
+        data = aoi
+    else:
+        data = _aoi_text(aoi).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+def _aoi_text(aoi):
+    if hasattr(aoi, "ExportToWkt"):
+        return aoi.ExportToWkt()
+    return str(aoi)
+
+
+def geometry_summary(aoi):
+    """Summarise an AOI argument without loading GDAL.
+
+    WKT strings and OGR geometries report their geometry type, vertex count
+    and envelope. File paths report the path and size on disk.
+    """
+    if isinstance(aoi, os.PathLike) or (isinstance(aoi, str) and not re.search(r"[({]", aoi)):
+        if Path(aoi).exists():
+            return {"path": str(aoi), "bytes": Path(aoi).stat().st_size}
+
+    if isinstance(aoi, bytes):
+        return {"wkb_bytes": len(aoi)}
+
+    text = _aoi_text(aoi)
+    match = re.match(r"\s*([A-Za-z]+)", text)
+    if not match or "(" not in text:
+        return {"repr": text[:200]}
+
+    numbers = [float(n) for n in _NUMBER_RE.findall(text[text.index("("):])]
+    # WKT coordinates are 2D unless the type says otherwise
+    dims = 3 if re.match(r"\s*[A-Za-z]+\s+Z\b", text) else 2
+    xs, ys = numbers[0::dims], numbers[1::dims]
+
+    summary = {
+        "type": match.group(1).upper(),
+        "vertices": len(numbers) // dims,
+        "wkt_bytes": len(text),
+    }
+    if xs and ys:
+        summary["envelope"] = [min(xs), min(ys), max(xs), max(ys)]
+    return summary
+
+
+def _write_profile(config, name, elapsed, profiler, aoi):
+    config.output_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = aoi_hash(aoi) if aoi is not None else "noaoi"
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    stem = Path(config.output_dir, f"{name}-{stamp}-{digest[:12]}")
+
+    profiler.dump_stats(str(stem) + ".prof")
+
+    sidecar = {
+        "function": name,
+        "elapsed": elapsed,
+        "threshold": config.threshold,
+        "aoi_sha1": None if aoi is None else digest,
+        "geometry": None if aoi is None else geometry_summary(aoi),
+        "timestamp": stamp,
+        "pid": os.getpid(),
+    }
+    with open(str(stem) + ".json", "w") as f:
+        json.dump(sidecar, f, indent=2)
+
+    logger.info("%s took %.2fs, profile saved to %s.prof", name, elapsed, stem)
+    return stem
+
+
+def profiled(aoi=None):
+    """Decorator marking a function as a profiling entry point.
+
+    Args:
+        aoi (str): Name of the parameter holding the AOI (a WKT string,
+            geometry or input path), used to hash and summarise it.
+
+    """
+
+    def decorator(func):
+        name = func.__qualname__
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            config = _config
+            if config is None or getattr(_local, "active", False):
+                return func(*args, **kwargs)
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # another profiler or debugger already owns the hooks
+                return func(*args, **kwargs)
+
+            _local.active = True
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                _local.active = False
+                elapsed = time.perf_counter() - start
+                if elapsed >= config.threshold:
+                    aoi_value = None
+                    if aoi is not None:
+                        bound = signature.bind_partial(*args, **kwargs)
+                        aoi_value = bound.arguments.get(aoi)
+                    try:
+                        _write_profile(config, name, elapsed, profiler, aoi_value)
+                    except OSError:
+                        logger.exception("could not save profile for %s", name)
+
+        return wrapper
+
+    return decorator
+
+
+configure_from_env()
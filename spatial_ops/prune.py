@@ -0,0 +1,87 @@
+"""prune.py -- Part of spatialops Module
+
+Containment pruning of polygon sets before a union.
+
+AOI layers often hold nested and duplicated polygons. They don't change
+the union of the layer but every one of them is fed through
+UnionCascaded. ``prune_contained`` drops polygons that lie entirely
+within another polygon of the set, and exact duplicates, before the union
+runs.
+
+Candidates are found with a MultiScaleEnvelopeIndex: only polygons whose
+envelope contains the envelope of the polygon being tested are checked
+with a prepared ``Contains``. Polygons are visited largest first so
+containers are always indexed before what they contain.
+"""
+
+import logging
+from collections import namedtuple
+
+from .spatial_index import MultiScaleEnvelopeIndex, envelope_contains, prepare
+
+logger = logging.getLogger(__name__)
+
+PruneResult = namedtuple("PruneResult", "geometries input_count contained duplicates")
+
+
+def prune_contained(geoms, cell_size=None):
+    """Removes polygons contained in, or equal to, another polygon.
+
+    Args:
+        geoms (iterable): OGR polygons. Other geometry types are kept
+            untouched.
+        cell_size (float): Finest MultiScaleEnvelopeIndex cell size,
+            defaults to four times the median envelope width. Large
+            containers go to coarser levels.
+
+    Returns:
+        (PruneResult): The kept geometries in their input order, the input
+            count, and how many contained polygons and duplicates were
+            removed.
+
+    """
+    geoms = list(geoms)
+    envelopes = [g.GetEnvelope() for g in geoms]
+
+    if cell_size is None:
+        widths = sorted(max(e[1] - e[0], e[3] - e[2]) for e in envelopes) or [1.0]
+        cell_size = max(widths[len(widths) // 2] * 4, 1e-9)
+
+    polygons = [idx for idx, g in enumerate(geoms) if g.GetGeometryName() == "POLYGON"]
+    polygons.sort(key=lambda idx: geoms[idx].GetArea(), reverse=True)
+
+    index = MultiScaleEnvelopeIndex(cell_size)
+    # prepared on their first containment test
+    prepared = {}
+    removed = set()
+    contained = duplicates = 0
+
+    for idx in polygons:
+        geom, envelope = geoms[idx], envelopes[idx]
+        container = None
+        for other in index.query(envelope):
+            if not envelope_contains(envelopes[other], envelope):
+                continue
+            if other not in prepared:
+                prepared[other] = prepare(geoms[other])
+            if prepared[other].Contains(geom):
+                container = other
+                break
+
+        if container is None:
+            index.insert(idx, envelope)
+            continue
+
+        removed.add(idx)
+        if geoms[container].Equals(geom):
+            duplicates += 1
+        else:
+            contained += 1
+
+    kept = [g for idx, g in enumerate(geoms) if idx not in removed]
+
+    if removed:
+        logger.debug("pruned %d of %d polygons (%d contained, %d duplicates)",
+                     len(removed), len(geoms), contained, duplicates)
+
+    return PruneResult(kept, len(geoms), contained, duplicates)
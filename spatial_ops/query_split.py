@@ -0,0 +1,262 @@
+"""query_split.py -- Part of spatialops Module
+
+Split AOIs into query polygons under a vertex budget.
+
+Imagery catalog APIs reject query polygons with too many vertices (200 is
+a common limit). ``split_query_polygon`` turns an AOI into as few
+polygons as it can that each stay under the budget, without giving up
+coverage:
+
+    1. Optionally, the AOI is simplified outwards: buffered by twice the
+       tolerance and then simplified by the tolerance, so the result still
+       covers the original AOI.
+    2. Parts over the budget are cut in half across their longer side,
+       recursively, until every piece fits. Where cutting doesn't help,
+       the convex hull and then the envelope are used instead, and both of
+       these still cover the piece.
+    3. The parts are ordered along a Z-order curve of their centroids and
+       packed greedily into multipolygons, so each chunk holds parts that
+       are close together and its bounding box stays tight.
+
+Command line::
+
+    python -m spatial_ops.query_split aoi.shp --max-vertices 200 -o chunks.geojson
+"""
+
+import argparse
+import logging
+import sys
+
+from ._gdal import ogr
+from .prune import prune_contained
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_VERTICES = 200
+
+# Recursion limit for halving a part, 2**12 pieces at most
+MAX_SPLIT_DEPTH = 12
+
+# Buffer segments per quarter circle when simplifying outwards
+_BUFFER_QUADSECS = 4
+
+
+def vertex_count(geom):
+    """Returns the number of points in all rings of a (multi)polygon,
+    closing points included, as they appear in WKT."""
+    name = geom.GetGeometryName()
+    if name == "POLYGON":
+        return sum(geom.GetGeometryRef(i).GetPointCount()
+                   for i in range(geom.GetGeometryCount()))
+    if name in ("MULTIPOLYGON", "GEOMETRYCOLLECTION"):
+        return sum(vertex_count(geom.GetGeometryRef(i))
+                   for i in range(geom.GetGeometryCount()))
+    return geom.GetPointCount()
+
+
+def polygon_parts(geom):
+    """Returns copies of the polygons in geom, ignoring other types."""
+    name = geom.GetGeometryName()
+    if name == "POLYGON":
+        return [geom.Clone()] if not geom.IsEmpty() else []
+    if name in ("MULTIPOLYGON", "GEOMETRYCOLLECTION"):
+        parts = []
+        for i in range(geom.GetGeometryCount()):
+            parts += polygon_parts(geom.GetGeometryRef(i))
+        return parts
+    return []
+
+
+def _box(minx, maxx, miny, maxy):
+    ring = ogr.Geometry(ogr.wkbLinearRing)
+    for x, y in [(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy), (minx, miny)]:
+        ring.AddPoint_2D(x, y)
+    poly = ogr.Geometry(ogr.wkbPolygon)
+    poly.AddGeometry(ring)
+    return poly
+
+
+def _covering_fallback(part, max_vertices):
+    hull = part.ConvexHull()
+    if vertex_count(hull) <= max_vertices:
+        return hull
+    return _box(*part.GetEnvelope())
+
+
+def split_part(part, max_vertices, depth=0):
+    """Returns polygons under max_vertices that together cover part."""
+    if vertex_count(part) <= max_vertices:
+        return [part]
+
+    if depth >= MAX_SPLIT_DEPTH:
+        return [_covering_fallback(part, max_vertices)]
+
+    minx, maxx, miny, maxy = part.GetEnvelope()
+    if maxx - minx >= maxy - miny:
+        mid = (minx + maxx) / 2
+        halves = [_box(minx, mid, miny, maxy), _box(mid, maxx, miny, maxy)]
+    else:
+        mid = (miny + maxy) / 2
+        halves = [_box(minx, maxx, miny, mid), _box(minx, maxx, mid, maxy)]
+
+    pieces = []
+    for half in halves:
+        pieces += polygon_parts(part.Intersection(half))
+
+    if not pieces:
+        return [_covering_fallback(part, max_vertices)]
+
+    result = []
+    for piece in pieces:
+        result += split_part(piece, max_vertices, depth + 1)
+    return result
+
+
+def _morton_key(x, y, bits=16):
+    key = 0
+    for bit in range(bits):
+        key |= ((x >> bit) & 1) << (2 * bit)
+        key |= ((y >> bit) & 1) << (2 * bit + 1)
+    return key
+
+
+def _z_order(parts):
+    envelopes = [p.GetEnvelope() for p in parts]
+    minx = min(e[0] for e in envelopes)
+    maxx = max(e[1] for e in envelopes)
+    miny = min(e[2] for e in envelopes)
+    maxy = max(e[3] for e in envelopes)
+    scale = 0xFFFF / max(maxx - minx, maxy - miny, 1e-12)
+
+    def key(idx):
+        e = envelopes[idx]
+        cx, cy = (e[0] + e[1]) / 2, (e[2] + e[3]) / 2
+        return _morton_key(int((cx - minx) * scale), int((cy - miny) * scale))
+
+    return [parts[idx] for idx in sorted(range(len(parts)), key=key)]
+
+
+def _chunk_geometry(parts):
+    if len(parts) == 1:
+        return parts[0]
+    multi = ogr.Geometry(ogr.wkbMultiPolygon)
+    for part in parts:
+        multi.AddGeometry(part)
+    return multi
+
+
+def split_query_polygon(geom, max_vertices=DEFAULT_MAX_VERTICES, tolerance=None):
+    """Splits an AOI into query polygons of at most max_vertices vertices.
+
+    Args:
+        geom (ogr.Geometry): AOI polygon or multipolygon.
+        max_vertices (int): Vertex budget per query polygon, counting
+            closing points.
+        tolerance (float): Optional outward simplification tolerance in
+            the units of geom, reduces the number of chunks for detailed
+            AOIs while still covering them.
+
+    Returns:
+        (list): Polygons and multipolygons covering geom.
+
+    """
+    if max_vertices < 5:
+        raise ValueError("max_vertices must be at least 5, the size of a box")
+
+    if tolerance:
+        geom = geom.Buffer(2 * tolerance, _BUFFER_QUADSECS).SimplifyPreserveTopology(tolerance)
+
+    parts = []
+    for part in polygon_parts(geom):
+        parts += split_part(part, max_vertices)
+
+    if not parts:
+        return []
+
+    chunks = []
+    current, current_vertices = [], 0
+    for part in _z_order(parts):
+        count = vertex_count(part)
+        if current and current_vertices + count > max_vertices:
+            chunks.append(_chunk_geometry(current))
+            current, current_vertices = [], 0
+        current.append(part)
+        current_vertices += count
+    chunks.append(_chunk_geometry(current))
+
+    logger.debug("split %d vertices into %d query polygons of at most %d vertices",
+                 vertex_count(geom), len(chunks), max_vertices)
+    return chunks
+
+
+def read_aoi(path):
+    """Reads and unions the polygons of any OGR readable vector file."""
+    ds = ogr.Open(str(path))
+    if ds is None:
+        raise ValueError("Could not open {}".format(path))
+
+    polygons = []
+    for layer in ds:
+        for feature in layer:
+            geom = feature.GetGeometryRef()
+            if geom is not None:
+                geom = geom.Clone()
+                geom.FlattenTo2D()
+                polygons += polygon_parts(geom)
+    ds = None
+
+    multi = ogr.Geometry(ogr.wkbMultiPolygon)
+    for polygon in prune_contained(polygons).geometries:
+        multi.AddGeometry(polygon)
+    return multi.UnionCascaded()
+
+
+def write_geojson(chunks, output):
+    driver = ogr.GetDriverByName("GeoJSON")
+    out_ds = driver.CreateDataSource(str(output))
+    out_layer = out_ds.CreateLayer("query_polygons", geom_type=ogr.wkbUnknown)
+    out_layer.CreateField(ogr.FieldDefn("vertices", ogr.OFTInteger))
+
+    for chunk in chunks:
+        feature = ogr.Feature(out_layer.GetLayerDefn())
+        feature.SetField("vertices", vertex_count(chunk))
+        feature.SetGeometry(chunk)
+        out_layer.CreateFeature(feature)
+        feature = None
+
+    out_ds = None
+
+
+def cli_setup(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Split an AOI into query polygons under a vertex budget")
+
+    parser.add_argument("aoi", help="AOI vector file (SHP, GEOJSON, KML, GPKG)")
+    parser.add_argument("-n", "--max-vertices", type=int, default=DEFAULT_MAX_VERTICES,
+                        help="Vertex budget per query polygon (default %(default)s)")
+    parser.add_argument("-t", "--tolerance", type=float, default=None,
+                        help="Outward simplification tolerance in AOI units")
+    parser.add_argument("-o", "--output",
+                        help="GeoJSON file to write, prints one WKT per line otherwise")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = cli_setup(argv)
+
+    chunks = split_query_polygon(read_aoi(args.aoi), args.max_vertices, args.tolerance)
+
+    if args.output:
+        write_geojson(chunks, args.output)
+        print("{} query polygons written to {}".format(len(chunks), args.output),
+              file=sys.stderr)
+    else:
+        for chunk in chunks:
+            print(chunk.ExportToWkt())
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
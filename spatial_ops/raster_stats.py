@@ -0,0 +1,230 @@
+"""raster_stats.py -- Part of spatialops Module
+
+Streaming band statistics and histograms.
+
+A BandStatistics accumulates min, max, mean, standard deviation, the
+nodata fraction and a histogram from the pixel blocks of one band as they
+are read, so statistics can be computed during a conversion instead of
+reading the output a second time.
+
+8 and 16 bit integer bands (all Sentinel-2 bands) are counted exactly per
+value and rebinned at the end, so the histogram covers the true min/max.
+Other data types need the histogram range up front, e.g. from GDAL's
+approximate ``ComputeRasterMinMax``; values outside it land in the end
+buckets.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError("Band statistics need numpy, install spatial_ops[stats]") from e
+
+DEFAULT_BUCKETS = 256
+
+# GDT_Byte, GDT_UInt16, GDT_Int16 (and GDT_Int8 on GDAL >= 3.7), counted
+# exactly rather than over a precomputed range
+_EXACT_GDAL_TYPES = {1, 2, 3, 14}
+
+
+class BandStatistics:
+    """Accumulates statistics over the blocks of one raster band.
+
+    Args:
+        nodata (float): Nodata value excluded from the statistics.
+        buckets (int): Number of histogram buckets in the result.
+        hist_range (tuple): (min, max) histogram range for non 8/16 bit
+            integer data.
+
+    """
+
+    def __init__(self, nodata=None, buckets=DEFAULT_BUCKETS, hist_range=None):
+        self.nodata = nodata
+        self.buckets = buckets
+        self.hist_range = hist_range
+
+        self.total_count = 0
+        self.valid_count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+        self._exact_counts = None
+        self._exact_offset = 0
+        self._histogram = None
+
+    def update(self, block):
+        """Adds a numpy array of pixel values to the statistics."""
+        block = np.asarray(block)
+        self.total_count += block.size
+
+        valid = block.ravel()
+        if self.nodata is not None:
+            valid = valid[valid != self.nodata]
+        if valid.dtype.kind == 'f':
+            valid = valid[np.isfinite(valid)]
+
+        if valid.size == 0:
+            return
+
+        self.valid_count += valid.size
+        self.minimum = min(self.minimum, valid.min().item())
+        self.maximum = max(self.maximum, valid.max().item())
+
+        as_float = valid.astype(np.float64)
+        self._sum += as_float.sum()
+        self._sum_sq += np.square(as_float).sum()
+
+        if valid.dtype.kind in 'iu' and valid.dtype.itemsize <= 2:
+            self._count_exact(valid)
+        elif self.hist_range is not None:
+            counts, _ = np.histogram(np.clip(as_float, *self.hist_range),
+                                     bins=self.buckets, range=self.hist_range)
+            if self._histogram is None:
+                self._histogram = counts
+            else:
+                self._histogram += counts
+
+    def _count_exact(self, valid):
+        if self._exact_counts is None:
+            info = np.iinfo(valid.dtype)
+            self._exact_offset = int(info.min)
+            self._exact_counts = np.zeros(int(info.max) - int(info.min) + 1, dtype=np.int64)
+
+        shifted = valid.astype(np.int64) - self._exact_offset
+        self._exact_counts += np.bincount(shifted, minlength=self._exact_counts.size)
+
+    def histogram(self):
+        """Returns (min, max, bucket counts) in GDAL's histogram convention."""
+        if self._exact_counts is not None and self.valid_count:
+            # buckets centred on integer values, like gdalinfo -hist
+            low, high = self.minimum - 0.5, self.maximum + 0.5
+            first = int(self.minimum) - self._exact_offset
+            last = int(self.maximum) - self._exact_offset
+            values = np.arange(int(self.minimum), int(self.maximum) + 1, dtype=np.float64)
+            index = ((values - low) * self.buckets / (high - low)).astype(np.int64)
+            counts = np.bincount(np.clip(index, 0, self.buckets - 1),
+                                 weights=self._exact_counts[first:last + 1],
+                                 minlength=self.buckets)
+            return low, high, [int(c) for c in counts]
+
+        if self._histogram is not None:
+            return self.hist_range[0], self.hist_range[1], [int(c) for c in self._histogram]
+
+        return None
+
+    def result(self):
+        """Returns the statistics as a dict."""
+        if not self.valid_count:
+            return {
+                'min': None, 'max': None, 'mean': None, 'std': None,
+                'valid_count': 0, 'total_count': self.total_count,
+                'nodata_fraction': 1.0 if self.total_count else 0.0,
+                'histogram': None,
+            }
+
+        mean = self._sum / self.valid_count
+        variance = max(self._sum_sq / self.valid_count - mean * mean, 0.0)
+        histogram = self.histogram()
+
+        return {
+            'min': self.minimum,
+            'max': self.maximum,
+            'mean': mean,
+            'std': math.sqrt(variance),
+            'valid_count': self.valid_count,
+            'total_count': self.total_count,
+            'nodata_fraction': 1.0 - self.valid_count / self.total_count,
+            'histogram': None if histogram is None else {
+                'min': histogram[0], 'max': histogram[1], 'counts': histogram[2]},
+        }
+
+
+def iter_windows(width, height, block_width, block_height):
+    """Yields (xoff, yoff, xsize, ysize) windows covering a raster."""
+    for yoff in range(0, height, block_height):
+        ysize = min(block_height, height - yoff)
+        for xoff in range(0, width, block_width):
+            yield xoff, yoff, min(block_width, width - xoff), ysize
+
+
+def stream_band_statistics(src_ds, dst_ds=None, buckets=DEFAULT_BUCKETS):
+    """Reads src_ds block by block, computing statistics for every band.
+
+    If dst_ds is given each block is also written to it, so a copy and its
+    statistics share the reads of the source. Bands that aren't 8/16 bit
+    integers need GDAL's approximate ComputeRasterMinMax first, for the
+    histogram range. The statistics, nodata
+    fraction and histogram are stored on the dst_ds bands (or on src_ds
+    when there is no destination, e.g. a VRT opened for update) as GDAL
+    metadata, which GDAL persists in the file or its .aux.xml.
+
+    Returns:
+        (list): One statistics dict (see BandStatistics.result) per band.
+
+    """
+    band_count = src_ds.RasterCount
+    accumulators = []
+    for idx in range(1, band_count + 1):
+        band = src_ds.GetRasterBand(idx)
+        hist_range = None
+        if band.DataType not in _EXACT_GDAL_TYPES:
+            hist_range = tuple(band.ComputeRasterMinMax(True))
+        accumulators.append(BandStatistics(band.GetNoDataValue(), buckets, hist_range))
+
+    block_width, block_height = src_ds.GetRasterBand(1).GetBlockSize()
+    # very thin strips make for many tiny reads, batch them up
+    block_height = max(block_height, min(src_ds.RasterYSize, 256 * 1024 // max(1, src_ds.RasterXSize)))
+
+    for xoff, yoff, xsize, ysize in iter_windows(src_ds.RasterXSize, src_ds.RasterYSize,
+                                                 block_width, block_height):
+        for idx, stats in enumerate(accumulators, start=1):
+            block = src_ds.GetRasterBand(idx).ReadAsArray(xoff, yoff, xsize, ysize)
+            stats.update(block)
+            if dst_ds is not None:
+                dst_ds.GetRasterBand(idx).WriteArray(block, xoff, yoff)
+
+    target = dst_ds if dst_ds is not None else src_ds
+    results = []
+    for idx, stats in enumerate(accumulators, start=1):
+        result = stats.result()
+        band = target.GetRasterBand(idx)
+        if result['valid_count']:
+            band.SetStatistics(result['min'], result['max'], result['mean'], result['std'])
+        band.SetMetadataItem('STATISTICS_VALID_PERCENT',
+                             str(100.0 * (1.0 - result['nodata_fraction'])))
+        band.SetMetadataItem('STATISTICS_NODATA_FRACTION', str(result['nodata_fraction']))
+        if result['histogram'] is not None:
+            histogram = result['histogram']
+            band.SetDefaultHistogram(histogram['min'], histogram['max'], histogram['counts'])
+        results.append(result)
+
+    return results
+
+
+def read_band_statistics(ds):
+    """Returns the statistics stored on the bands of ds without computing.
+
+    Bands without stored statistics are reported as None.
+    """
+    results = []
+    for idx in range(1, ds.RasterCount + 1):
+        band = ds.GetRasterBand(idx)
+        metadata = band.GetMetadata() or {}
+        if 'STATISTICS_MEAN' not in metadata:
+            results.append(None)
+            continue
+
+        histogram = band.GetDefaultHistogram(force=False)
+        results.append({
+            'min': float(metadata['STATISTICS_MINIMUM']),
+            'max': float(metadata['STATISTICS_MAXIMUM']),
+            'mean': float(metadata['STATISTICS_MEAN']),
+            'std': float(metadata['STATISTICS_STDDEV']),
+            'nodata_fraction': float(metadata.get('STATISTICS_NODATA_FRACTION', 0.0)),
+            'histogram': None if not histogram else {
+                'min': histogram[0], 'max': histogram[1], 'counts': list(histogram[3])},
+        })
+    return results
@@ -0,0 +1,203 @@
+"""safe_ingest.py -- Part of spatialops Module
+
+Batch conversion of the band images in Sentinel-2 .SAFE products.
+
+``ingest_safe`` finds every band JP2 in an L1C or L2A product and converts
+them with ``Converter.convert_jp2_to_tif`` on a bounded thread pool. Every
+finished output is recorded in a JSON manifest with its size and SHA256,
+so an interrupted run can be restarted and picks up exactly where it
+stopped: outputs that are missing from the manifest, or whose size (and
+optionally checksum) no longer matches, are deleted and converted again.
+
+Example::
+
+    result = ingest_safe('S2A_MSIL2A_20190601T183921_..._T12UUA_....SAFE',
+                         'converted', workers=4, output_format='COG')
+    print(len(result['converted']), len(result['skipped']))
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'ingest_manifest.json'
+
+# T12UUA_20190601T183921_B02.jp2 (L1C) or T12UUA_20190601T183921_B02_10m.jp2 (L2A)
+BAND_FILE_RE = re.compile(r'_(B\d[\dA])(?:_(\d{2})m)?\.jp2$')
+
+BandFile = namedtuple('BandFile', 'path band resolution level')
+
+
+def find_band_files(safe_dir, bands=None):
+    """Returns the band jp2 files of a .SAFE product.
+
+    Args:
+        safe_dir (str): Path to the .SAFE directory.
+        bands (list): Optional band names to keep, e.g. ['B02', 'B8A'].
+
+    Returns:
+        (list): BandFile tuples sorted by resolution and band. resolution
+            is 10, 20 or 60 for L2A bands and 0 for L1C bands, matching the
+            atmos_cor argument of convert_jp2_to_tif.
+
+    """
+    band_files = []
+
+    for path in sorted(Path(safe_dir).glob('GRANULE/*/IMG_DATA/**/*.jp2')):
+        m = BAND_FILE_RE.search(path.name)
+        if not m:
+            # TCI, AOT, WVP, SCL and friends
+            continue
+
+        band, resolution = m.group(1), m.group(2)
+        if bands is not None and band not in bands:
+            continue
+
+        if resolution:
+            band_files.append(BandFile(path, band, int(resolution), 'L2A'))
+        else:
+            band_files.append(BandFile(path, band, 0, 'L1C'))
+
+    return sorted(band_files, key=lambda b: (b.resolution, b.band))
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """JSON record of the outputs an ingest has fully written.
+
+    Entries are keyed by output file name. The manifest is rewritten
+    atomically after every recorded output, so it is never left half
+    written by an interrupted run.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries = {}
+
+        if self.path.exists():
+            with open(self.path) as f:
+                self.entries = json.load(f).get('outputs', {})
+
+    def is_complete(self, output_file, verify_checksum=False):
+        """Returns True if output_file was recorded and is still intact."""
+        entry = self.entries.get(Path(output_file).name)
+        if entry is None or not Path(output_file).exists():
+            return False
+
+        if os.path.getsize(output_file) != entry['size']:
+            return False
+
+        if verify_checksum and file_sha256(output_file) != entry['sha256']:
+            return False
+
+        return True
+
+    def record(self, output_file, source, statistics=None):
+        entry = {
+            'source': str(source),
+            'size': os.path.getsize(output_file),
+            'sha256': file_sha256(output_file),
+            'completed': datetime.now().isoformat(timespec='seconds'),
+        }
+        if statistics is not None:
+            entry['statistics'] = statistics
+        with self._lock:
+            self.entries[Path(output_file).name] = entry
+            self._save()
+        return entry
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(str(self.path) + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'outputs': self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def ingest_safe(safe_dir, output_dir, converter=None, workers=4, name=None,
+                bands=None, manifest_path=None, verify_checksums=False,
+                **convert_options):
+    """Converts every band of a .SAFE product, resuming earlier runs.
+
+    Args:
+        safe_dir (str): Path to the .SAFE directory.
+        output_dir (str): Directory the converted bands are written to.
+        converter (Converter): Converter to use, a new one by default.
+        workers (int): Number of bands converted at once.
+        name (str): Output name prefix, defaults to the .SAFE name.
+        bands (list): Optional band names to restrict the ingest to.
+        manifest_path (str): Manifest location, defaults to
+            ``ingest_manifest.json`` in output_dir.
+        verify_checksums (bool): Re-hash recorded outputs before skipping
+            them instead of only comparing sizes.
+        **convert_options: Passed to convert_jp2_to_tif, e.g.
+            output_format='COG' or creation_options. With
+            compute_statistics=True the band statistics are also kept in
+            the manifest entries.
+
+    Returns:
+        (dict): 'converted' and 'skipped' lists of output paths.
+
+    """
+    if converter is None:
+        from .converter import Converter
+        converter = Converter()
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = name or Path(safe_dir).name.split('.')[0]
+    manifest = IngestManifest(manifest_path or Path(output_dir, MANIFEST_NAME))
+
+    extension = '.vrt' if convert_options.get('output_format') == 'VRT' else '.tif'
+
+    result = {'converted': [], 'skipped': []}
+    pending = []
+
+    for band_file in find_band_files(safe_dir, bands):
+        job = (band_file.path, name, band_file.resolution, output_dir)
+        output_file = converter.jp2_output_path(
+            *job, extension=extension, aoi_wkt=convert_options.get('aoi_wkt'),
+            crop_to_cutline=convert_options.get('crop_to_cutline', False))
+
+        if manifest.is_complete(output_file, verify_checksums):
+            result['skipped'].append(output_file)
+            continue
+
+        if Path(output_file).exists():
+            # left behind by an interrupted run, can't be trusted
+            logger.info('removing incomplete output %s', output_file)
+            os.remove(output_file)
+
+        pending.append(job)
+
+    def convert(job):
+        statistics = None
+        output_file = converter.convert_jp2_to_tif(*job, **convert_options)
+        if convert_options.get('compute_statistics'):
+            statistics = converter.read_statistics(output_file)
+        manifest.record(output_file, job[0], statistics)
+        return output_file
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        result['converted'] = list(executor.map(convert, pending))
+
+    logger.info('ingested %s: %d converted, %d already done', name,
+                len(result['converted']), len(result['skipped']))
+    return result
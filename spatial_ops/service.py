@@ -0,0 +1,430 @@
+"""service.py -- Part of spatialops Module
+
+Long lived local tile query service.
+
+Each grid_intersect call opens and parses the grid files again. The
+service loads a GridStore once and keeps its indexes warm for every
+request, over localhost HTTP or a UNIX socket. Requests and responses are
+JSON:
+
+    POST /query     one request, or {"requests": [...]} for a batch
+    GET  /health    {"status": "ok", ...}
+    GET  /metrics   request counts, errors and time per op
+
+Request ops:
+
+    {"op": "tiles", "wkt": ...}             -> {"mgrs": [...], "wrs": [...]}
+    {"op": "footprint", "tile_id": ...}     -> {"tile_id": ..., "wkt": ...}
+    {"op": "wrs_to_mgrs", "tile_ids": [...]} -> {"tiles": [...]}
+    {"op": "mgrs_to_wrs", "tile_ids": [...]} -> {"tiles": [...]}
+
+"tiles" also takes "geojson" instead of "wkt", and "mgrs"/"wrs" flags to
+skip a grid. The "tiles" requests of a batch are joined against the grids
+in one GridStore.join call. ``TileQueryClient`` wraps all of this.
+
+Command line::
+
+    python -m spatial_ops.service --port 8765
+    python -m spatial_ops.service --socket /tmp/spatial_ops.sock --warm
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .grid_store import default_store
+from .utils import as_geometry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+OPS = ["tiles", "footprint", "wrs_to_mgrs", "mgrs_to_wrs"]
+
+
+class TileQueryService:
+    """Answers tile query requests from a shared GridStore.
+
+    Args:
+        grid_store (GridStore): Grids to query, the shared default store
+            if None.
+
+    """
+
+    def __init__(self, grid_store=None):
+        self.grid_store = default_store() if grid_store is None else grid_store
+        self.started = time.time()
+
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._seconds = defaultdict(float)
+        self._batches = 0
+
+    def warm(self, gzds=()):
+        """Loads the WRS2 and GZD layers, and the 100km squares of gzds,
+        before the first request needs them."""
+        self.grid_store.wrs_layer()
+        self.grid_store.gzd_layer()
+        for gzd in gzds:
+            self.grid_store.square_layer(gzd)
+
+    def handle(self, request):
+        """Answers a single request, see handle_batch."""
+        return self.handle_batch([request])[0]
+
+    def handle_batch(self, requests):
+        """Answers a list of requests.
+
+        Returns:
+            (list): Per request, its result dict. Invalid or failed
+                requests get {"error": message} instead of raising, so one
+                bad request doesn't fail the batch.
+
+        """
+        with self._lock:
+            self._batches += 1
+
+        results = [None] * len(requests)
+        tile_requests = []
+
+        for idx, request in enumerate(requests):
+            op = request.get("op") if isinstance(request, dict) else None
+            if op == "tiles":
+                tile_requests.append(idx)
+            else:
+                # unknown ops are counted together in the metrics
+                results[idx] = self._timed(op if op in OPS else "invalid",
+                                           self._handle_one, request)
+
+        if tile_requests:
+            joined = self._timed("tiles", self._join, [requests[idx] for idx in tile_requests],
+                                 count=len(tile_requests))
+            for offset, idx in enumerate(tile_requests):
+                results[idx] = joined[offset] if isinstance(joined, list) else joined
+
+        return results
+
+    def _timed(self, op, func, request, count=1):
+        start = time.perf_counter()
+        try:
+            result = func(request)
+        except Exception as e:
+            if not isinstance(e, ValueError):
+                logger.exception("%s request failed", op)
+            with self._lock:
+                self._errors[op] += count
+            result = {"error": str(e)}
+
+        with self._lock:
+            self._requests[op] += count
+            self._seconds[op] += time.perf_counter() - start
+        return result
+
+    def _handle_one(self, request):
+        op = request.get("op") if isinstance(request, dict) else None
+        store = self.grid_store
+
+        if op == "footprint":
+            geom = store.footprint(_required(request, "tile_id"))
+            return {"tile_id": request["tile_id"],
+                    "wkt": None if geom is None else geom.ExportToWkt()}
+
+        if op in ("wrs_to_mgrs", "mgrs_to_wrs"):
+            lookup = store.mgrs_tiles if op == "wrs_to_mgrs" else store.wrs_tiles
+            tiles = set()
+            for tile_id in _required(request, "tile_ids"):
+                geom = store.footprint(tile_id)
+                if geom is not None:
+                    tiles.update(lookup(geom))
+            return {"tiles": sorted(tiles)}
+
+        raise ValueError("Unknown op {!r}, expected one of {}".format(op, ", ".join(OPS)))
+
+    def _join(self, requests):
+        # a bad geometry only fails its own request, the others are joined
+        results = [None] * len(requests)
+        valid, geoms = [], []
+        for idx, request in enumerate(requests):
+            try:
+                geoms.append(_request_geometry(request))
+            except Exception as e:
+                results[idx] = {"error": str(e)}
+            else:
+                valid.append(idx)
+
+        if len(valid) < len(requests):
+            with self._lock:
+                self._errors["tiles"] += len(requests) - len(valid)
+        if not valid:
+            return results
+
+        requests_ok = [requests[idx] for idx in valid]
+        mgrs = any(request.get("mgrs", True) for request in requests_ok)
+        wrs = any(request.get("wrs", True) for request in requests_ok)
+        joined = self.grid_store.join(geoms, mgrs=mgrs, wrs=wrs)
+
+        for idx, request, tiles in zip(valid, requests_ok, joined):
+            results[idx] = {grid: tiles[grid] for grid in ("mgrs", "wrs")
+                            if request.get(grid, True)}
+        return results
+
+    def health(self):
+        return {"status": "ok", "uptime": round(time.time() - self.started, 3),
+                "grid_dir": str(self.grid_store.grid_dir)}
+
+    def metrics(self):
+        """Returns request, error and time totals per op."""
+        with self._lock:
+            return {
+                "uptime": round(time.time() - self.started, 3),
+                "batches": self._batches,
+                "requests": dict(self._requests),
+                "errors": dict(self._errors),
+                "seconds": {op: round(s, 6) for op, s in self._seconds.items()},
+            }
+
+
+def _request_geometry(request):
+    geometry = request.get("wkt") or request.get("geojson")
+    if geometry is None:
+        raise ValueError("tiles requests need a wkt or geojson geometry")
+    if isinstance(geometry, dict):
+        geometry = json.dumps(geometry)
+    geom = as_geometry(geometry)
+    if geom is None:
+        raise ValueError("invalid tiles geometry {!r}".format(geometry[:80]))
+    return geom
+
+
+def _required(request, key):
+    if key not in request:
+        raise ValueError("{} requests need {}".format(request.get("op"), key))
+    return request[key]
+
+
+class TileQueryHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP front end of the server's TileQueryService."""
+
+    server_version = "spatial_ops"
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._send(200, service.health())
+        elif self.path == "/metrics":
+            self._send(200, service.metrics())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/query":
+            self._send(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError as e:
+            self._send(400, {"error": "invalid JSON: {}".format(e)})
+            return
+
+        service = self.server.service
+        if isinstance(body, dict) and "requests" in body:
+            if not isinstance(body["requests"], list):
+                self._send(400, {"error": "requests must be a list"})
+                return
+            self._send(200, {"results": service.handle_batch(body["requests"])})
+            return
+
+        result = service.handle(body)
+        self._send(400 if "error" in result else 200, result)
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # UNIX socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+class TileQueryHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        self.service = service
+        super().__init__(address, TileQueryHandler)
+
+
+class TileQueryUnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, service):
+        self.service = service
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, TileQueryHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def make_server(service=None, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None):
+    """Creates a tile query server, call serve_forever on it to run it.
+
+    Args:
+        service (TileQueryService): Service to expose, a new one on the
+            default GridStore if None.
+        host (str): Interface to listen on, localhost by default.
+        port (int): TCP port, 0 picks a free one (see server_address).
+        unix_socket (str): Listen on this UNIX socket path instead of TCP.
+
+    """
+    service = TileQueryService() if service is None else service
+    if unix_socket:
+        return TileQueryUnixServer(str(unix_socket), service)
+    return TileQueryHTTPServer((host, port), service)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class TileQueryClient:
+    """Client of a running tile query service.
+
+    Args:
+        host (str): Service host, for TCP.
+        port (int): Service port, for TCP.
+        unix_socket (str): Service UNIX socket path, used instead of TCP.
+        timeout (float): Socket timeout in seconds.
+
+    Requests the service rejects or fails raise ValueError, other HTTP
+    errors RuntimeError.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, timeout=60):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+
+    def _connection(self):
+        if self.unix_socket:
+            return _UnixHTTPConnection(str(self.unix_socket), self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _call(self, method, path, payload=None):
+        conn = self._connection()
+        try:
+            body = None if payload is None else json.dumps(payload)
+            conn.request(method, path, body=body,
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            result = json.loads(response.read())
+        finally:
+            conn.close()
+
+        if response.status == 400:
+            raise ValueError(result.get("error"))
+        if response.status != 200:
+            raise RuntimeError("{} {}: {}".format(response.status, path, result.get("error")))
+        return result
+
+    def health(self):
+        return self._call("GET", "/health")
+
+    def metrics(self):
+        return self._call("GET", "/metrics")
+
+    def query(self, request):
+        return self._call("POST", "/query", request)
+
+    def batch(self, requests):
+        """Sends requests in one round trip, returns their results, with
+        {"error": message} for the ones that failed."""
+        return self._call("POST", "/query", {"requests": list(requests)})["results"]
+
+    def tiles(self, wkt, mgrs=True, wrs=True):
+        """Returns {'mgrs': [...], 'wrs': [...]} for a WGS84 WKT geometry."""
+        return self.query({"op": "tiles", "wkt": wkt, "mgrs": mgrs, "wrs": wrs})
+
+    def footprint(self, tile_id):
+        """Returns the WGS84 WKT footprint of a tile, or None."""
+        return self.query({"op": "footprint", "tile_id": tile_id})["wkt"]
+
+    def wrs_to_mgrs(self, tile_ids):
+        return self.query({"op": "wrs_to_mgrs", "tile_ids": list(tile_ids)})["tiles"]
+
+    def mgrs_to_wrs(self, tile_ids):
+        return self.query({"op": "mgrs_to_wrs", "tile_ids": list(tile_ids)})["tiles"]
+
+
+def cli_setup(argv=None):
+    parser = argparse.ArgumentParser(description="Serve tile queries from warm grid indexes")
+
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface (default %(default)s)")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT,
+                        help="TCP port (default %(default)s)")
+    parser.add_argument("-s", "--socket", help="Listen on a UNIX socket instead of TCP")
+    parser.add_argument("--grid-dir", help="grid_files directory")
+    parser.add_argument("--warm", nargs="*", metavar="GZD",
+                        help="Load the WRS2 and GZD grids, and these GZDs, at start up")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = cli_setup(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    store = None
+    if args.grid_dir:
+        from .grid_store import GridStore
+        store = GridStore(args.grid_dir)
+
+    service = TileQueryService(store)
+    if args.warm is not None:
+        service.warm(args.warm)
+
+    server = make_server(service, args.host, args.port, args.socket)
+    logger.info("serving tile queries on %s", args.socket or "{}:{}".format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""spatial_index.py -- Part of spatialops Module
+
+Pure python envelope index.
+
+OGR can only spatially filter one layer at a time, so joining many
+geometries against a grid means either a full scan per geometry or a
+round trip through a temporary datasource. EnvelopeIndex buckets
+envelopes on a regular grid of cells, so the candidates for a query are
+found by looking at a handful of cells. Exact geometry tests are left to
+the caller.
+"""
+
+import math
+from collections import defaultdict
+
+
+def prepare(geom):
+    """Returns a prepared geometry for repeated Contains/Intersects tests
+    against geom, or geom itself where the OGR bindings lack them (before
+    GDAL 3.3). Both answer the same predicates."""
+    if hasattr(geom, "CreatePreparedGeometry"):
+        return geom.CreatePreparedGeometry()
+    return geom
+
+
+def envelopes_intersect(a, b):
+    """True if two (minx, maxx, miny, maxy) envelopes overlap or touch."""
+    return a[0] <= b[1] and b[0] <= a[1] and a[2] <= b[3] and b[2] <= a[3]
+
+
+def envelope_contains(outer, inner):
+    """True if envelope inner lies entirely within envelope outer."""
+    return (outer[0] <= inner[0] and inner[1] <= outer[1]
+            and outer[2] <= inner[2] and inner[3] <= outer[3])
+
+
+class EnvelopeIndex:
+    """Grid hash of (minx, maxx, miny, maxy) envelopes, the order
+    ogr.Geometry.GetEnvelope() returns.
+
+    Args:
+        cell_size (float): Cell size in the units of the envelopes. Items
+            should typically span no more than a few cells.
+
+    """
+
+    def __init__(self, cell_size=1.0):
+        self.cell_size = float(cell_size)
+        self._cells = defaultdict(list)
+        self._envelopes = {}
+
+    def __len__(self):
+        return len(self._envelopes)
+
+    def _cell_range(self, envelope):
+        minx, maxx, miny, maxy = envelope
+        size = self.cell_size
+        return (range(math.floor(minx / size), math.floor(maxx / size) + 1),
+                range(math.floor(miny / size), math.floor(maxy / size) + 1))
+
+    def insert(self, key, envelope):
+        """Adds key with its envelope to the index."""
+        envelope = tuple(envelope)
+        self._envelopes[key] = envelope
+        xs, ys = self._cell_range(envelope)
+        for x in xs:
+            for y in ys:
+                self._cells[(x, y)].append(key)
+
+    def envelope(self, key):
+        return self._envelopes[key]
+
+    def query(self, envelope):
+        """Returns the keys whose envelopes intersect envelope, in insertion
+        order per cell and without duplicates."""
+        envelope = tuple(envelope)
+        seen = set()
+        result = []
+        xs, ys = self._cell_range(envelope)
+        if len(xs) * len(ys) > len(self._cells):
+            # a query much larger than the cells: walk the occupied cells
+            # rather than every cell in range
+            buckets = (keys for (x, y), keys in self._cells.items() if x in xs and y in ys)
+        else:
+            buckets = (self._cells.get((x, y), ()) for x in xs for y in ys)
+        for keys in buckets:
+            for key in keys:
+                if key in seen:
+                    continue
+                seen.add(key)
+                if envelopes_intersect(self._envelopes[key], envelope):
+                    result.append(key)
+        return result
+
+
+class MultiScaleEnvelopeIndex:
+    """EnvelopeIndex levels with cell sizes growing by factor.
+
+    Each item goes to the finest level on which it spans at most two cells
+    per axis, so a few huge envelopes among many small ones neither fill
+    thousands of fine cells nor force a coarse grid on everything.
+
+    Args:
+        cell_size (float): Cell size of the finest level.
+        factor (int): Cell size ratio between consecutive levels.
+
+    """
+
+    def __init__(self, cell_size=1.0, factor=8):
+        self.cell_size = float(cell_size)
+        self.factor = factor
+        self._levels = {}
+
+    def __len__(self):
+        return sum(len(level) for level in self._levels.values())
+
+    def _level(self, envelope):
+        size = max(envelope[1] - envelope[0], envelope[3] - envelope[2])
+        level, cell_size = 0, self.cell_size
+        while size > cell_size:
+            level, cell_size = level + 1, cell_size * self.factor
+        if level not in self._levels:
+            self._levels[level] = EnvelopeIndex(cell_size)
+        return self._levels[level]
+
+    def insert(self, key, envelope):
+        """Adds key with its envelope to the index."""
+        self._level(envelope).insert(key, envelope)
+
+    def query(self, envelope):
+        """Returns the keys whose envelopes intersect envelope, finest
+        level first."""
+        result = []
+        for level in sorted(self._levels):
+            result.extend(self._levels[level].query(envelope))
+        return result
@@ -0,0 +1,310 @@
+"""
+synthetic.py
+
+Generators for synthetic grid files and AOIs used by the benchmark and
+memory suites.
+
+The real WRS2/MGRS grid files are large downloads, so these helpers build
+a small stand-in ``grid_files`` directory with the same layout, field names
+and projections that grid_intersect expects:
+
+    <root>/WRS2_descending/WRS2_descending.shp   (field "PR", WGS84)
+    <root>/MGRS_S2/mgrs_s2_master.shp            (field "utm_zone", WGS84)
+    <root>/MGRS_S2/<GZD>.zip                     (field "name", UTM)
+
+Everything is deterministic for a given seed so timings are comparable
+between runs.
+"""
+
+import math
+import os
+import random
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from osgeo import ogr, osr
+
+ogr.UseExceptions()
+
+# Synthetic grids cover western Canada, which keeps the GZD ids valid for
+# the MGRS regex used in grid_intersect (zones 10-14).
+GRID_EXTENT = (-126.0, 40.0, -96.0, 64.0)
+
+LAT_BANDS = "CDEFGHJKLMNPQRSTUVWX"
+MGRS_COL_LETTERS = "ABCDEFGHJKLMNPQRSTUVWXYZ"
+MGRS_ROW_LETTERS = "ABCDEFGHJKLMNPQRSTUV"
+
+SHAPEFILE_EXTENSIONS = [".shp", ".shx", ".dbf", ".prj"]
+
+# name -> (centre lon, centre lat, x radius, y radius, vertex count)
+AOI_SPECS = {
+    "point": (-112.5, 49.7, 0.0, 0.0, 1),
+    "county": (-112.6, 49.8, 0.4, 0.3, 64),
+    "province": (-114.5, 54.0, 5.0, 5.5, 2000),
+    "continent": (-111.0, 52.0, 14.0, 11.0, 20000),
+    "coastline": (-118.0, 54.0, 7.0, 8.0, 100000),
+}
+
+
+def wgs84():
+    """Return a WGS84 spatial reference in lon/lat axis order."""
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    if hasattr(srs, "SetAxisMappingStrategy"):
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return srs
+
+
+def utm(zone):
+    """Return the northern hemisphere UTM spatial reference for zone."""
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(32600 + int(zone))
+    if hasattr(srs, "SetAxisMappingStrategy"):
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return srs
+
+
+def box(minx, miny, maxx, maxy):
+    """Return a rectangular OGR polygon."""
+    ring = ogr.Geometry(ogr.wkbLinearRing)
+    for x, y in [(minx, miny), (maxx, miny), (maxx, maxy), (minx, maxy), (minx, miny)]:
+        ring.AddPoint_2D(x, y)
+    poly = ogr.Geometry(ogr.wkbPolygon)
+    poly.AddGeometry(ring)
+    return poly
+
+
+def noisy_polygon(cx, cy, rx, ry, vertex_count, seed=0, jitter=0.15):
+    """Return a star-shaped polygon with vertex_count jittered vertices.
+
+    The radius of every vertex is perturbed so the outline looks like a
+    coastline rather than an ellipse, while staying simple (non
+    self-intersecting) because the angles are strictly increasing.
+    """
+    rng = random.Random(seed)
+    ring = ogr.Geometry(ogr.wkbLinearRing)
+    for i in range(vertex_count):
+        angle = 2 * math.pi * i / vertex_count
+        scale = 1.0 + rng.uniform(-jitter, jitter)
+        ring.AddPoint_2D(cx + rx * scale * math.cos(angle),
+                         cy + ry * scale * math.sin(angle))
+    ring.CloseRings()
+    poly = ogr.Geometry(ogr.wkbPolygon)
+    poly.AddGeometry(ring)
+    return poly
+
+
+def aoi_geometry(name, seed=0):
+    """Return the OGR geometry for one of the named AOI_SPECS."""
+    cx, cy, rx, ry, vertex_count = AOI_SPECS[name]
+    if vertex_count == 1:
+        point = ogr.Geometry(ogr.wkbPoint)
+        point.AddPoint_2D(cx, cy)
+        return point
+    return noisy_polygon(cx, cy, rx, ry, vertex_count, seed=seed)
+
+
+def write_layer(path, srs, geom_type, fields, rows):
+    """Write rows of (geometry, {field: value}) to an ESRI Shapefile.
+
+    Args:
+        path (Path): Destination .shp path.
+        srs (osr.SpatialReference): Layer spatial reference.
+        geom_type (int): OGR geometry type constant.
+        fields (list): List of (name, ogr field type) tuples.
+        rows (iterable): Iterable of (ogr.Geometry, dict) tuples.
+
+    """
+    driver = ogr.GetDriverByName("ESRI Shapefile")
+    if Path(path).exists():
+        driver.DeleteDataSource(str(path))
+
+    data_source = driver.CreateDataSource(str(path))
+    layer = data_source.CreateLayer(Path(path).stem, srs, geom_type=geom_type)
+    for name, field_type in fields:
+        layer.CreateField(ogr.FieldDefn(name, field_type))
+
+    feature_defn = layer.GetLayerDefn()
+    for geom, attributes in rows:
+        feature = ogr.Feature(feature_defn)
+        for name, value in attributes.items():
+            feature.SetField(name, value)
+        feature.SetGeometry(geom)
+        layer.CreateFeature(feature)
+        feature = None
+
+    data_source = None
+
+
+def write_aoi_shapefile(path, geometries):
+    """Write a list of WGS84 OGR geometries as an AOI shapefile."""
+    geom_type = geometries[0].GetGeometryType()
+    rows = [(geom, {"id": idx}) for idx, geom in enumerate(geometries)]
+    write_layer(path, wgs84(), geom_type, [("id", ogr.OFTInteger)], rows)
+
+
+def gzd_for(lon, lat):
+    """Return the MGRS grid zone designator containing lon, lat."""
+    zone = int((lon + 180) // 6) + 1
+    band = LAT_BANDS[int((lat + 80) // 8)]
+    return f"{zone:02d}{band}"
+
+
+def _gzd_cells(extent):
+    minx, miny, maxx, maxy = extent
+    lon = minx - (minx + 180) % 6
+    while lon < maxx:
+        lat = miny - (miny + 80) % 8
+        while lat < maxy:
+            yield gzd_for(lon + 3, lat + 4), (lon, lat, lon + 6, lat + 8)
+            lat += 8
+        lon += 6
+
+
+def _write_wrs_grid(grid_dir, extent, cell_size):
+    minx, miny, maxx, maxy = extent
+    rows = []
+    path_count = int(math.ceil((maxx - minx) / cell_size))
+    row_count = int(math.ceil((maxy - miny) / cell_size))
+    for path in range(path_count):
+        for row in range(row_count):
+            x = minx + path * cell_size
+            y = maxy - (row + 1) * cell_size
+            # WRS2 scenes overlap their neighbours, mimic that with a margin
+            geom = box(x - 0.1, y - 0.1, x + cell_size + 0.1, y + cell_size + 0.1)
+            rows.append((geom, {"PR": f"{path + 1:03d}{row + 1:03d}"}))
+
+    out_dir = Path(grid_dir, "WRS2_descending")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_layer(Path(out_dir, "WRS2_descending.shp"), wgs84(), ogr.wkbPolygon,
+                [("PR", ogr.OFTString)], rows)
+
+
+def _write_mgrs_100km_zip(mgrs_dir, gzd, bounds, scratch_dir):
+    zone = int(gzd[:2])
+    to_utm = osr.CoordinateTransformation(wgs84(), utm(zone))
+
+    outline = box(*bounds)
+    outline.Transform(to_utm)
+    minx, maxx, miny, maxy = outline.GetEnvelope()
+
+    rows = []
+    x0 = math.floor(minx / 100000) * 100000
+    y0 = math.floor(miny / 100000) * 100000
+    for col, x in enumerate(range(int(x0), int(maxx), 100000)):
+        for row, y in enumerate(range(int(y0), int(maxy), 100000)):
+            square = box(x, y, x + 109800, y + 109800)
+            name = (MGRS_COL_LETTERS[col % len(MGRS_COL_LETTERS)]
+                    + MGRS_ROW_LETTERS[row % len(MGRS_ROW_LETTERS)])
+            rows.append((square, {"name": name}))
+
+    shp_path = Path(scratch_dir, f"{gzd}.shp")
+    write_layer(shp_path, utm(zone), ogr.wkbPolygon, [("name", ogr.OFTString)], rows)
+
+    with zipfile.ZipFile(Path(mgrs_dir, f"{gzd}.zip"), "w") as zf:
+        for ext in SHAPEFILE_EXTENSIONS:
+            member = shp_path.with_suffix(ext)
+            if member.exists():
+                zf.write(member, f"{gzd}/{member.name}")
+                os.remove(member)
+
+
+def build_grid_dir(grid_dir, extent=GRID_EXTENT, wrs_cell_size=1.5):
+    """Create a synthetic grid_files directory at grid_dir.
+
+    Args:
+        grid_dir (Path): Directory to populate, created if missing.
+        extent (tuple): (minx, miny, maxx, maxy) in degrees to cover.
+        wrs_cell_size (float): Size in degrees of a synthetic WRS2 scene.
+
+    Returns:
+        (Path): The populated grid directory.
+
+    """
+    grid_dir = Path(grid_dir)
+    mgrs_dir = Path(grid_dir, "MGRS_S2")
+    scratch_dir = Path(grid_dir, "_scratch")
+    mgrs_dir.mkdir(parents=True, exist_ok=True)
+    scratch_dir.mkdir(parents=True, exist_ok=True)
+
+    _write_wrs_grid(grid_dir, extent, wrs_cell_size)
+
+    master_rows = []
+    for gzd, bounds in _gzd_cells(extent):
+        master_rows.append((box(*bounds), {"utm_zone": gzd}))
+        _write_mgrs_100km_zip(mgrs_dir, gzd, bounds, scratch_dir)
+
+    write_layer(Path(mgrs_dir, "mgrs_s2_master.shp"), wgs84(), ogr.wkbPolygon,
+                [("utm_zone", ogr.OFTString)], master_rows)
+
+    scratch_dir.rmdir()
+    return grid_dir
+
+
+def write_parcel_layer(path, count, seed=0, cell_size=0.01, overlap=0.3):
+    """Write a shapefile of count overlapping square parcels.
+
+    Parcels sit on a jittered lattice so neighbours overlap and form
+    connected clusters of varying size, similar to cadastral layers.
+    """
+    rng = random.Random(seed)
+    side = int(math.ceil(math.sqrt(count)))
+    rows = []
+    for idx in range(count):
+        col, row = idx % side, idx // side
+        # leave gaps every few cells so the layer splits into many clusters
+        gap = cell_size * (col // 7 + row // 7) * 0.5
+        x = -113.0 + col * cell_size + gap + rng.uniform(0, cell_size * 0.1)
+        y = 50.0 + row * cell_size + gap + rng.uniform(0, cell_size * 0.1)
+        size = cell_size * (1.0 + overlap)
+        rows.append((box(x, y, x + size, y + size), {"id": idx}))
+
+    write_layer(path, wgs84(), ogr.wkbPolygon, [("id", ogr.OFTInteger)], rows)
+    return Path(path)
+
+
+def synthetic_products(count, seed=0, platform_name="Sentinel-2"):
+    """Yield (key, product) pairs shaped like a search result product_dict.
+
+    The products carry the attributes Converter.create_coverage_poly reads
+    for Sentinel-1 and Sentinel-2 results, with footprints scattered over
+    the synthetic grid extent.
+    """
+    rng = random.Random(seed)
+    minx, miny, maxx, maxy = GRID_EXTENT
+    start = datetime(2019, 6, 1)
+
+    for idx in range(count):
+        x = rng.uniform(minx, maxx - 1.5)
+        y = rng.uniform(miny, maxy - 1.0)
+        footprint = box(x, y, x + 1.4, y + 0.9).ExportToWkt()
+        uuid = f"{idx:08d}-0000-0000-0000-{seed:012d}"
+        acquired = start + timedelta(minutes=idx)
+
+        if platform_name == "Sentinel-1":
+            product = {
+                "platform_name": platform_name,
+                "footprint": footprint,
+                "detailed_metadata": {
+                    "platformname": platform_name,
+                    "producttype": "GRD",
+                    "format": "SAFE",
+                    "polarisationmode": "VV VH",
+                    "sensoroperationalmode": "IW",
+                    "beginposition": acquired,
+                    "uuid": uuid,
+                    "title": f"S1A_IW_GRDH_1SDV_{acquired:%Y%m%dT%H%M%S}_{idx:06d}",
+                },
+            }
+        else:
+            product = {
+                "platform_name": platform_name,
+                "footprint": footprint,
+                "cloud_percent": str(rng.uniform(0, 100)),
+                "acquisition_start": acquired,
+                "uuid": uuid,
+                "sat_name": "Sentinel-2A",
+                "vendor_name": f"S2A_MSIL1C_{acquired:%Y%m%dT%H%M%S}_N0207_R070_T12UUA_{idx:06d}",
+            }
+        yield uuid, product
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from ..aio import AsyncTileQueries
+
+
+class TestAsyncTileQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.queries = AsyncTileQueries(max_concurrency=2)
+        self.addCleanup(self.queries.close)
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def slow_query(self, wkt, delay=0.05):
+        with self.lock:
+            self.calls.append(wkt)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(delay)
+        with self.lock:
+            self.running -= 1
+        return [wkt]
+
+    def test_identical_queries_are_merged(self):
+        async def run():
+            return await asyncio.gather(
+                *[self.queries.run(self.slow_query, 'POINT (1 1)') for _ in range(5)])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, [['POINT (1 1)']] * 5)
+        self.assertEqual(self.calls, ['POINT (1 1)'])
+        # every caller gets its own list
+        self.assertIsNot(results[0], results[1])
+
+    def test_concurrency_limit(self):
+        async def run():
+            return await asyncio.gather(
+                *[self.queries.run(self.slow_query, str(i)) for i in range(6)])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, [[str(i)] for i in range(6)])
+        self.assertLessEqual(self.peak, 2)
+
+    def test_cancelled_query_never_runs(self):
+        async def run():
+            blockers = [asyncio.ensure_future(self.queries.run(self.slow_query, str(i), 0.1))
+                        for i in range(2)]
+            waiting = asyncio.ensure_future(self.queries.run(self.slow_query, 'cancelled'))
+            await asyncio.sleep(0.02)
+            waiting.cancel()
+            await asyncio.gather(*blockers)
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+
+        asyncio.run(run())
+
+        self.assertNotIn('cancelled', self.calls)
+
+    def test_merged_query_survives_one_cancellation(self):
+        async def run():
+            first = asyncio.ensure_future(self.queries.run(self.slow_query, 'a'))
+            second = asyncio.ensure_future(self.queries.run(self.slow_query, 'a'))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), ['a'])
+
+    def test_errors_reach_every_caller(self):
+        def failing(wkt):
+            raise ValueError(wkt)
+
+        async def run():
+            return await asyncio.gather(self.queries.run(failing, 'x'),
+                                        self.queries.run(failing, 'x'),
+                                        return_exceptions=True)
+
+        errors = asyncio.run(run())
+        self.assertTrue(all(isinstance(e, ValueError) for e in errors))
+
+    def test_failed_submit_frees_its_slot(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        class FlakyExecutor(ThreadPoolExecutor):
+            failures = 2
+
+            def submit(self, *args, **kwargs):
+                if self.failures:
+                    self.failures -= 1
+                    raise RuntimeError('cannot schedule new futures after shutdown')
+                return super().submit(*args, **kwargs)
+
+        executor = FlakyExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        queries = AsyncTileQueries(max_concurrency=2, executor=executor)
+
+        async def run():
+            for i in range(2):
+                with self.assertRaises(RuntimeError):
+                    await queries.run(self.slow_query, str(i))
+            return await asyncio.wait_for(queries.run(self.slow_query, 'ok'), 1)
+
+        self.assertEqual(asyncio.run(run()), ['ok'])
+
+    def test_max_concurrency(self):
+        with self.assertRaises(ValueError):
+            AsyncTileQueries(max_concurrency=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from .. import arrow_io
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+
+class TestGeoMetadata(unittest.TestCase):
+
+    def test_geo_metadata(self):
+        metadata = arrow_io.geo_metadata()
+        self.assertEqual(metadata['primary_column'], 'geometry')
+        self.assertEqual(metadata['columns']['geometry']['encoding'], 'WKB')
+
+    def test_is_arrow_source(self):
+        self.assertTrue(arrow_io.is_arrow_source('aoi.parquet'))
+        self.assertTrue(arrow_io.is_arrow_source(Path('AOI.GeoParquet')))
+        self.assertFalse(arrow_io.is_arrow_source('aoi.shp'))
+        self.assertFalse(arrow_io.is_arrow_source(object()))
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestWkbBatches(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+        metadata = {b'geo': json.dumps(arrow_io.geo_metadata(column='geom')).encode()}
+        self.table = pyarrow.table(
+            {'name': [str(i) for i in range(10)],
+             'geom': [bytes([i]) for i in range(10)]}).replace_schema_metadata(metadata)
+
+    def test_table_batches(self):
+        batches = list(arrow_io.iter_wkb_batches(self.table, batch_size=4))
+
+        self.assertEqual([len(b) for b in batches], [4, 4, 2])
+        self.assertEqual(batches[2].to_pylist(), [bytes([8]), bytes([9])])
+
+    def test_parquet_reads_geometry_column(self):
+        path = Path(self.tmp_dir.name, 'aoi.parquet')
+        pq.write_table(self.table, path)
+
+        batches = list(arrow_io.iter_wkb_batches(path, batch_size=4))
+
+        self.assertEqual(sum(len(b) for b in batches), 10)
+        self.assertEqual(batches[0][1].as_py(), bytes([1]))
+
+    def test_parquet_opened_on_call(self):
+        path = Path(self.tmp_dir.name, 'aoi.parquet')
+        with self.assertRaises(OSError):
+            arrow_io.iter_wkb_batches(path)
+
+        pq.write_table(self.table, path)
+        with self.assertRaises(ValueError):
+            arrow_io.iter_wkb_batches(path, geometry_column='missing')
+
+    def test_table_without_geometry_column(self):
+        table = pyarrow.table({'name': ['a'], 'wkb': [b'\x01']})
+        reader = pyarrow.RecordBatchReader.from_batches(table.schema, table.to_batches())
+
+        for source in (table, reader):
+            with self.assertRaises(ValueError):
+                list(arrow_io.iter_wkb_batches(source))
+
+    def test_reader_batches(self):
+        reader = pyarrow.RecordBatchReader.from_batches(
+            self.table.schema, self.table.to_batches(max_chunksize=5))
+
+        batches = list(arrow_io.iter_wkb_batches(reader))
+
+        self.assertEqual([len(b) for b in batches], [5, 5])
+
+    def test_binary_array(self):
+        values = [b'ab', None, b'', b'xyz']
+        array = arrow_io._binary_array(values)
+
+        array.validate(full=True)
+        self.assertEqual(array.type, pyarrow.binary())
+        self.assertEqual(array.to_pylist(), values)
+        self.assertEqual(arrow_io._binary_array([]).to_pylist(), [])
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestTileTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from . import synthetic
+        from ..grid_store import GridStore
+
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.store = GridStore(synthetic.build_grid_dir(Path(cls.tmp_dir.name, 'grid_files')))
+        cls.aoi_wkt = synthetic.aoi_geometry('county').ExportToWkt()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_overlap_table(self):
+        from .._gdal import ogr
+
+        geom = ogr.CreateGeometryFromWkt(self.aoi_wkt)
+        tiles = self.store.mgrs_tiles(geom) + self.store.wrs_tiles(geom)
+        table = arrow_io.overlap_table(tiles, self.aoi_wkt, self.store)
+
+        self.assertEqual(table.column('tile_id').to_pylist(), tiles)
+        self.assertEqual(set(table.column('tile_type').to_pylist()), {'mgrs', 'wrs'})
+        self.assertTrue(all(0 < f <= 1 for f in table.column('overlap_fraction').to_pylist()))
+        self.assertEqual(table.schema.field('geometry').metadata[b'ARROW:extension:name'],
+                         b'geoarrow.wkb')
+        self.assertEqual(table.column('geometry').to_pylist(),
+                         [self.store.footprint_wkb(tile) for tile in tiles])
+
+        # overlaps computed by the query are used as they are
+        table = arrow_io.overlap_table(tiles, self.aoi_wkt, self.store,
+                                       overlaps={tiles[0]: (1.0, 4.0)})
+        self.assertEqual(table.column('overlap_area')[0].as_py(), 1.0)
+        self.assertEqual(table.column('overlap_fraction')[0].as_py(), 0.25)
+
+    def test_write_geoparquet(self):
+        from .._gdal import ogr
+
+        tiles = self.store.wrs_tiles(ogr.CreateGeometryFromWkt(self.aoi_wkt))
+        path = Path(self.tmp_dir.name, 'tiles.parquet')
+        arrow_io.write_geoparquet(arrow_io.tile_table(tiles, self.store), path)
+
+        table = pq.read_table(path)
+        self.assertIn(b'geo', table.schema.metadata)
+        geom = ogr.CreateGeometryFromWkb(table.column('geometry')[0].as_py())
+        self.assertEqual(geom.GetGeometryName(), 'POLYGON')
+
+    def test_parquet_aoi(self):
+        from .._gdal import ogr
+        from ..grid_intersect import get_geom_from_shapefile
+
+        aoi = ogr.CreateGeometryFromWkt(self.aoi_wkt)
+        table = pyarrow.table({'geometry': [bytes(aoi.ExportToWkb())]})
+        path = Path(self.tmp_dir.name, 'aoi.parquet')
+        pq.write_table(table, path)
+
+        self.assertTrue(get_geom_from_shapefile(path, prune=False).Intersects(aoi))
+
+        tagged = pyarrow.concat_tables(arrow_io.tag_aoi_batches(path, self.store))
+        self.assertEqual(tagged.column('mgrs')[0].as_py(), self.store.mgrs_tiles(aoi))
+        self.assertEqual(tagged.column('wrs')[0].as_py(), self.store.wrs_tiles(aoi))
+
+
+if __name__ == '__main__':
+    unittest.main()
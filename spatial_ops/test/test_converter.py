@@ -3,6 +3,7 @@ from pathlib import Path
 import datetime
 import os
 import json
+import tempfile
 import time
 
 from .. import converter as conv
@@ -34,5 +35,136 @@ class TestConverter(unittest.TestCase):
         print(wkt_string)
         self.assertEqual(wkt_string, self.test_polygon_wkt_string)
 
+    def test_valid_data_footprint(self):
+        converter = conv.Converter()
+        gdal, osr = conv.gdal, conv.osr
+
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(32612)
+        path = '/vsimem/footprint_test.tif'
+        ds = gdal.GetDriverByName('GTiff').Create(path, 200, 200, 1, gdal.GDT_UInt16)
+        ds.SetGeoTransform([300000, 10, 0, 5600000, 0, -10])
+        ds.SetProjection(srs.ExportToWkt())
+        # left half valid, right half nodata like a swath edge
+        ds.GetRasterBand(1).WriteRaster(0, 0, 100, 200, b'\x01\x00' * 100 * 200)
+        ds = None
+
+        try:
+            wkt = converter.valid_data_footprint(path, max_size=50)
+        finally:
+            gdal.Unlink(path)
+
+        footprint = conv.ogr.CreateGeometryFromWkt(wkt)
+        minx, maxx, miny, maxy = footprint.GetEnvelope()
+        # 1km of valid data at 49.5N is ~0.014 degrees of longitude
+        self.assertAlmostEqual(maxx - minx, 0.0139, places=2)
+        self.assertAlmostEqual(maxy - miny, 0.018, places=2)
+
+    def test_create_coverage_poly_gpkg_from_generator(self):
+        from . import synthetic
+
+        converter = conv.Converter()
+        with tempfile.TemporaryDirectory() as out_dir:
+            path = converter.create_coverage_poly(synthetic.synthetic_products(25),
+                                                  '20190601', out_dir,
+                                                  output_format='GPKG', batch_size=10)
+            ds = conv.ogr.Open(path)
+            layer = ds.GetLayer(0)
+            self.assertEqual(layer.GetFeatureCount(), 25)
+            self.assertTrue(layer.TestCapability(conv.ogr.OLCFastSpatialFilter))
+            ds = None
+
+    def test_create_coverage_poly_tags_tiles(self):
+        from . import synthetic
+        from ..grid_store import GridStore
+
+        converter = conv.Converter()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = GridStore(synthetic.build_grid_dir(Path(tmp_dir, 'grid_files')))
+            products = list(synthetic.synthetic_products(5, platform_name='Sentinel-1'))
+            path = converter.create_coverage_poly(products, '20190601', tmp_dir,
+                                                  tag_tiles=True, grid_store=store,
+                                                  batch_size=2)
+            ds = conv.ogr.Open(path)
+            for feature in ds.GetLayer(0):
+                geom = feature.GetGeometryRef()
+                self.assertEqual(feature.GetField('wrs').split(','),
+                                 sorted(store.wrs_tiles(geom)))
+                self.assertEqual(feature.GetField('tileid').split(','),
+                                 sorted(store.mgrs_tiles(geom)))
+            ds = None
+
+
+class TestConverterHelpers(unittest.TestCase):
+
+    def test_overview_levels(self):
+        self.assertEqual(conv.overview_levels(10980, 10980), [2, 4, 8, 16, 32])
+        self.assertEqual(conv.overview_levels(1830, 1830), [2, 4])
+        self.assertEqual(conv.overview_levels(512, 300), [])
+
+    def test_jp2_output_path(self):
+        converter = conv.Converter()
+        l2a = 'T12UUA_20190601T183921_B02_10m.jp2'
+        l1c = 'T12UUA_20190601T183921_B8A.jp2'
+        self.assertEqual(converter.jp2_output_path(l2a, 'S2A_12UUA', 10, '/out'),
+                         str(Path('/out', 'S2A_12UUA_B02_10m.tif')))
+        self.assertEqual(converter.jp2_output_path(l1c, 'S2A_12UUA', 0, '/out'),
+                         str(Path('/out', 'S2A_12UUA_B8A.tif')))
+
+    def test_jp2_output_path_vrt(self):
+        converter = conv.Converter()
+        l1c = 'T12UUA_20190601T183921_B8A.jp2'
+        self.assertEqual(converter.jp2_output_path(l1c, 'S2A_12UUA', 0, '/out', '.vrt'),
+                         str(Path('/out', 'S2A_12UUA_B8A.vrt')))
+
+    def test_band_file_map(self):
+        files = ['R60m/T12UUA_B02_60m.jp2', 'R10m/T12UUA_B02_10m.jp2',
+                 'R20m/T12UUA_B02_20m.jp2', 'R20m/T12UUA_B8A_20m.jp2']
+        self.assertEqual(conv.band_file_map(files),
+                         {'B02': 'R10m/T12UUA_B02_10m.jp2', 'B8A': 'R20m/T12UUA_B8A_20m.jp2'})
+
+        with self.assertRaises(ValueError):
+            conv.band_file_map(['a/T12UUA_B02.jp2', 'b/T12UUA_B02.jp2'])
+        with self.assertRaises(ValueError):
+            conv.band_file_map(['T12UUA_B02_10m.jp2', 'T12UUA_TCI_10m.jp2'])
+
+    def test_jp2_output_path_aoi(self):
+        converter = conv.Converter()
+        l2a = 'T12UUA_20190601T183921_B02_10m.jp2'
+        aoi = 'POLYGON ((-113 50,-112 50,-112 51,-113 50))'
+        other = 'POLYGON ((-114 50,-112 50,-112 51,-114 50))'
+
+        full = converter.jp2_output_path(l2a, 'S2A_12UUA', 10, '/out')
+        window = converter.jp2_output_path(l2a, 'S2A_12UUA', 10, '/out', aoi_wkt=aoi)
+        cutline = converter.jp2_output_path(l2a, 'S2A_12UUA', 10, '/out', aoi_wkt=aoi,
+                                            crop_to_cutline=True)
+
+        self.assertEqual(window, str(Path('/out', 'S2A_12UUA_B02_10m_aoi{}.tif'.format(
+            conv.aoi_digest(aoi)))))
+        self.assertEqual(len({full, window, cutline,
+                              converter.jp2_output_path(l2a, 'S2A_12UUA', 10, '/out',
+                                                        aoi_wkt=other)}), 4)
+
+    def test_footprint_read_size(self):
+        self.assertEqual(conv.footprint_read_size(10980, 10980), (998, 998))
+        self.assertEqual(conv.footprint_read_size(1830, 600, 1024), (915, 300))
+        self.assertEqual(conv.footprint_read_size(500, 400), (500, 400))
+
+    def test_create_coverage_poly_rejects_unknown_format(self):
+        converter = conv.Converter()
+        with self.assertRaises(ValueError):
+            converter.create_coverage_poly({}, '20190601', '/tmp', output_format='KML')
+
+    def test_band_name(self):
+        self.assertEqual(conv.band_name('S2A_12UUA_B8A_20m.tif'), 'B8A')
+        self.assertEqual(conv.band_name('T12UUA_20190601T183921_B02.jp2'), 'B02')
+        self.assertIsNone(conv.band_name('coverage.tif'))
+
+    def test_convert_jp2_to_tif_rejects_unknown_format(self):
+        converter = conv.Converter()
+        with self.assertRaises(ValueError):
+            converter.convert_jp2_to_tif('B02.jp2', 'S2A', 0, '/tmp', output_format='PNG')
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
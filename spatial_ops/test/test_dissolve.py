@@ -0,0 +1,74 @@
+import itertools
+import tempfile
+import unittest
+from pathlib import Path
+
+from .. import dissolve
+
+
+def box_envelope(minx, miny, maxx, maxy):
+    return (minx, maxx, miny, maxy)
+
+
+class TestConnectedComponents(unittest.TestCase):
+
+    def test_union_find_groups(self):
+        sets = dissolve.UnionFind(5)
+        sets.union(3, 1)
+        sets.union(4, 3)
+        self.assertEqual(sets.groups(), [[0], [1, 3, 4], [2]])
+
+    def test_chained_envelopes_form_one_component(self):
+        envelopes = [box_envelope(x, 0, x + 1.5, 1) for x in range(5)]
+        envelopes.append(box_envelope(20, 20, 21, 21))
+        components = dissolve.connected_components(envelopes, lambda i, j: True)
+        self.assertEqual(components, [[0, 1, 2, 3, 4], [5]])
+
+    def test_exact_test_splits_components(self):
+        envelopes = [box_envelope(0, 0, 2, 2), box_envelope(1, 1, 3, 3)]
+        components = dissolve.connected_components(envelopes, lambda i, j: False)
+        self.assertEqual(components, [[0], [1]])
+
+    def test_streamed_mixed_sizes(self):
+        # many small boxes, then one box covering them all
+        envelopes = (box_envelope(x * 10, 0, x * 10 + 1, 1) for x in range(50))
+        envelopes = itertools.chain(envelopes, [box_envelope(-1, -1, 1000, 2)])
+        components = dissolve.connected_components(envelopes, lambda i, j: True)
+        self.assertEqual(components, [list(range(51))])
+
+
+class TestDissolve(unittest.TestCase):
+    """The component dissolve must match one UnionCascaded of the layer."""
+
+    def test_matches_single_union(self):
+        from . import synthetic
+        from ..converter import Converter
+        from .._gdal import ogr
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            src = str(synthetic.write_parcel_layer(Path(tmp_dir, 'parcels.shp'), 500))
+
+            ds = ogr.Open(src)
+            multi = ogr.Geometry(ogr.wkbMultiPolygon)
+            for feat in ds.GetLayer():
+                multi.AddGeometry(feat.GetGeometryRef())
+            expected = multi.UnionCascaded()
+            ds = None
+
+            for workers in (1, 2):
+                dst = str(Path(tmp_dir, f'dissolved_{workers}.shp'))
+                Converter().dissolve(src, dst, overwrite=True, workers=workers)
+
+                ds = ogr.Open(dst)
+                layer = ds.GetLayer()
+                self.assertEqual(layer.GetFeatureCount(), expected.GetGeometryCount())
+                result = ogr.Geometry(ogr.wkbMultiPolygon)
+                for feat in layer:
+                    result.AddGeometry(feat.GetGeometryRef())
+                self.assertAlmostEqual(result.GetArea(), expected.GetArea())
+                self.assertTrue(result.SymDifference(expected).GetArea() < 1e-12)
+                ds = None
+
+
+if __name__ == '__main__':
+    unittest.main()
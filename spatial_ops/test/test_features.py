@@ -0,0 +1,70 @@
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from .. import features
+from . import synthetic
+
+
+class TestFeatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.path = str(Path(cls.tmp_dir.name, 'parcels.shp'))
+        synthetic.write_parcel_layer(cls.path, 25)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_iter_features_yields_every_feature(self):
+        rows = list(features.iter_features(self.path))
+        self.assertEqual(len(rows), 25)
+        self.assertEqual([r['properties']['id'] for r in rows], list(range(25)))
+        self.assertEqual(rows[0]['geometry']['type'], 'Polygon')
+
+    def test_geometry_formats(self):
+        wkt = next(features.iter_features(self.path, 'wkt'))['geometry']
+        wkb = next(features.iter_features(self.path, 'wkb'))['geometry']
+        self.assertTrue(wkt.startswith('POLYGON'))
+        self.assertIsInstance(wkb, bytes)
+        with self.assertRaises(ValueError):
+            next(features.iter_features(self.path, 'kml'))
+
+    def test_write_geojson_seq(self):
+        out = io.StringIO()
+        count = features.write_geojson_seq(features.iter_features(self.path), out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(count, 25)
+        self.assertEqual(len(lines), 25)
+        self.assertEqual(json.loads(lines[3])['properties']['id'], 3)
+
+        out = io.StringIO()
+        features.write_geojson_seq(features.iter_features(self.path), out, record_separator=True)
+        # splitlines() would also break on the record separator itself
+        lines = out.getvalue().split('\n')
+        self.assertEqual(lines.pop(), '')
+        self.assertEqual(len(lines), 25)
+        self.assertTrue(all(line.startswith('\x1e{') for line in lines))
+
+    def test_write_wkb_as_hex(self):
+        out = io.StringIO()
+        features.write_geojson_seq(features.iter_features(self.path, 'wkb'), out)
+        geometry = json.loads(out.getvalue().split('\n')[0])['geometry']
+        self.assertEqual(bytes.fromhex(geometry),
+                         next(features.iter_features(self.path, 'wkb'))['geometry'])
+
+    def test_unopenable_source(self):
+        with self.assertRaises(ValueError):
+            next(features.iter_features(Path(self.tmp_dir.name, 'missing.shp')))
+
+    def test_unknown_layer(self):
+        with self.assertRaises(ValueError):
+            next(features.iter_features(self.path, layer='missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -250,5 +250,126 @@ class TestGridIntersect(unittest.TestCase):
                     os.remove(Path(root, f))
 
 
+class TestUnzippedMgrs100kmShp(unittest.TestCase):
+
+    def test_private_scratch_dir(self):
+        import tempfile
+        import zipfile
+        from .. import instrumentation
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_path = Path(tmp_dir, '12U.zip')
+            with zipfile.ZipFile(zip_path, 'w') as zf:
+                for ext in ('shp', 'shx', 'dbf'):
+                    zf.writestr('MGRS_100kmSQ_ID_12U/MGRS_100kmSQ_ID_12U.' + ext, b'')
+
+            stats = instrumentation.QueryStats('test')
+            with grid_intersect.unzipped_mgrs_100km_shp(zip_path, stats) as shp_path:
+                self.assertEqual(shp_path.name, 'MGRS_100kmSQ_ID_12U.shp')
+                self.assertTrue(shp_path.exists())
+                self.assertNotEqual(shp_path.parent, Path(grid_intersect.GRID_DIR))
+
+        self.assertFalse(shp_path.parent.exists())
+        self.assertIn('unzip', stats.timings)
+
+
+class TestTagAoiLines(unittest.TestCase):
+
+    def setUp(self):
+        from .._gdal import ogr
+        from ..grid_store import default_store
+
+        self.store = default_store()
+        self.aoi_wkt = "POLYGON ((-116.0 52.3,-114.2 52.3,-114.2 53.1,-116.0 53.1,-116.0 52.3))"
+        geometry = json.loads(ogr.CreateGeometryFromWkt(self.aoi_wkt).ExportToJson())
+        self.aoi_json = json.dumps({'type': 'Feature', 'id': 'field-7', 'properties': {},
+                                    'geometry': geometry})
+
+    def test_tag_aoi_lines(self):
+        lines = [self.aoi_wkt + '\n', '\n', self.aoi_json + '\n', 'not an aoi\n']
+
+        records = sorted(grid_intersect.tag_aoi_lines(lines, self.store, workers=2),
+                         key=lambda r: r['line'])
+
+        self.assertEqual([r['line'] for r in records], [1, 3, 4])
+        self.assertEqual(sorted(records[0]['wrs']),
+                         sorted(grid_intersect.find_wrs_intersection(self.aoi_wkt)))
+        self.assertEqual(records[1]['id'], 'field-7')
+        self.assertEqual(records[1]['mgrs'], records[0]['mgrs'])
+        self.assertIn('error', records[2])
+
+    def test_main(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            in_path, out_path = Path(tmp_dir, 'aois.txt'), Path(tmp_dir, 'tiles.jsonl')
+            in_path.write_text(self.aoi_wkt + '\n')
+
+            status = grid_intersect.main([str(in_path), '-o', str(out_path), '--grid', 'wrs'])
+
+            record = json.loads(out_path.read_text())
+
+        self.assertEqual(status, 0)
+        self.assertEqual(set(record), {'line', 'wrs'})
+
+    def test_main_both_grids(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            in_path, out_path = Path(tmp_dir, 'aois.txt'), Path(tmp_dir, 'tiles.jsonl')
+            in_path.write_text(self.aoi_wkt + '\n')
+
+            status = grid_intersect.main([str(in_path), '-o', str(out_path)])
+
+            record = json.loads(out_path.read_text())
+
+        self.assertEqual(status, 0)
+        self.assertEqual(set(record), {'line', 'mgrs', 'wrs'})
+        self.assertTrue(record['mgrs'] and record['wrs'])
+
+
+class TestAoiGeometry(unittest.TestCase):
+
+    def test_empty_parquet_aoi(self):
+        import tempfile
+
+        try:
+            import pyarrow
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir, 'empty.parquet'))
+            pq.write_table(pyarrow.table({'geometry': pyarrow.array([None], pyarrow.binary())}),
+                           path)
+
+            with self.assertRaises(ValueError):
+                grid_intersect._aoi_geometry(path)
+
+            record = grid_intersect._tag_aoi_line(1, path, None, True, True)
+
+        self.assertEqual(set(record), {'line', 'error'})
+
+    def test_point_geojson_aoi(self):
+        import tempfile
+
+        try:
+            from .._gdal import ogr
+            ogr.Geometry
+        except ImportError:
+            self.skipTest('GDAL is not installed')
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir, 'points.geojson'))
+            Path(path).write_text(json.dumps({
+                'type': 'FeatureCollection',
+                'features': [{'type': 'Feature', 'properties': {},
+                              'geometry': {'type': 'Point', 'coordinates': [-115.0, 52.5]}}]}))
+
+            with self.assertRaises(ValueError):
+                grid_intersect._aoi_geometry(path)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,43 @@
+import unittest
+
+from .. import grid_intersect
+from ..grid_store import GridStore
+from .._gdal import ogr
+
+
+class TestGridStore(unittest.TestCase):
+    """GridStore has to agree with the scanning grid_intersect functions."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.store = GridStore()
+
+    def setUp(self):
+        self.single_wrs_pathrow = "044023"
+        self.single_mgrs_tileid = "11UNU"
+        self.aoi_wkt = "POLYGON ((-116.0 52.3,-114.2 52.3,-114.2 53.1,-116.0 53.1,-116.0 52.3))"
+
+    def test_wrs_tiles_match_find_wrs_intersection(self):
+        geom = ogr.CreateGeometryFromWkt(self.aoi_wkt)
+        self.assertEqual(sorted(self.store.wrs_tiles(geom)),
+                         sorted(grid_intersect.find_wrs_intersection(self.aoi_wkt)))
+
+    def test_mgrs_tiles_match_find_mgrs_intersection(self):
+        geom = ogr.CreateGeometryFromWkt(self.aoi_wkt)
+        self.assertEqual(sorted(self.store.mgrs_tiles(geom)),
+                         sorted(grid_intersect.find_mgrs_intersection(self.aoi_wkt)))
+
+    def test_footprint(self):
+        self.assertIsNotNone(self.store.footprint(self.single_wrs_pathrow))
+        self.assertIsNotNone(self.store.footprint(self.single_mgrs_tileid))
+        self.assertIsNone(self.store.footprint("not a tile"))
+
+    def test_join(self):
+        geom = ogr.CreateGeometryFromWkt(self.aoi_wkt)
+        tiles = self.store.join([geom, None])
+        self.assertIn(self.single_mgrs_tileid, tiles[0]['mgrs'])
+        self.assertEqual(tiles[1], {'mgrs': [], 'wrs': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import logging
+
+from .. import instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_query_is_noop_when_disabled(self):
+        stats = instrumentation.query("find_wrs_intersection")
+        self.assertFalse(stats.enabled)
+        with stats:
+            with stats.stage("open"):
+                pass
+            stats.count("hits", 3)
+            self.assertEqual(stats.clock(), 0.0)
+
+    def test_instrument_records_stages_and_counters(self):
+        with instrumentation.instrument() as recorded:
+            with instrumentation.query("find_wrs_intersection") as stats:
+                with stats.stage("open"):
+                    pass
+                stats.add_time("test", 0.5)
+                stats.count("candidates", 10)
+                stats.count("hits", 2)
+
+        self.assertEqual(len(recorded), 1)
+        result = recorded[0].as_dict()
+        self.assertEqual(result["query"], "find_wrs_intersection")
+        self.assertIn("open", result["timings"])
+        self.assertEqual(result["timings"]["test"], 0.5)
+        self.assertEqual(result["counters"], {"candidates": 10, "hits": 2})
+
+    def test_nested_queries_fold_into_outer_query(self):
+        seen = []
+        with instrumentation.instrument(seen.append):
+            with instrumentation.query("find_mgrs_intersection"):
+                for _ in range(3):
+                    with instrumentation.query("find_mgrs_intersection_100km") as stats:
+                        stats.count("hits", 2)
+
+        self.assertEqual([s.query for s in seen], ["find_mgrs_intersection"])
+        self.assertEqual(seen[0].counters["hits"], 6)
+
+    def test_debug_logging_enables_instrumentation(self):
+        logger = logging.getLogger("spatial_ops.instrumentation")
+        with self.assertLogs(logger, level="DEBUG") as logs:
+            with instrumentation.query("find_wrs_intersection") as stats:
+                stats.count("hits")
+        self.assertIn("find_wrs_intersection", logs.output[0])
+        self.assertFalse(instrumentation.is_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""Memory regression suite.
+
+Runs the entry points whose memory use grows with their input on synthetic
+inputs of increasing size, tracking the Python heap peak with tracemalloc
+and the process RSS peak (which also covers GDAL/GEOS allocations) with a
+sampling thread.
+
+Each entry point has a MemoryBudget. A test fails when the peak at the
+largest size exceeds the absolute budget, or when the peak grows faster
+than ``size_ratio ** max_growth_exponent`` between the smallest and largest
+size (an exponent of 1.0 allows linear growth, 0.0 constant memory).
+Entry points that stream their input get an exponent well below 1.0, so
+a regression to linear growth fails; the ones that have to hold their
+input (the unions) are allowed linear growth but nothing more.
+
+RSS is only checked where the resource module exists (not on Windows).
+"""
+
+import gc
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from collections import namedtuple
+from pathlib import Path
+
+from .. import grid_intersect
+from .. import converter as conv
+from . import synthetic
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+MB = 1024 * 1024
+
+SIZES = [500, 2000, 8000]
+
+# RSS sampling has page granularity and allocator noise, growth below this
+# is never treated as a regression
+RSS_SLACK = 16 * MB
+TRACEMALLOC_SLACK = 1 * MB
+
+MemoryBudget = namedtuple("MemoryBudget", "max_growth_exponent max_heap_mb max_rss_mb")
+
+MEMORY_BUDGETS = {
+    "get_geom_from_shapefile": MemoryBudget(1.0, 64, 256),
+    "create_coverage_poly": MemoryBudget(0.5, 64, 256),
+    "create_coverage_poly[GPKG]": MemoryBudget(0.5, 64, 256),
+    "dissolve": MemoryBudget(1.0, 64, 512),
+}
+
+
+def _current_rss():
+    if resource is None:
+        return 0
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # ru_maxrss is KB on Linux, only a lifetime peak elsewhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryProbe:
+    """Measure peak tracemalloc and RSS growth over a block of code."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.heap_peak = 0
+        self.rss_peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self, baseline):
+        while not self._stop.is_set():
+            self.rss_peak = max(self.rss_peak, _current_rss() - baseline)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        gc.collect()
+        baseline = _current_rss()
+        self._thread = threading.Thread(target=self._sample, args=(baseline,), daemon=True)
+        self._baseline = baseline
+        tracemalloc.start()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.heap_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self._stop.set()
+        self._thread.join()
+        self.rss_peak = max(self.rss_peak, _current_rss() - self._baseline)
+        return False
+
+
+class TestMemoryBudgets(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.work_dir = Path(cls.tmp_dir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def parcels(self, count):
+        path = Path(self.work_dir, f"parcels_{count}.shp")
+        if not path.exists():
+            synthetic.write_parcel_layer(path, count)
+        return str(path)
+
+    def measure(self, run):
+        peaks = []
+        for size in SIZES:
+            setup = run(size)
+            with MemoryProbe() as probe:
+                setup()
+            peaks.append((size, probe.heap_peak, probe.rss_peak))
+        return peaks
+
+    def assert_within_budget(self, name, peaks):
+        budget = MEMORY_BUDGETS[name]
+        (small, small_heap, small_rss), (large, large_heap, large_rss) = peaks[0], peaks[-1]
+        allowed = (large / small) ** budget.max_growth_exponent
+
+        report = ", ".join(f"{size}: heap {heap / MB:.1f}MB rss {rss / MB:.1f}MB"
+                           for size, heap, rss in peaks)
+
+        self.assertLessEqual(large_heap, budget.max_heap_mb * MB, f"{name} heap over budget ({report})")
+        self.assertLessEqual(large_heap, max(small_heap, TRACEMALLOC_SLACK) * allowed,
+                             f"{name} heap grows faster than allowed ({report})")
+
+        if resource is not None:
+            self.assertLessEqual(large_rss, budget.max_rss_mb * MB, f"{name} rss over budget ({report})")
+            self.assertLessEqual(large_rss, max(small_rss, RSS_SLACK) * allowed,
+                                 f"{name} rss grows faster than allowed ({report})")
+
+    def test_get_geom_from_shapefile(self):
+        def run(size):
+            path = self.parcels(size)
+            return lambda: grid_intersect.get_geom_from_shapefile(path)
+
+        self.assert_within_budget("get_geom_from_shapefile", self.measure(run))
+
+    def test_create_coverage_poly(self):
+        converter = conv.Converter()
+
+        def run(size):
+            products = dict(synthetic.synthetic_products(size))
+            out_dir = str(Path(self.work_dir, f"coverage_{size}"))
+            return lambda: converter.create_coverage_poly(products, "20190601", out_dir)
+
+        self.assert_within_budget("create_coverage_poly", self.measure(run))
+
+    def test_create_coverage_poly_gpkg(self):
+        converter = conv.Converter()
+
+        def run(size):
+            out_dir = str(Path(self.work_dir, f"coverage_gpkg_{size}"))
+            # a generator, so only the writer's own memory is measured
+            return lambda: converter.create_coverage_poly(
+                synthetic.synthetic_products(size), "20190601", out_dir, output_format="GPKG")
+
+        self.assert_within_budget("create_coverage_poly[GPKG]", self.measure(run))
+
+    def test_dissolve(self):
+        converter = conv.Converter()
+
+        def run(size):
+            src = self.parcels(size)
+            dst = str(Path(self.work_dir, f"dissolved_{size}.shp"))
+            return lambda: converter.dissolve(src, dst, overwrite=True)
+
+        self.assert_within_budget("dissolve", self.measure(run))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from .. import profiling
+
+
+@profiling.profiled(aoi="wkt_footprint")
+def slow_query(wkt_footprint, delay=0.0):
+    time.sleep(delay)
+    return nested_query(wkt_footprint)
+
+
+@profiling.profiled(aoi="wkt_footprint")
+def nested_query(wkt_footprint):
+    return len(wkt_footprint)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.wkt = "POLYGON ((-113.1 50.0,-112.4 49.9,-112.5 49.7,-113.1 50.0))"
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(profiling.configure_from_env({}))
+        self.assertEqual(slow_query(self.wkt), len(self.wkt))
+
+    def test_slow_call_writes_profile_and_sidecar(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with profiling.profile_slow_calls(tmp_dir, threshold=0.01):
+                slow_query(self.wkt, delay=0.02)
+
+            profiles = list(Path(tmp_dir).glob("*.prof"))
+            sidecars = list(Path(tmp_dir).glob("*.json"))
+            # the nested entry point is part of the outer profile only
+            self.assertEqual(len(profiles), 1)
+            self.assertEqual(len(sidecars), 1)
+
+            with open(sidecars[0]) as f:
+                sidecar = json.load(f)
+
+        self.assertEqual(sidecar["function"], "slow_query")
+        self.assertEqual(sidecar["aoi_sha1"], profiling.aoi_hash(self.wkt))
+        self.assertEqual(sidecar["geometry"]["type"], "POLYGON")
+        self.assertEqual(sidecar["geometry"]["vertices"], 4)
+        self.assertEqual(sidecar["geometry"]["envelope"], [-113.1, 49.7, -112.4, 50.0])
+
+    def test_fast_call_is_discarded(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with profiling.profile_slow_calls(tmp_dir, threshold=10):
+                slow_query(self.wkt)
+            self.assertEqual(list(Path(tmp_dir).iterdir()), [])
+
+    def test_configure_from_env(self):
+        config = profiling.configure_from_env({
+            "SPATIAL_OPS_PROFILE_DIR": "/tmp/profiles",
+            "SPATIAL_OPS_PROFILE_THRESHOLD": "2.5",
+        })
+        try:
+            self.assertEqual(config.threshold, 2.5)
+            self.assertEqual(config.output_dir, Path("/tmp/profiles"))
+        finally:
+            profiling.configure_from_env({})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from .. import grid_intersect
+from ..prune import prune_contained
+from . import synthetic
+
+
+class TestPruneContained(unittest.TestCase):
+
+    def test_drops_nested_and_duplicate_polygons(self):
+        outer = synthetic.box(0, 0, 10, 10)
+        nested = synthetic.box(1, 1, 2, 2)
+        duplicate = synthetic.box(0, 0, 10, 10)
+        overlapping = synthetic.box(9, 9, 12, 12)
+        separate = synthetic.box(20, 20, 21, 21)
+
+        result = prune_contained([nested, outer, duplicate, overlapping, separate])
+
+        self.assertEqual(result.input_count, 5)
+        self.assertEqual(result.contained, 1)
+        self.assertEqual(result.duplicates, 1)
+        self.assertEqual([g.GetEnvelope() for g in result.geometries],
+                         [outer.GetEnvelope(), overlapping.GetEnvelope(),
+                          separate.GetEnvelope()])
+
+    def test_large_container_among_small_polygons(self):
+        container = synthetic.box(-100, -100, 100, 100)
+        small = [synthetic.box(x * 0.01, 0, x * 0.01 + 0.005, 0.005) for x in range(200)]
+
+        result = prune_contained(small + [container])
+
+        self.assertEqual(result.contained, 200)
+        self.assertEqual(len(result.geometries), 1)
+
+    def test_pruned_union_is_unchanged(self):
+        geoms = [synthetic.box(x * 0.5, 0, x * 0.5 + 1, 1) for x in range(10)]
+        geoms += [synthetic.box(x * 0.5 + 0.1, 0.1, x * 0.5 + 0.3, 0.3) for x in range(10)]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir, 'nested.shp'))
+            synthetic.write_aoi_shapefile(path, geoms)
+
+            pruned = grid_intersect.get_geom_from_shapefile(path)
+            unpruned = grid_intersect.get_geom_from_shapefile(path, prune=False)
+
+        self.assertAlmostEqual(pruned.SymDifference(unpruned).GetArea(), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from .. import query_split
+from . import synthetic
+
+
+class TestQuerySplit(unittest.TestCase):
+
+    def setUp(self):
+        self.aoi = synthetic.noisy_polygon(-114.5, 54.0, 5.0, 5.5, 2000)
+
+    def assert_covers(self, chunks, geom):
+        union = chunks[0].Clone()
+        for chunk in chunks[1:]:
+            union = union.Union(chunk)
+        self.assertLess(geom.Difference(union).GetArea(), geom.GetArea() * 1e-9)
+
+    def test_chunks_stay_under_budget_and_cover_aoi(self):
+        chunks = query_split.split_query_polygon(self.aoi, max_vertices=200)
+
+        for chunk in chunks:
+            self.assertLessEqual(query_split.vertex_count(chunk), 200)
+        self.assert_covers(chunks, self.aoi)
+        # halving adds cut vertices, but not many more chunks than needed
+        self.assertLessEqual(len(chunks), 2 * query_split.vertex_count(self.aoi) // 200 + 2)
+
+    def test_tolerance_reduces_chunks_and_still_covers(self):
+        exact = query_split.split_query_polygon(self.aoi, max_vertices=200)
+        simplified = query_split.split_query_polygon(self.aoi, max_vertices=200, tolerance=0.05)
+
+        self.assertLess(len(simplified), len(exact))
+        self.assert_covers(simplified, self.aoi)
+
+    def test_small_aoi_is_single_chunk(self):
+        box = synthetic.box(0, 0, 1, 1)
+        self.assertEqual(len(query_split.split_query_polygon(box)), 1)
+
+    def test_rejects_tiny_budget(self):
+        with self.assertRaises(ValueError):
+            query_split.split_query_polygon(self.aoi, max_vertices=4)
+
+    def test_cli_prints_wkt(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir, 'aoi.shp'))
+            synthetic.write_aoi_shapefile(path, [self.aoi])
+
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                query_split.main([path, '--max-vertices', '500'])
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(line.startswith(('POLYGON', 'MULTIPOLYGON')) for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+try:
+    import numpy as np
+    from .. import raster_stats
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class TestBandStatistics(unittest.TestCase):
+
+    def test_blocks_match_whole_array(self):
+        data = np.arange(1, 10001, dtype=np.uint16).reshape(100, 100)
+        data[:10] = 0
+
+        stats = raster_stats.BandStatistics(nodata=0)
+        for yoff in range(0, 100, 7):
+            stats.update(data[yoff:yoff + 7])
+        result = stats.result()
+
+        valid = data[data != 0].astype(np.float64)
+        self.assertEqual(result['min'], valid.min())
+        self.assertEqual(result['max'], valid.max())
+        self.assertAlmostEqual(result['mean'], valid.mean())
+        self.assertAlmostEqual(result['std'], valid.std(), places=4)
+        self.assertAlmostEqual(result['nodata_fraction'], 0.1)
+        self.assertEqual(sum(result['histogram']['counts']), valid.size)
+        self.assertEqual(len(result['histogram']['counts']), raster_stats.DEFAULT_BUCKETS)
+
+    def test_float_histogram_uses_range(self):
+        data = np.linspace(0.0, 1.0, 1000, dtype=np.float32)
+        stats = raster_stats.BandStatistics(buckets=10, hist_range=(0.0, 1.0))
+        stats.update(data)
+        histogram = stats.result()['histogram']
+
+        self.assertEqual((histogram['min'], histogram['max']), (0.0, 1.0))
+        self.assertEqual(histogram['counts'], [100] * 10)
+
+    def test_all_nodata(self):
+        stats = raster_stats.BandStatistics(nodata=0)
+        stats.update(np.zeros((4, 4), dtype=np.uint8))
+        result = stats.result()
+
+        self.assertIsNone(result['mean'])
+        self.assertEqual(result['nodata_fraction'], 1.0)
+
+    def test_iter_windows_covers_raster(self):
+        windows = list(raster_stats.iter_windows(10, 5, 4, 2))
+        self.assertEqual(sum(w[2] * w[3] for w in windows), 50)
+        self.assertEqual(windows[-1], (8, 4, 2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import json
+import tempfile
+from pathlib import Path
+
+from .. import safe_ingest
+from ..converter import Converter
+
+
+class FakeConverter(Converter):
+    """Writes the source path instead of decoding the jp2."""
+
+    def __init__(self):
+        super().__init__()
+        self.converted = []
+
+    def convert_jp2_to_tif(self, original_file, destination_dir, atmos_cor,
+                           new_path, **kwargs):
+        output_file = self.jp2_output_path(original_file, destination_dir,
+                                           atmos_cor, new_path)
+        with open(output_file, 'w') as f:
+            f.write(str(original_file) * 10)
+        self.converted.append(output_file)
+        return output_file
+
+
+def make_safe(root, level):
+    name = f'S2A_MSI{level}_20190601T183921_N0207_R070_T12UUA_20190601T220000.SAFE'
+    img_dir = Path(root, name, 'GRANULE', f'{level}_T12UUA_A020000_20190601T184000', 'IMG_DATA')
+    files = []
+    if level == 'L1C':
+        img_dir.mkdir(parents=True)
+        for band in ['B02', 'B03', 'B8A', 'TCI']:
+            files.append(Path(img_dir, f'T12UUA_20190601T183921_{band}.jp2'))
+    else:
+        for res, bands in [(10, ['B02', 'B03', 'TCI']), (20, ['B02', 'B8A', 'SCL']), (60, ['B01'])]:
+            res_dir = Path(img_dir, f'R{res}m')
+            res_dir.mkdir(parents=True)
+            for band in bands:
+                files.append(Path(res_dir, f'T12UUA_20190601T183921_{band}_{res}m.jp2'))
+    for f in files:
+        f.touch()
+    return Path(root, name)
+
+
+class TestSafeIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_find_band_files_l1c(self):
+        band_files = safe_ingest.find_band_files(make_safe(self.root, 'L1C'))
+        self.assertEqual([(b.band, b.resolution, b.level) for b in band_files],
+                         [('B02', 0, 'L1C'), ('B03', 0, 'L1C'), ('B8A', 0, 'L1C')])
+
+    def test_find_band_files_l2a(self):
+        band_files = safe_ingest.find_band_files(make_safe(self.root, 'L2A'))
+        self.assertEqual([(b.band, b.resolution) for b in band_files],
+                         [('B02', 10), ('B03', 10), ('B02', 20), ('B8A', 20), ('B01', 60)])
+
+    def test_ingest_records_manifest_and_resumes(self):
+        safe_dir = make_safe(self.root, 'L2A')
+        out_dir = Path(self.root, 'out')
+
+        first = FakeConverter()
+        result = safe_ingest.ingest_safe(safe_dir, out_dir, converter=first, workers=2)
+        self.assertEqual(len(result['converted']), 5)
+        self.assertEqual(result['skipped'], [])
+
+        with open(Path(out_dir, safe_ingest.MANIFEST_NAME)) as f:
+            manifest = json.load(f)['outputs']
+        self.assertEqual(len(manifest), 5)
+        self.assertIn('S2A_MSIL2A_20190601T183921_N0207_R070_T12UUA_20190601T220000_B8A_20m.tif',
+                      manifest)
+
+        # simulate a half written file left by an interrupted run
+        truncated = Path(result['converted'][0])
+        with open(truncated, 'w') as f:
+            f.write('x')
+
+        second = FakeConverter()
+        result = safe_ingest.ingest_safe(safe_dir, out_dir, converter=second)
+        self.assertEqual(second.converted, [str(truncated)])
+        self.assertEqual(len(result['skipped']), 4)
+
+    def test_checksum_verification(self):
+        safe_dir = make_safe(self.root, 'L1C')
+        out_dir = Path(self.root, 'out')
+        result = safe_ingest.ingest_safe(safe_dir, out_dir, converter=FakeConverter(),
+                                         bands=['B02'])
+
+        # same size, different content
+        output_file = result['converted'][0]
+        with open(output_file) as f:
+            content = f.read()
+        with open(output_file, 'w') as f:
+            f.write(content[::-1])
+
+        converter = FakeConverter()
+        safe_ingest.ingest_safe(safe_dir, out_dir, converter=converter, bands=['B02'])
+        self.assertEqual(converter.converted, [])
+
+        safe_ingest.ingest_safe(safe_dir, out_dir, converter=converter, bands=['B02'],
+                                verify_checksums=True)
+        self.assertEqual(converter.converted, [output_file])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from ..service import TileQueryClient, TileQueryService, make_server
+
+try:
+    from .._gdal import ogr
+    ogr.Geometry
+except ImportError:
+    ogr = None
+
+
+class FakeGeometry:
+
+    def __init__(self, tile_id):
+        self.tile_id = tile_id
+
+    def ExportToWkt(self):
+        return 'POLYGON (({}))'.format(self.tile_id)
+
+
+class FakeStore:
+    """Stands in for a GridStore, WRS 044023 overlaps 11UNU and 11UNV."""
+
+    grid_dir = Path('grid_files')
+    overlaps = {'044023': ['11UNU', '11UNV'], '11UNU': ['044023'], '11UNV': ['044023', '045023']}
+
+    def __init__(self):
+        self.joins = []
+
+    def footprint(self, tile_id):
+        return FakeGeometry(tile_id) if tile_id in self.overlaps else None
+
+    def mgrs_tiles(self, geom):
+        return self.overlaps[geom.tile_id]
+
+    wrs_tiles = mgrs_tiles
+
+    def join(self, geoms, mgrs=True, wrs=True):
+        self.joins.append(len(geoms))
+        return [{'mgrs': ['11UNU'] if mgrs else [], 'wrs': ['044023'] if wrs else []}
+                for _ in geoms]
+
+
+class TestTileQueryService(unittest.TestCase):
+
+    def setUp(self):
+        self.store = FakeStore()
+        self.service = TileQueryService(self.store)
+
+    def test_footprint(self):
+        self.assertEqual(self.service.handle({'op': 'footprint', 'tile_id': '11UNU'}),
+                         {'tile_id': '11UNU', 'wkt': 'POLYGON ((11UNU))'})
+        self.assertIsNone(self.service.handle({'op': 'footprint', 'tile_id': 'nope'})['wkt'])
+
+    def test_conversions(self):
+        self.assertEqual(self.service.handle({'op': 'wrs_to_mgrs', 'tile_ids': ['044023']}),
+                         {'tiles': ['11UNU', '11UNV']})
+        self.assertEqual(
+            self.service.handle({'op': 'mgrs_to_wrs', 'tile_ids': ['11UNU', '11UNV']}),
+            {'tiles': ['044023', '045023']})
+
+    @unittest.skipIf(ogr is None, 'GDAL is not installed')
+    def test_tiles_are_joined_in_one_batch(self):
+        wkt = 'POLYGON ((-116 52,-114 52,-114 53,-116 53,-116 52))'
+        results = self.service.handle_batch([
+            {'op': 'tiles', 'wkt': wkt},
+            {'op': 'footprint', 'tile_id': '11UNU'},
+            {'op': 'tiles', 'wkt': wkt, 'mgrs': False},
+        ])
+
+        self.assertEqual(self.store.joins, [2])
+        self.assertEqual(results[0], {'mgrs': ['11UNU'], 'wrs': ['044023']})
+        self.assertEqual(results[2], {'wrs': ['044023']})
+
+    @unittest.skipIf(ogr is None, 'GDAL is not installed')
+    def test_bad_geometry_fails_its_own_request(self):
+        wkt = 'POLYGON ((-116 52,-114 52,-114 53,-116 53,-116 52))'
+        results = self.service.handle_batch([
+            {'op': 'tiles', 'wkt': 'POLYGON ((nope'},
+            {'op': 'tiles', 'wkt': wkt},
+            {'op': 'tiles'},
+        ])
+
+        self.assertEqual(self.store.joins, [1])
+        self.assertIn('error', results[0])
+        self.assertEqual(results[1], {'mgrs': ['11UNU'], 'wrs': ['044023']})
+        self.assertIn('error', results[2])
+        metrics = self.service.metrics()
+        self.assertEqual(metrics['requests'], {'tiles': 3})
+        self.assertEqual(metrics['errors'], {'tiles': 2})
+
+    def test_invalid_requests(self):
+        results = self.service.handle_batch([{'op': 'nope'}, 'junk', {'op': 'footprint'},
+                                             {'op': 'tiles'}])
+
+        self.assertTrue(all('error' in result for result in results))
+        self.assertEqual(self.store.joins, [])
+        self.assertEqual(self.service.metrics()['errors'],
+                         {'invalid': 2, 'footprint': 1, 'tiles': 1})
+
+
+class TestTileQueryServer(unittest.TestCase):
+    """Round trips through a real server, over TCP and a UNIX socket."""
+
+    def start(self, **kwargs):
+        self.store = FakeStore()
+        server = make_server(TileQueryService(self.store), **kwargs)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_tcp(self):
+        server = self.start(port=0)
+        client = TileQueryClient(*server.server_address[:2])
+
+        self.assertEqual(client.health()['status'], 'ok')
+        self.assertEqual(client.footprint('044023'), 'POLYGON ((044023))')
+        self.assertEqual(client.wrs_to_mgrs(['044023']), ['11UNU', '11UNV'])
+        with self.assertRaises(ValueError):
+            client.query({'op': 'nope'})
+
+        for requests in (3, {'op': 'footprint'}, 'footprint'):
+            with self.assertRaises(ValueError):
+                client.query({'requests': requests})
+
+        metrics = client.metrics()
+        self.assertEqual(metrics['requests'], {'footprint': 1, 'wrs_to_mgrs': 1, 'invalid': 1})
+        self.assertEqual(metrics['errors'], {'invalid': 1})
+
+    @unittest.skipUnless(hasattr(__import__('socket'), 'AF_UNIX'), 'no UNIX sockets')
+    def test_unix_socket_batch(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = str(Path(tmp_dir.name, 'tiles.sock'))
+        self.start(unix_socket=path)
+        client = TileQueryClient(unix_socket=path)
+
+        results = client.batch([{'op': 'footprint', 'tile_id': '11UNU'},
+                                {'op': 'mgrs_to_wrs', 'tile_ids': ['11UNU']}])
+
+        self.assertEqual(results, [{'tile_id': '11UNU', 'wkt': 'POLYGON ((11UNU))'},
+                                   {'tiles': ['044023']}])
+
+
+
+@unittest.skipIf(ogr is None, 'GDAL is not installed')
+class TestTileQueryServerGridStore(unittest.TestCase):
+    """Round trip through a server backed by a real GridStore over the
+    synthetic grid."""
+
+    @classmethod
+    def setUpClass(cls):
+        from . import synthetic
+        from ..grid_store import GridStore
+
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.store = GridStore(synthetic.build_grid_dir(Path(cls.tmp_dir.name, 'grid_files')))
+        cls.aoi = synthetic.aoi_geometry('county')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        server = make_server(TileQueryService(self.store), port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        client = TileQueryClient(*server.server_address[:2])
+
+        expected = self.store.join([self.aoi])[0]
+        self.assertTrue(expected['mgrs'] and expected['wrs'])
+        self.assertEqual(client.tiles(self.aoi.ExportToWkt()), expected)
+
+        wrs = expected['wrs'][0]
+        footprint = ogr.CreateGeometryFromWkt(client.footprint(wrs))
+        self.assertTrue(footprint.Equals(self.store.footprint(wrs)))
+        self.assertEqual(client.wrs_to_mgrs([wrs]),
+                         sorted(set(self.store.mgrs_tiles(self.store.footprint(wrs)))))
+
+
+if __name__ == '__main__':
+    unittest.main()
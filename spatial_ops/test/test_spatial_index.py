@@ -0,0 +1,61 @@
+import unittest
+
+from .. import spatial_index
+
+
+class TestEnvelopeIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = spatial_index.EnvelopeIndex(cell_size=1.0)
+        # envelopes are (minx, maxx, miny, maxy) like OGR's GetEnvelope
+        self.index.insert('a', (0.0, 0.5, 0.0, 0.5))
+        self.index.insert('b', (0.4, 2.6, 0.4, 0.6))
+        self.index.insert('c', (-10.5, -9.5, 40.0, 41.0))
+
+    def test_query_returns_overlapping_keys_once(self):
+        self.assertEqual(self.index.query((0.45, 0.46, 0.45, 0.46)), ['a', 'b'])
+        self.assertEqual(self.index.query((2.0, 3.0, 0.0, 1.0)), ['b'])
+        self.assertEqual(self.index.query((-10.0, -10.0, 40.5, 40.5)), ['c'])
+
+    def test_query_filters_same_cell_misses(self):
+        self.assertEqual(self.index.query((0.7, 0.8, 0.7, 0.8)), [])
+
+    def test_envelope_predicates(self):
+        self.assertTrue(spatial_index.envelopes_intersect((0, 1, 0, 1), (1, 2, 1, 2)))
+        self.assertFalse(spatial_index.envelopes_intersect((0, 1, 0, 1), (1.1, 2, 0, 1)))
+        self.assertTrue(spatial_index.envelope_contains((0, 10, 0, 10), (1, 2, 1, 2)))
+        self.assertFalse(spatial_index.envelope_contains((0, 10, 0, 10), (9, 11, 1, 2)))
+        self.assertEqual(len(self.index), 3)
+
+    def test_prepare(self):
+        class Plain:
+            pass
+
+        class Preparable:
+            def CreatePreparedGeometry(self):
+                return 'prepared'
+
+        plain = Plain()
+        self.assertIs(spatial_index.prepare(plain), plain)
+        self.assertEqual(spatial_index.prepare(Preparable()), 'prepared')
+
+    def test_query_larger_than_occupied_cells(self):
+        self.assertEqual(self.index.query((-1e6, 1e6, -1e6, 1e6)), ['a', 'b', 'c'])
+
+
+class TestMultiScaleEnvelopeIndex(unittest.TestCase):
+
+    def test_mixed_sizes(self):
+        index = spatial_index.MultiScaleEnvelopeIndex(cell_size=1.0)
+        index.insert('small', (0.0, 0.5, 0.0, 0.5))
+        index.insert('huge', (-5000.0, 5000.0, -5000.0, 5000.0))
+        index.insert('far', (9000.0, 9000.5, 0.0, 0.5))
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(len(index._levels), 2)
+        self.assertEqual(index.query((0.1, 0.2, 0.1, 0.2)), ['small', 'huge'])
+        self.assertEqual(index.query((4000.0, 9500.0, 0.0, 1.0)), ['far', 'huge'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from .. import _gdal
+from .. import tile_ids
+
+PACKAGE_ROOT = Path(__file__).absolute().parent.parent.parent
+
+# Budget for importing grid_intersect on top of a bare interpreter start
+IMPORT_TIME_LIMIT = 0.5
+
+
+def run_python(code):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=str(PACKAGE_ROOT),
+                         capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, out.stdout.strip()
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_does_not_load_gdal(self):
+        _, loaded = run_python(
+            "import sys\n"
+            "import spatial_ops.grid_intersect, spatial_ops.converter, spatial_ops.utils\n"
+            "print('osgeo' in sys.modules)")
+        self.assertEqual(loaded, "False")
+
+    def test_import_time_under_limit(self):
+        bare = min(run_python("pass")[0] for _ in range(3))
+        with_import = min(run_python("import spatial_ops.grid_intersect")[0] for _ in range(3))
+        self.assertLess(with_import - bare, IMPORT_TIME_LIMIT)
+
+    def test_lazy_module_loads_on_first_use(self):
+        lazy_json = _gdal.LazyModule("json")
+        self.assertIn("not loaded", repr(lazy_json))
+        self.assertEqual(lazy_json.dumps([1]), "[1]")
+        self.assertNotIn("not loaded", repr(lazy_json))
+
+
+class TestTileIds(unittest.TestCase):
+
+    def test_determine_tile_mgrs_or_wrs(self):
+        self.assertEqual(tile_ids.determine_tile_mgrs_or_wrs("11UQR"), "mgrs")
+        self.assertEqual(tile_ids.determine_tile_mgrs_or_wrs("044023"), "wrs")
+        self.assertEqual(tile_ids.determine_tile_mgrs_or_wrs("AAB003"), "unknown")
+
+    def test_parse_mgrs_tile(self):
+        self.assertEqual(tile_ids.parse_mgrs_tile("11UQR"), ("11U", "QR"))
+        self.assertIsNone(tile_ids.parse_mgrs_tile("044023"))
+
+    def test_parse_wrs_pathrow(self):
+        self.assertEqual(tile_ids.parse_wrs_pathrow("044023"), (44, 23))
+        self.assertIsNone(tile_ids.parse_wrs_pathrow("11UQR"))
+
+    def test_tile_from_title(self):
+        self.assertEqual(
+            tile_ids.tile_from_title("S2A_MSIL1C_20190601T183921_N0207_R070_T12UUA_20190601T220000"),
+            ("mgrs", "12UUA"))
+        self.assertEqual(tile_ids.tile_from_title("LC08_L1TP_044023_20190601_20190605_01_T1"),
+                         ("wrs", "044023"))
+        self.assertIsNone(tile_ids.tile_from_title("S1A_IW_GRDH_1SDV_20190601T003412_027500"))
+        self.assertIsNone(tile_ids.tile_from_title(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
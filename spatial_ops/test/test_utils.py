@@ -0,0 +1,37 @@
+import unittest
+
+from .. import utils
+from . import synthetic
+
+
+class TestIntersectionMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.footprints = [synthetic.box(x, 0, x + 1, 1) for x in range(0, 10, 2)]
+        self.aois = [synthetic.box(0.5, 0.5, 2.5, 2.5).ExportToWkt(),
+                     synthetic.box(100, 100, 101, 101).ExportToWkb(),
+                     synthetic.box(7.5, -1, 8.25, 0.5).ExportToJson()]
+
+    def test_pairs_match_pairwise_tests(self):
+        expected = [(i, j)
+                    for i, a in enumerate(self.footprints)
+                    for j, b in enumerate(self.aois)
+                    if a.Intersects(utils.as_geometry(b))]
+        self.assertEqual(utils.intersection_pairs(self.footprints, self.aois), expected)
+        self.assertEqual(expected, [(0, 0), (1, 0), (4, 2)])
+
+    def test_matrix_with_areas(self):
+        matrix = utils.intersection_matrix(self.footprints, self.aois, areas=True)
+        self.assertEqual(sorted(matrix), [(0, 0), (1, 0), (4, 2)])
+        self.assertAlmostEqual(matrix[(0, 0)], 0.25)
+        self.assertAlmostEqual(matrix[(4, 2)], 0.125)
+
+    def test_empty_inputs(self):
+        self.assertEqual(utils.intersection_matrix([], self.aois), {})
+
+    def test_polygons_intersect(self):
+        self.assertTrue(utils.polygons_intersect(self.footprints[0].ExportToWkt(), self.aois[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
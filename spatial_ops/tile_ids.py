@@ -0,0 +1,79 @@
+"""tile_ids.py -- Part of spatialops Module
+
+Pure python parsing of MGRS and WRS2 tile identifiers.
+
+Nothing in here needs GDAL, so CLI tools and services that only have to
+recognise or split tile ids can import it without loading the GDAL
+bindings.
+"""
+
+import re
+
+MGRS_100KM_RE = re.compile(r"[01234656]\d{1}[C-HJ-NP-X][A-HJ-NP-Z][A-HJ-NP-V]")
+WRS_PATHROW_RE = re.compile(r"\d{6}")
+
+
+def determine_tile_mgrs_or_wrs(tile_id):
+    """
+    Returns 'mgrs' if mgrs tile, 'wrs' if wrs tile id, or 'unknown' if neither
+    """
+    mgrs_search = MGRS_100KM_RE.search(tile_id)
+    wrs_search = WRS_PATHROW_RE.search(tile_id)
+
+    tile_type = None
+    if mgrs_search:
+        tile_type = "mgrs"
+    elif wrs_search:
+        tile_type = "wrs"
+    else:
+        tile_type = "unknown"
+
+    return tile_type
+
+
+def parse_mgrs_tile(mgrs_100km_id):
+    """Split a MGRS 100km id (11UQR) into its GZD and square, (11U, QR).
+
+    Returns None if the id isn't a valid MGRS 100km id.
+    """
+    m = MGRS_100KM_RE.search(mgrs_100km_id)
+    if not m:
+        return None
+    tile = m.group(0)
+    return tile[:3], tile[3:]
+
+
+def parse_wrs_pathrow(wrs_pathrow):
+    """Split a zero padded 6 char WRS2 pathrow (044023) into (44, 23).
+
+    Returns None if the string isn't a valid pathrow.
+    """
+    m = WRS_PATHROW_RE.search(wrs_pathrow)
+    if not m:
+        return None
+    pathrow = m.group(0)
+    return int(pathrow[:3]), int(pathrow[3:])
+
+
+# S2A_MSIL1C_20190601T183921_N0207_R070_T12UUA_20190601T220000
+S2_TITLE_TILE_RE = re.compile(r"_T(\d{2}[C-HJ-NP-X][A-HJ-NP-Z][A-HJ-NP-V])(?:_|\.|$)")
+# LC08_L1TP_044023_20190601_20190605_01_T1
+LANDSAT_TITLE_PATHROW_RE = re.compile(r"^L[COTEM]0\d_[A-Z0-9]{4}_(\d{6})_")
+
+
+def tile_from_title(title):
+    """Return ('mgrs', '12UUA') or ('wrs', '044023') for Sentinel-2 and
+    Landsat product titles that embed their tile, None otherwise.
+    """
+    if not title:
+        return None
+
+    m = S2_TITLE_TILE_RE.search(title)
+    if m:
+        return "mgrs", m.group(1)
+
+    m = LANDSAT_TITLE_PATHROW_RE.search(title)
+    if m:
+        return "wrs", m.group(1)
+
+    return None
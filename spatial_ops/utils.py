@@ -1,21 +1,94 @@
-from osgeo import ogr, osr
+import logging
+
+from ._gdal import ogr, osr
+from .spatial_index import MultiScaleEnvelopeIndex, prepare
+
+logger = logging.getLogger(__name__)
 
-ogr.UseExceptions()
 
 def polygons_intersect(polygon1, polygon2):
     """Given 2 polygons defined as WKT strings, return True if they intersect"""
     poly1 = ogr.CreateGeometryFromWkt(polygon1)
     poly2 = ogr.CreateGeometryFromWkt(polygon2)
 
-    print(poly1)
-    print(poly2)
-
     intersection = poly1.Intersects(poly2)
-    print(intersection)
-    if intersection:
-        print('INTERSECT FOUND')
-    else:
-        print('NO INTERSECT FOUND')
+    logger.debug('%s %s intersect: %s', poly1, poly2, intersection)
 
     return True if intersection else False
-   
\ No newline at end of file
+
+
+def as_geometry(geom):
+    """Returns an OGR geometry for a geometry, WKT, WKB or GeoJSON string."""
+    if isinstance(geom, ogr.Geometry):
+        return geom
+    if isinstance(geom, (bytes, bytearray)):
+        return ogr.CreateGeometryFromWkb(bytes(geom))
+    if geom.lstrip().startswith('{'):
+        return ogr.CreateGeometryFromJson(geom)
+    return ogr.CreateGeometryFromWkt(geom)
+
+
+def intersection_pairs(geoms_a, geoms_b, areas=False):
+    """Finds every intersecting pair between two lists of geometries.
+
+    Each geometry is parsed once, the second list is put in a
+    MultiScaleEnvelopeIndex and only pairs with overlapping envelopes get
+    the exact Intersects test, on a prepared geometry of geoms_a.
+
+    Args:
+        geoms_a (list): OGR geometries, WKT, WKB or GeoJSON strings, e.g.
+            product footprints.
+        geoms_b (list): Same, e.g. AOIs.
+        areas (bool): Also compute the area of each intersection, in the
+            units of the geometries.
+
+    Returns:
+        (list): (i, j) index pairs into geoms_a and geoms_b, sorted, or
+            (i, j, area) if areas is set.
+
+    """
+    geoms_a = [as_geometry(g) for g in geoms_a]
+    geoms_b = [as_geometry(g) for g in geoms_b]
+    envelopes_b = [g.GetEnvelope() for g in geoms_b]
+
+    if not geoms_a or not geoms_b:
+        return []
+
+    widths = sorted(max(e[1] - e[0], e[3] - e[2]) for e in envelopes_b)
+    index = MultiScaleEnvelopeIndex(max(widths[len(widths) // 2] * 2, 1e-9))
+    for j, envelope in enumerate(envelopes_b):
+        index.insert(j, envelope)
+
+    pairs = []
+    for i, geom in enumerate(geoms_a):
+        candidates = sorted(index.query(geom.GetEnvelope()))
+        if not candidates:
+            continue
+        prepared = prepare(geom)
+        for j in candidates:
+            if not prepared.Intersects(geoms_b[j]):
+                continue
+            if areas:
+                pairs.append((i, j, geom.Intersection(geoms_b[j]).GetArea()))
+            else:
+                pairs.append((i, j))
+
+    return pairs
+
+
+def intersection_matrix(geoms_a, geoms_b, areas=False):
+    """Returns the sparse intersection matrix of two lists of geometries.
+
+    Args:
+        geoms_a (list): Row geometries, see intersection_pairs.
+        geoms_b (list): Column geometries.
+        areas (bool): Store intersection areas instead of True.
+
+    Returns:
+        (dict): {(i, j): True or area} for the intersecting pairs only.
+
+    """
+    pairs = intersection_pairs(geoms_a, geoms_b, areas)
+    if areas:
+        return {(i, j): area for i, j, area in pairs}
+    return {pair: True for pair in pairs}